@@ -11,7 +11,11 @@ from app.core.config import settings
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", settings.DATABASE.URL_SYNC)
+# URL можно передать через config.attributes (используется в тестах миграций)
+config.set_main_option(
+    "sqlalchemy.url",
+    config.attributes.get("sqlalchemy.url", settings.DATABASE.URL_SYNC),
+)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
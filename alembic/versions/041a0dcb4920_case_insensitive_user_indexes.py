@@ -0,0 +1,104 @@
+"""case-insensitive indexes on username and email
+
+Revision ID: 041a0dcb4920
+Revises: b4e81f2d6c07
+Create Date: 2026-10-19 15:21:37.640911
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "041a0dcb4920"
+down_revision: Union[str, Sequence[str], None] = "b4e81f2d6c07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+users_table = sa.table(
+    "users",
+    sa.column("id", sa.Integer),
+    sa.column("username", sa.String),
+    sa.column("email", sa.String),
+)
+
+# записей users, читаемых и обновляемых за один запрос
+BATCH_SIZE = 1000
+
+
+def backfill_lowercase() -> None:
+    """Приводит к нижнему регистру username и email старых записей.
+
+    Регистр меняется средствами Python, а не SQL lower(): в SQLite
+    lower() работает только с ASCII. Если после приведения значения
+    совпадут, миграция упадет на уникальном ограничении - такие записи
+    нужно разобрать вручную.
+
+    Записи читаются пачками по BATCH_SIZE в порядке id (с id больше
+    последнего прочитанного), измененные записи пачки обновляются
+    до чтения следующей.
+    """
+    conn = op.get_bind()
+    update = (
+        users_table.update()
+        .where(users_table.c.id == sa.bindparam("user_id"))
+        .values(
+            username=sa.bindparam("new_username"),
+            email=sa.bindparam("new_email"),
+        )
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(
+                users_table.c.id, users_table.c.username, users_table.c.email
+            )
+            .where(users_table.c.id > last_id)
+            .order_by(users_table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        changed = [
+            {
+                "user_id": row.id,
+                "new_username": row.username.lower(),
+                "new_email": row.email.lower(),
+            }
+            for row in rows
+            if row.username != row.username.lower()
+            or row.email != row.email.lower()
+        ]
+        if changed:
+            conn.execute(update, changed)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    backfill_lowercase()
+    # индекс по первичному ключу избыточен
+    op.drop_index(op.f("ix_users_id"), table_name="users")
+    op.create_index(
+        "ix_users_username_lower",
+        "users",
+        [sa.text("lower(username)")],
+        unique=True,
+    )
+    op.create_index(
+        "ix_users_email_lower",
+        "users",
+        [sa.text("lower(email)")],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_email_lower", table_name="users")
+    op.drop_index("ix_users_username_lower", table_name="users")
+    op.create_index(op.f("ix_users_id"), "users", ["id"], unique=False)
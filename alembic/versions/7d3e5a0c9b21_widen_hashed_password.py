@@ -0,0 +1,42 @@
+"""widen hashed_password for argon2 hashes
+
+Revision ID: 7d3e5a0c9b21
+Revises: 1caf096b4091
+Create Date: 2026-10-19 11:40:08.502117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d3e5a0c9b21"
+down_revision: Union[str, Sequence[str], None] = "1caf096b4091"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.alter_column(
+            "hashed_password",
+            existing_type=sa.String(length=60),
+            type_=sa.String(length=255),
+            existing_nullable=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.alter_column(
+            "hashed_password",
+            existing_type=sa.String(length=255),
+            type_=sa.String(length=60),
+            existing_nullable=False,
+        )
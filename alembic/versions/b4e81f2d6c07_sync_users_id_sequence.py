@@ -0,0 +1,34 @@
+"""sync users id sequence after seeding admin
+
+Revision ID: b4e81f2d6c07
+Revises: 7d3e5a0c9b21
+Create Date: 2026-10-19 14:05:52.114370
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4e81f2d6c07"
+down_revision: Union[str, Sequence[str], None] = "7d3e5a0c9b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # seeding_admin вставляет пользователя с явным id=1, в PostgreSQL
+    # после этого последовательность id нужно сдвинуть вручную
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('users', 'id'), "
+            "COALESCE(MAX(id), 0) + 1, false) FROM users"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
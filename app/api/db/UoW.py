@@ -1,8 +1,23 @@
-from typing import Protocol, Self, runtime_checkable
+from typing import Optional, Protocol, Self, runtime_checkable
 
-from app.api.db.database import async_session_maker
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.db.database import get_replica_router, get_session_maker
+from app.api.repositories.api_key_repository import (
+    CachedApiKeyRepository,
+    IApiKeyRepository,
+)
+from app.api.repositories.refresh_token_repository import (
+    AlchemyRefreshTokenRepository,
+    IRefreshTokenRepository,
+)
+from app.api.repositories.revoked_token_repository import (
+    AlchemyRevokedTokenRepository,
+    IRevokedTokenRepository,
+)
 from app.api.repositories.user_repository import (
-    AlchemyUserRepository,
+    CachedUserRepository,
     IUserRepository,
 )
 
@@ -10,6 +25,9 @@ from app.api.repositories.user_repository import (
 @runtime_checkable
 class IUserUnitOfWork(Protocol):
     user_repo: IUserRepository
+    refresh_token_repo: IRefreshTokenRepository
+    api_key_repo: IApiKeyRepository
+    revoked_token_repo: IRevokedTokenRepository
 
     async def __aenter__(self) -> Self: ...
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None: ...
@@ -18,23 +36,97 @@ class IUserUnitOfWork(Protocol):
 
 
 class UserUnitOfWork:
+    """UoW с ленивым созданием сессии.
+
+    Сессия создается при первом обращении репозитория к БД. Если
+    репозитории не обращались к БД (например, ответ взят из кеша),
+    commit/rollback и закрытие сессии не выполняются.
+
+    route_key - ключ данных (имя пользователя), которые затрагивает
+    операция; после записи по нему чтение на время идет с основной БД.
+    """
+
     def __init__(self):
-        self.session_factory = async_session_maker
+        self.session_factory = get_session_maker()
+        self.route_key: Optional[str] = None
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self.session_factory()
+        return self._session
 
     async def __aenter__(self) -> Self:
-        self.session = self.session_factory()
-        self.user_repo = AlchemyUserRepository(self.session)
+        self._session = None
+        self.user_repo = CachedUserRepository(lambda: self.session)
+        self.refresh_token_repo = AlchemyRefreshTokenRepository(
+            lambda: self.session
+        )
+        self.api_key_repo = CachedApiKeyRepository(lambda: self.session)
+        self.revoked_token_repo = AlchemyRevokedTokenRepository(
+            lambda: self.session
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-        if exc_type:
-            await self.rollback()
-        else:
-            await self.commit()
-        await self.session.close()
+        route_key, self.route_key = self.route_key, None
+        if self._session is None:
+            return
+        try:
+            if exc_type:
+                await self.rollback()
+            else:
+                await self.commit()
+                if route_key is not None:
+                    get_replica_router().mark_written(route_key)
+        finally:
+            await self._session.close()
+            self._session = None
 
     async def commit(self) -> None:
-        await self.session.commit()
+        if self._session is not None:
+            await self._session.commit()
 
     async def rollback(self) -> None:
-        await self.session.rollback()
+        if self._session is not None:
+            await self._session.rollback()
+
+
+class ReadOnlyUserUnitOfWork(UserUnitOfWork):
+    """UoW для операций только на чтение.
+
+    Транзакция не фиксируется: при выходе сессия просто закрывается,
+    а соединение возвращается в пул (пул сам делает rollback).
+    Изменения, сделанные через этот UoW, не сохраняются.
+
+    Если настроены реплики, чтение идет с них (см. ReplicaRouter).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._replica: Optional[async_sessionmaker] = None
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._replica = get_replica_router().session_maker_for_read(
+                self.route_key
+            )
+            self._session = (self._replica or self.session_factory)()
+        return self._session
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.route_key = None
+        if self._session is None:
+            return
+        connection_errors = (OperationalError, InterfaceError, OSError)
+        if exc_type and issubclass(exc_type, connection_errors):
+            if self._replica is not None:
+                get_replica_router().eject(self._replica)
+        await self._session.close()
+        self._session = None
+        self._replica = None
+
+    async def commit(self) -> None:
+        pass
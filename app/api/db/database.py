@@ -1,15 +1,135 @@
+import itertools
+import time
+from functools import cache
+from typing import Optional
+
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
 
-from app.core.config import settings
+from app.api.utils.cache import TTLCache
+from app.core.config import DatabaseSettings, get_settings
+
+
+def get_engine_options(url: str, db_settings: DatabaseSettings) -> dict:
+    """Параметры create_async_engine в зависимости от диалекта БД."""
+
+    options = {"echo": db_settings.ECHO}
+    if make_url(url).get_backend_name() == "postgresql":
+        options.update(
+            pool_size=db_settings.POOL_SIZE,
+            max_overflow=db_settings.MAX_OVERFLOW,
+            pool_recycle=db_settings.POOL_RECYCLE,
+            pool_pre_ping=True,
+            connect_args={
+                "statement_cache_size": db_settings.STATEMENT_CACHE_SIZE,
+                "prepared_statement_cache_size": (
+                    db_settings.PREPARED_STATEMENT_CACHE_SIZE
+                ),
+            },
+        )
+    return options
+
+
+def create_engine_from_url(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url, **get_engine_options(url, get_settings().DATABASE)
+    )
 
 
-engine = create_async_engine(settings.DATABASE.URL, echo=True)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+# движок создается при первом обращении, а не при импорте модуля:
+# вместе с ним импортируются диалект и драйвер БД
+@cache
+def get_engine() -> AsyncEngine:
+    return create_engine_from_url(get_settings().DATABASE.URL)
+
+
+@cache
+def get_session_maker() -> async_sessionmaker:
+    return async_sessionmaker(get_engine(), expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
     pass
+
+
+class ReplicaRouter:
+    """Распределяет чтение между репликами БД.
+
+    Реплики выбираются по кругу. Реплика, на которой произошла ошибка
+    соединения, исключается из ротации на eject_seconds. Для ключа
+    (например, имени пользователя), по которому недавно была запись,
+    чтение в течение sticky_seconds идет на основную БД, чтобы не
+    читать с реплики устаревшие данные.
+    """
+
+    def __init__(
+        self,
+        replicas: list[async_sessionmaker],
+        eject_seconds: float,
+        sticky_seconds: float,
+    ) -> None:
+        self.replicas = replicas
+        self.eject_seconds = eject_seconds
+        self._order = itertools.cycle(range(len(replicas)))
+        self._ejected_until: dict[int, float] = {}
+        self._recent_writes: TTLCache[str, bool] = TTLCache(
+            maxsize=100_000, ttl=sticky_seconds
+        )
+
+    def session_maker_for_read(
+        self, key: Optional[str] = None
+    ) -> Optional[async_sessionmaker]:
+        """Возвращает фабрику сессий реплики или None для основной БД."""
+
+        if not self.replicas or (
+            key is not None and key in self._recent_writes
+        ):
+            return None
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            index = next(self._order)
+            if self._ejected_until.get(index, 0) <= now:
+                return self.replicas[index]
+        return None
+
+    def eject(self, session_maker: async_sessionmaker) -> None:
+        if session_maker in self.replicas:
+            index = self.replicas.index(session_maker)
+            self._ejected_until[index] = time.monotonic() + self.eject_seconds
+
+    def mark_written(self, key: str) -> None:
+        self._recent_writes.set(key, True)
+
+
+@cache
+def get_replica_router() -> ReplicaRouter:
+    db_settings = get_settings().DATABASE
+    return ReplicaRouter(
+        replicas=[
+            async_sessionmaker(
+                create_engine_from_url(url), expire_on_commit=False
+            )
+            for url in db_settings.REPLICA_URLS
+        ],
+        eject_seconds=db_settings.REPLICA_EJECT_SECONDS,
+        sticky_seconds=db_settings.REPLICA_STICKY_SECONDS,
+    )
+
+
+async def dispose_engines() -> None:
+    """Закрывает пулы соединений созданных движков (основной БД и реплик)."""
+
+    engines = []
+    if get_engine.cache_info().currsize:
+        engines.append(get_engine())
+    if get_replica_router.cache_info().currsize:
+        engines += [
+            maker.kw["bind"] for maker in get_replica_router().replicas
+        ]
+    for engine in engines:
+        await engine.dispose()
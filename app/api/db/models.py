@@ -1,5 +1,16 @@
-from sqlalchemy import Integer, String
-from sqlalchemy.orm import Mapped, MappedColumn
+import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
+from sqlalchemy.orm import Mapped, MappedColumn, relationship
 
 from app.api.db.database import Base
 from app.api.schemas.users import UserCreate
@@ -10,16 +21,97 @@ class User(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = MappedColumn(
-        Integer, primary_key=True, autoincrement=True, index=True
+        Integer, primary_key=True, autoincrement=True
     )
     username: Mapped[str] = MappedColumn(
         String(50), unique=True, nullable=False
     )
     email: Mapped[str] = MappedColumn(String(50), unique=True, nullable=False)
-    hashed_password: Mapped[str] = MappedColumn(String(60), nullable=False)
+    hashed_password: Mapped[str] = MappedColumn(String(255), nullable=False)
 
     @classmethod
     def from_schema(cls, schema: UserCreate):
         hashed_password = get_password_hash(schema.password)
         data_dict = schema.model_dump(exclude={"password"})
         return cls(**data_dict, hashed_password=hashed_password)
+
+
+# поиск без учета регистра: запросы фильтруют по lower(поле)
+Index("ix_users_username_lower", func.lower(User.username), unique=True)
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[int] = MappedColumn(
+        Integer, primary_key=True, autoincrement=True
+    )
+    token_hash: Mapped[str] = MappedColumn(
+        String(64), unique=True, nullable=False
+    )
+    user_id: Mapped[int] = MappedColumn(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    expires_at: Mapped[datetime.datetime] = MappedColumn(
+        DateTime(timezone=True), nullable=False
+    )
+    revoked: Mapped[bool] = MappedColumn(
+        Boolean, default=False, nullable=False
+    )
+
+    user: Mapped[User] = relationship(lazy="joined")
+
+    @property
+    def is_expired(self) -> bool:
+        expires_at = self.expires_at
+        # SQLite не хранит часовой пояс, значения в БД всегда в UTC
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=datetime.UTC)
+        return expires_at <= datetime.datetime.now(datetime.UTC)
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    id: Mapped[int] = MappedColumn(
+        Integer, primary_key=True, autoincrement=True
+    )
+    # открытая часть ключа, по ней ключ ищется при проверке
+    prefix: Mapped[str] = MappedColumn(String(12), unique=True, nullable=False)
+    key_hash: Mapped[str] = MappedColumn(String(64), nullable=False)
+    name: Mapped[str] = MappedColumn(String(50), nullable=False)
+    user_id: Mapped[int] = MappedColumn(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    created_at: Mapped[datetime.datetime] = MappedColumn(
+        DateTime(timezone=True),
+        default=lambda: datetime.datetime.now(datetime.UTC),
+        nullable=False,
+    )
+    revoked: Mapped[bool] = MappedColumn(
+        Boolean, default=False, nullable=False
+    )
+
+    user: Mapped[User] = relationship(lazy="joined")
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    id: Mapped[int] = MappedColumn(
+        Integer, primary_key=True, autoincrement=True
+    )
+    # jti отозванного токена доступа; None - отозваны все токены
+    # пользователя, выданные до revoked_at
+    jti: Mapped[Optional[str]] = MappedColumn(
+        String(32), unique=True, nullable=True
+    )
+    username: Mapped[str] = MappedColumn(String(50), nullable=False)
+    revoked_at: Mapped[datetime.datetime] = MappedColumn(
+        DateTime(timezone=True), nullable=False
+    )
+    # после этого времени отозванные токены истекли и запись не нужна
+    expires_at: Mapped[datetime.datetime] = MappedColumn(
+        DateTime(timezone=True), nullable=False, index=True
+    )
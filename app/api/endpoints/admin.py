@@ -0,0 +1,81 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from app.api.schemas.admin import (
+    CacheStats,
+    InvalidationResult,
+    RateEntry,
+    RateInvalidation,
+)
+from app.api.schemas.currency import CurrencyPair
+from app.api.services.admin_service import IAdminService, get_admin_service
+from app.api.services.user_service import IUserService, get_user_service
+from app.core.security import get_admin_username
+
+
+admin_router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_admin_username)],
+)
+
+
+@admin_router.get("/cache/")
+async def cache_stats(
+    admin_service: Annotated[IAdminService, Depends(get_admin_service)],
+) -> list[CacheStats]:
+    """Записи, размер, попадания и промахи, возраст записей кешей."""
+
+    return await admin_service.cache_stats()
+
+
+@admin_router.get("/cache/rates/")
+async def dump_rates(
+    admin_service: Annotated[IAdminService, Depends(get_admin_service)],
+) -> list[RateEntry]:
+    """Кешированные курсы: значение, версия, возраст и время до истечения."""
+
+    return await admin_service.dump_rates()
+
+
+@admin_router.delete("/cache/rates/")
+async def invalidate_rates(
+    target: Annotated[RateInvalidation, Query()],
+    admin_service: Annotated[IAdminService, Depends(get_admin_service)],
+) -> InvalidationResult:
+    """Удаляет курс пары (from, to), курсы пар с валютой base или все.
+
+    С base удаляются пары base/X и X/base; кросс-курсы через них
+    пересчитываются без удаленных пар.
+    """
+
+    return await admin_service.invalidate_rates(target)
+
+
+@admin_router.post("/cache/rates/refresh/")
+async def refresh_rate(
+    pair: Annotated[CurrencyPair, Query()],
+    admin_service: Annotated[IAdminService, Depends(get_admin_service)],
+) -> RateEntry:
+    """Заново запрашивает курс пары у внешнего API."""
+
+    return await admin_service.refresh_rate(pair)
+
+
+@admin_router.delete("/cache/currencies/")
+async def invalidate_currencies(
+    admin_service: Annotated[IAdminService, Depends(get_admin_service)],
+) -> InvalidationResult:
+    return await admin_service.invalidate_currencies()
+
+
+@admin_router.delete("/users/{username}/tokens/")
+async def revoke_user_tokens(
+    username: str,
+    user_service: Annotated[IUserService, Depends(get_user_service)],
+) -> dict:
+    """Отзывает все токены пользователя; 404, если его нет."""
+
+    await user_service.revoke_all_tokens(username)
+    return {"message": f"Все токены пользователя {username} отозваны."}
@@ -1,33 +1,114 @@
+import math
+import time
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 
 from app.api.schemas.currency import (
     CurrencyAll,
     CurrencyRequest,
     CurrencyResponse,
+    ExactBatchRequest,
+    ExactBatchResponse,
+    ExactCurrencyRequest,
+    ExactCurrencyResponse,
 )
+from app.api.services.currency_service import (
+    ICurrencyService,
+    get_currency_service,
+)
+from app.api.utils.compression import etag_matches, precompressed_response
 from app.api.utils.external_api import (
-    ext_api_get_currencies,
+    ext_api_get_currencies_payload,
     ext_api_get_exchange,
+    get_cross_rates,
+    get_currencies_cache,
 )
-from app.core.security import get_username_from_token
+from app.api.utils.rate_limit import limit_by_user
+from app.core.config import get_settings
 
 
 currency_router = APIRouter(
     prefix="/currency",
     tags=["currency"],
-    dependencies=[Depends(get_username_from_token)],
+    dependencies=[Depends(limit_by_user)],
 )
 
 
-@currency_router.get("/exchange/")
+@currency_router.get("/exchange/", response_model=CurrencyResponse)
 async def currency_exchange(
     request: Annotated[CurrencyRequest, Query()],
-) -> CurrencyResponse:
-    return await ext_api_get_exchange(request)
+    http_request: Request,
+    response: Response,
+) -> CurrencyResponse | Response:
+    """Конвертация валюты.
+
+    Курс берется напрямую или выводится из известных курсов (кросс-курс).
+    Использованный путь возвращается в X-Rate-Path (например, USD>EUR>RUB),
+    возраст самого старого курса пути в секундах - в X-Rate-Age.
+
+    Ответ можно кешировать, пока не истек самый старый курс пути: ETag
+    строится по версиям курсов и сумме, по If-None-Match отдается 304.
+    """
+
+    result = await ext_api_get_exchange(request)
+    cross_rate = get_cross_rates().get(request.currency_1, request.currency_2)
+    now = time.monotonic()
+    if cross_rate is None or cross_rate.expires_at <= now:
+        return result
+    scope = get_settings().CURRENCY.EXCHANGE_CACHE_SCOPE
+    max_age = math.ceil(cross_rate.expires_at - now)
+    # слабый ETag: при промахе кеша результат берется из ответа внешнего
+    # API и может отличаться от rate * amount в последних знаках
+    headers = {
+        "ETag": f'W/"{cross_rate.version}-{request.amount!r}"',
+        "Cache-Control": f"{scope}, max-age={max_age}",
+        "X-Rate-Path": ">".join(cross_rate.path),
+        "X-Rate-Age": str(max(0, math.floor(now - cross_rate.fetched_at))),
+    }
+    if_none_match = http_request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, [headers["ETag"]]):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    response.headers.update(headers)
+    return result
+
+
+@currency_router.get("/exchange/exact/")
+async def currency_exchange_exact(
+    request: Annotated[ExactCurrencyRequest, Query()],
+    currency_service: Annotated[
+        ICurrencyService, Depends(get_currency_service)
+    ],
+) -> ExactCurrencyResponse:
+    """Точная конвертация: суммы и курс - десятичные строки.
+
+    Результат округляется до минимальных единиц валюты по правилу
+    CURRENCY.EXACT_ROUNDING.
+    """
+
+    return await currency_service.convert_exact(request)
+
+
+@currency_router.post("/exchange/exact/batch/")
+async def currency_exchange_exact_batch(
+    request: ExactBatchRequest,
+    currency_service: Annotated[
+        ICurrencyService, Depends(get_currency_service)
+    ],
+) -> ExactBatchResponse:
+    """Точная конвертация пакета сумм по одному курсу."""
+
+    return await currency_service.convert_exact_batch(request)
 
 
-@currency_router.get("/list/")
-async def currency_list() -> CurrencyAll:
-    return await ext_api_get_currencies()
+@currency_router.get("/list/", response_model=CurrencyAll)
+async def currency_list(request: Request) -> Response:
+    payload = await ext_api_get_currencies_payload()
+    max_age = math.ceil(
+        get_currencies_cache().remaining_ttl("currencies") or 0
+    )
+    return precompressed_response(
+        request, payload, cache_control=f"private, max-age={max_age}"
+    )
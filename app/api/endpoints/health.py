@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Response, status
+
+from app.api.middleware import in_flight
+from app.core.health import health_monitor
+from app.core.lifespan import readiness
+
+
+health_router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+)
+
+# ответ проверки живости не меняется - собирается один раз
+ALIVE = b'{"status":"alive"}'
+
+
+# без завершающего слеша: редирект 307 проверки готовности считают успехом
+@health_router.get("/live")
+async def live() -> Response:
+    """Проверка живости: без обращений к БД, кешам и диску."""
+
+    return Response(ALIVE, media_type="application/json")
+
+
+@health_router.get("/ready")
+async def ready(response: Response) -> dict:
+    """Проверка готовности с последним отчетом фоновых проверок.
+
+    Отчет (пул соединений с БД, возраст последнего ответа внешнего API,
+    заполнение кешей, задержка цикла событий) обновляется каждые
+    APP.HEALTH_CHECK_INTERVAL секунд, сама проверка ничего не запрашивает.
+    Если последняя проверка БД завершилась ошибкой - 503 (unhealthy).
+    """
+
+    if in_flight.draining:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        result = "draining"
+    elif not readiness.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        result = "warming_up"
+    elif not health_monitor.healthy:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        result = "unhealthy"
+    else:
+        result = "ready"
+    return {"status": result, "checks": health_monitor.report}
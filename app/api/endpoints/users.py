@@ -1,11 +1,37 @@
-from typing import Annotated
+import time
+from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.api.schemas.users import Token, UserCreate
+from app.api.errors.exceptions import (
+    UserNotFoundException,
+    UserUnauthorisedException,
+)
+from app.api.schemas.users import (
+    ApiKeyCreate,
+    ApiKeyCreated,
+    ApiKeyInfo,
+    RefreshTokenRequest,
+    TokenPair,
+    UserCreate,
+)
+from app.api.services.api_key_service import (
+    IApiKeyService,
+    get_api_key_service,
+)
 from app.api.services.user_service import IUserService, get_user_service
-from app.core.security import create_jwt_token
+from app.api.utils.rate_limit import (
+    limit_by_ip,
+    limit_by_refresh_token,
+    limit_by_token_user,
+)
+from app.core.security import (
+    create_jwt_token,
+    get_username_from_token,
+    optional_oauth2_scheme,
+    read_jwt_token,
+)
 
 
 auth_router = APIRouter(
@@ -14,7 +40,11 @@ auth_router = APIRouter(
 )
 
 
-@auth_router.post("/register/", status_code=status.HTTP_201_CREATED)
+@auth_router.post(
+    "/register/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_ip)],
+)
 async def reg(
     user: UserCreate,
     user_service: Annotated[IUserService, Depends(get_user_service)],
@@ -26,13 +56,99 @@ async def reg(
     }
 
 
-@auth_router.post("/login/")
+@auth_router.post("/login/", dependencies=[Depends(limit_by_ip)])
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     user_service: Annotated[IUserService, Depends(get_user_service)],
-) -> Token:
+) -> TokenPair:
     username = await user_service.authenticate_user(
         form_data.username, form_data.password
     )
+    refresh_token = await user_service.issue_refresh_token(username)
     token = create_jwt_token({"sub": username})
-    return Token(access_token=token)
+    return TokenPair(access_token=token, refresh_token=refresh_token)
+
+
+@auth_router.post("/refresh/", dependencies=[Depends(limit_by_refresh_token)])
+async def refresh(
+    data: RefreshTokenRequest,
+    user_service: Annotated[IUserService, Depends(get_user_service)],
+) -> TokenPair:
+    username, refresh_token = await user_service.rotate_refresh_token(
+        data.refresh_token
+    )
+    token = create_jwt_token({"sub": username})
+    return TokenPair(access_token=token, refresh_token=refresh_token)
+
+
+@auth_router.post("/logout/", dependencies=[Depends(limit_by_refresh_token)])
+async def logout(
+    data: RefreshTokenRequest,
+    user_service: Annotated[IUserService, Depends(get_user_service)],
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+) -> dict:
+    """Отзывает refresh-токен и токен доступа из заголовка Authorization."""
+
+    await user_service.revoke_refresh_token(data.refresh_token)
+    # неверный, истекший или уже отозванный токен доступа не мешает выходу
+    payload = read_jwt_token(token) if token is not None else None
+    if (
+        payload is not None
+        # у токенов, выданных до появления отзыва, нет jti
+        and "jti" in payload
+        and "sub" in payload
+        # истекший токен отзывать не нужно
+        and payload.get("exp", 0) > time.time()
+    ):
+        await user_service.revoke_access_token(
+            payload["jti"], payload["sub"], payload["exp"]
+        )
+    return {"message": "Refresh-токен отозван."}
+
+
+@auth_router.post("/revoke-all/", dependencies=[Depends(limit_by_token_user)])
+async def revoke_all(
+    username: Annotated[str, Depends(get_username_from_token)],
+    user_service: Annotated[IUserService, Depends(get_user_service)],
+) -> dict:
+    """Отзывает все токены пользователя (например, при утечке)."""
+
+    try:
+        await user_service.revoke_all_tokens(username)
+    except UserNotFoundException as exc:
+        # токен удаленного пользователя: для него это ошибка авторизации
+        raise UserUnauthorisedException() from exc
+    return {"message": "Все токены пользователя отозваны."}
+
+
+@auth_router.post(
+    "/api-keys/",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_by_token_user)],
+)
+async def create_api_key(
+    data: ApiKeyCreate,
+    username: Annotated[str, Depends(get_username_from_token)],
+    api_key_service: Annotated[IApiKeyService, Depends(get_api_key_service)],
+) -> ApiKeyCreated:
+    return await api_key_service.create_key(username, data)
+
+
+@auth_router.get("/api-keys/", dependencies=[Depends(limit_by_token_user)])
+async def list_api_keys(
+    username: Annotated[str, Depends(get_username_from_token)],
+    api_key_service: Annotated[IApiKeyService, Depends(get_api_key_service)],
+) -> list[ApiKeyInfo]:
+    return await api_key_service.list_keys(username)
+
+
+@auth_router.delete(
+    "/api-keys/{prefix}/", dependencies=[Depends(limit_by_token_user)]
+)
+async def revoke_api_key(
+    prefix: str,
+    username: Annotated[str, Depends(get_username_from_token)],
+    api_key_service: Annotated[IApiKeyService, Depends(get_api_key_service)],
+) -> dict:
+    await api_key_service.revoke_key(username, prefix)
+    return {"message": "API-ключ отозван."}
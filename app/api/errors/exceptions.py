@@ -42,6 +42,30 @@ class InvalidTokenException(AuthorizationException):
         super().__init__(detail)
 
 
+class ForbiddenException(CustomException):
+    """Пользователь авторизован, но не имеет прав на операцию."""
+
+    def __init__(self, username: str):
+        self.username = username
+        super().__init__("Недостаточно прав для выполнения запроса.")
+
+
+class ApiKeyNotFoundException(CustomException):
+    """У пользователя нет действующего API-ключа с таким префиксом."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        super().__init__(f"API-ключ '{prefix}' не найден.")
+
+
+class UserNotFoundException(CustomException):
+    """Пользователя, над которым выполняется операция, нет."""
+
+    def __init__(self, username: str):
+        self.username = username
+        super().__init__(f"Пользователь '{username}' не найден.")
+
+
 class ExternalAPIHTTPError(CustomException):
     def __init__(self, detail: str, status_code: Optional[int] = None):
         self.status_code = status_code
@@ -52,3 +76,31 @@ class ExternalAPIDataError(CustomException):
     def __init__(self, detail, ext_api_data):
         self.ext_api_data = ext_api_data
         super().__init__(detail)
+
+
+class UnknownCurrencyException(CustomException):
+    """Поставщик курсов не знает код валюты."""
+
+    def __init__(self, currency: str):
+        self.currency = currency
+        super().__init__(f"Код валюты '{currency}' не найден.")
+
+
+class ShuttingDownException(CustomException):
+    headers = {"Connection": "close", "Retry-After": "1"}
+
+    def __init__(self):
+        super().__init__("Сервис останавливается, повторите запрос позже.")
+
+
+class RateLimitExceededException(CustomException):
+    """Клиент исчерпал лимит запросов к маршруту."""
+
+    def __init__(
+        self, identity: str, retry_after: float, headers: dict[str, str]
+    ):
+        self.identity = identity
+        self.retry_after = retry_after
+        # Retry-After и RateLimit-* для ответа 429
+        self.headers = headers
+        super().__init__("Слишком много запросов, повторите позже.")
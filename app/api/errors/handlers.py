@@ -1,13 +1,20 @@
 from fastapi import Request, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError, ResponseValidationError
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
 from app.api.errors.exceptions import (
+    ApiKeyNotFoundException,
     AuthorizationException,
     ExternalAPIDataError,
     ExternalAPIHTTPError,
+    ForbiddenException,
+    RateLimitExceededException,
+    ShuttingDownException,
     UniqueFieldException,
+    UnknownCurrencyException,
+    UserNotFoundException,
 )
 from app.api.errors.logger import logger
 
@@ -45,7 +52,8 @@ def request_validation_error_handler(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "message": "Ошибка валидации данных клиента.",
-            "errors": exc.errors(),
+            # ctx ошибок из валидаторов содержит само исключение
+            "errors": jsonable_encoder(exc.errors()),
         },
     )
 
@@ -126,6 +134,22 @@ def external_api_data_error_handler(
     )
 
 
+def unknown_currency_exception_handler(
+    request: Request, exc: UnknownCurrencyException
+) -> JSONResponse:
+    """Обрабатывает и логгирует запросы с неизвестным кодом валюты."""
+
+    logger.error(f"Вызвано исключение {type(exc).__name__}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={
+            "message": "Код валюты не найден. "
+            "Для проверки доступных кодов воспользуйтесь URL "
+            "currency/list"
+        },
+    )
+
+
 def unique_field_exception_handler(
     request: Request, exc: UniqueFieldException
 ) -> JSONResponse:
@@ -173,13 +197,91 @@ def authorization_exception_handler(
     )
 
 
+def forbidden_exception_handler(
+    request: Request, exc: ForbiddenException
+) -> JSONResponse:
+    """Обрабатывает и логгирует запросы без прав администратора."""
+
+    logger.warning(
+        f"Вызвано исключение {type(exc).__name__}: пользователь "
+        f"'{exc.username}' запросил {request.url.path}."
+    )
+    return JSONResponse(
+        status_code=status.HTTP_403_FORBIDDEN,
+        content={"message": str(exc)},
+    )
+
+
+def api_key_not_found_exception_handler(
+    request: Request, exc: ApiKeyNotFoundException
+) -> JSONResponse:
+    """Обрабатывает и логгирует отзыв неизвестного API-ключа."""
+
+    logger.error(f"Вызвано исключение {type(exc).__name__}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"message": str(exc)},
+    )
+
+
+def user_not_found_exception_handler(
+    request: Request, exc: UserNotFoundException
+) -> JSONResponse:
+    """Обрабатывает и логгирует операции над неизвестным пользователем."""
+
+    logger.error(f"Вызвано исключение {type(exc).__name__}: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"message": str(exc)},
+    )
+
+
+def shutting_down_exception_handler(
+    request: Request, exc: ShuttingDownException
+) -> JSONResponse:
+    """Обрабатывает и логгирует запросы, прерванные остановкой приложения.
+
+    Запрос к внешнему API отменяется, если не завершился до истечения
+    времени на остановку; клиент получает 503 и может повторить запрос.
+    """
+
+    logger.warning(f"Запрос {request.url.path} прерван: {exc}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"message": str(exc)},
+        headers=exc.headers,
+    )
+
+
+def rate_limit_exceeded_exception_handler(
+    request: Request, exc: RateLimitExceededException
+) -> JSONResponse:
+    """Обрабатывает и логгирует запросы сверх лимита частоты."""
+
+    logger.warning(
+        f"Вызвано исключение {type(exc).__name__}: {exc.identity} "
+        f"превысил лимит запросов к {request.url.path}."
+    )
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"message": str(exc)},
+        headers=exc.headers,
+    )
+
+
 handlers = {
     RequestValidationError: request_validation_error_handler,
     ValidationError: validation_error_handler,
     ResponseValidationError: validation_error_handler,
     ExternalAPIHTTPError: external_api_http_error_handler,
     ExternalAPIDataError: external_api_data_error_handler,
+    UnknownCurrencyException: unknown_currency_exception_handler,
     UniqueFieldException: unique_field_exception_handler,
     AuthorizationException: authorization_exception_handler,
+    ForbiddenException: forbidden_exception_handler,
+    ApiKeyNotFoundException: api_key_not_found_exception_handler,
+    UserNotFoundException: user_not_found_exception_handler,
+    ShuttingDownException: shutting_down_exception_handler,
+    RateLimitExceededException: rate_limit_exceeded_exception_handler,
     Exception: global_exception_handler,
 }
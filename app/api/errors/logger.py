@@ -1,8 +1,19 @@
 import logging
 
 
-def setup_logger():
-    logger = logging.getLogger("currency_app")
+logger = logging.getLogger("currency_app")
+
+
+def setup_logger() -> logging.Logger:
+    """Настраивает вывод логов в консоль.
+
+    Вызывается при старте приложения и в точках входа командной строки
+    (python -m app.core.snapshot), а не при импорте модуля; повторный
+    вызов ничего не меняет.
+    """
+
+    if logger.handlers:
+        return logger
     logger.setLevel(logging.DEBUG)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.DEBUG)
@@ -11,6 +22,3 @@ def setup_logger():
     console_handler.setFormatter(formatter)
     logger.addHandler(console_handler)
     return logger
-
-
-logger = setup_logger()
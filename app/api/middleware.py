@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.errors.exceptions import ShuttingDownException
+from app.core.config import get_settings
+
+
+class InFlightTracker:
+    """Счетчик запросов в обработке и признак остановки приложения."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.draining = False
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Ждет, пока не останется запросов в обработке.
+
+        Возвращает False, если за timeout секунд они не завершились.
+        """
+
+        deadline = time.monotonic() + timeout
+        while self.count:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+
+in_flight = InFlightTracker()
+
+
+class InFlightMiddleware:
+    """Учитывает запросы в обработке.
+
+    Во время остановки приложения новые запросы отклоняются с кодом 503
+    (кроме проверок состояния и метрик), чтобы клиент повторил их на другом
+    экземпляре.
+    """
+
+    exempt_prefixes = ("/health", "/metrics")
+
+    def __init__(self, app: ASGIApp, tracker: InFlightTracker = in_flight):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self.tracker.draining and not scope["path"].startswith(
+            self.exempt_prefixes
+        ):
+            exc = ShuttingDownException()
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"message": str(exc)},
+                headers=exc.headers,
+            )
+            await response(scope, receive, send)
+            return
+        self.tracker.count += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.count -= 1
+
+
+class RateLimitHeadersMiddleware:
+    """Добавляет к ответу заголовки RateLimit-* ограниченного маршрута.
+
+    Решение о лимите принимает зависимость маршрута (см.
+    app.api.utils.rate_limit) и сохраняет его в request.state, то есть в
+    scope["state"]; заголовки добавляются здесь, чтобы попасть и в
+    ответы, которые эндпоинт возвращает сам. Заголовки, уже заданные
+    ответом (например, в ответе 429), не дублируются.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            decision = scope.get("state", {}).get("rate_limit")
+            if message["type"] == "http.response.start" and decision:
+                headers = MutableHeaders(scope=message)
+                for name, value in decision.headers().items():
+                    if name not in headers:
+                        headers.append(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Сжимает gzip динамические ответы больше COMPRESSION.MIN_SIZE.
+
+    Ответы с заданным Content-Encoding (заранее сжатые, см.
+    app.api.utils.compression) передаются без изменений. Настройки
+    читаются при сборке стека middleware, то есть при первом запросе.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        compression_settings = get_settings().COMPRESSION
+        super().__init__(
+            app,
+            minimum_size=compression_settings.MIN_SIZE,
+            compresslevel=compression_settings.GZIP_LEVEL,
+        )
@@ -1,4 +1,4 @@
-from typing import Generic, Type, TypeVar
+from typing import Callable, Generic, Type, TypeVar
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -6,10 +6,22 @@ from app.api.db.database import Base
 
 
 AlchemyModel = TypeVar("AlchemyModel", bound=Base)
+SessionProvider = Callable[[], AsyncSession]
 
 
 class AlchemyRepository(Generic[AlchemyModel]):
     model = Type[AlchemyModel]
 
-    def __init__(self, session: AsyncSession) -> None:
-        self.session = session
+    def __init__(self, session: AsyncSession | SessionProvider) -> None:
+        # вместо сессии можно передать функцию, создающую ее при первом
+        # обращении к БД (так делает UoW)
+        if isinstance(session, AsyncSession):
+            self._session, self._session_provider = session, None
+        else:
+            self._session, self._session_provider = None, session
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_provider()
+        return self._session
@@ -0,0 +1,118 @@
+from functools import cache
+from typing import NamedTuple, Optional, Protocol, Type, runtime_checkable
+
+from sqlalchemy import select, update
+
+from app.api.db.models import ApiKey, User
+from app.api.repositories.alchemy_repository import AlchemyRepository
+from app.api.utils.cache import MISSING, TTLCache
+from app.core.config import get_settings
+
+
+class ApiKeyCredentials(NamedTuple):
+    key_hash: str
+    username: str
+
+
+@runtime_checkable
+class IApiKeyRepository(Protocol):
+    model = Type[ApiKey]
+
+    async def add_one(self, api_key: ApiKey) -> ApiKey: ...
+    async def list_for_user(self, user_id: int) -> list[ApiKey]: ...
+
+    async def get_credentials(
+        self, prefix: str
+    ) -> Optional[ApiKeyCredentials]: ...
+
+    async def revoke(self, user_id: int, prefix: str) -> bool: ...
+
+
+class AlchemyApiKeyRepository(AlchemyRepository):
+    model = ApiKey
+
+    async def add_one(self, api_key: ApiKey) -> ApiKey:
+        self.session.add(api_key)
+        await self.session.flush()
+        return api_key
+
+    async def list_for_user(self, user_id: int) -> list[ApiKey]:
+        stmt = (
+            select(self.model)
+            .where(self.model.user_id == user_id)
+            .order_by(self.model.id)
+        )
+        res = await self.session.execute(stmt)
+        return list(res.scalars())
+
+    async def get_credentials(
+        self, prefix: str
+    ) -> Optional[ApiKeyCredentials]:
+        """Хеш и владелец действующего ключа (поиск по индексу prefix)."""
+
+        stmt = (
+            select(self.model.key_hash, User.username)
+            .join(User, User.id == self.model.user_id)
+            .where(self.model.prefix == prefix, ~self.model.revoked)
+        )
+        res = await self.session.execute(stmt)
+        row = res.one_or_none()
+        return ApiKeyCredentials(*row) if row else None
+
+    async def revoke(self, user_id: int, prefix: str) -> bool:
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.user_id == user_id,
+                self.model.prefix == prefix,
+                ~self.model.revoked,
+            )
+            .values(revoked=True)
+        )
+        res = await self.session.execute(stmt)
+        return res.rowcount == 1
+
+
+@cache
+def get_api_key_cache() -> TTLCache[str, Optional[ApiKeyCredentials]]:
+    cache_settings = get_settings().CACHE
+    return TTLCache(
+        maxsize=cache_settings.API_KEYS_MAXSIZE,
+        ttl=cache_settings.API_KEYS_TTL,
+    )
+
+
+class CachedApiKeyRepository(AlchemyApiKeyRepository):
+    """Репозиторий API-ключей с кешем prefix -> (хеш, владелец).
+
+    Запросы с API-ключом проверяются без обращения к БД; неизвестный
+    prefix кешируется на CACHE.CREDENTIALS_NEGATIVE_TTL. Кеш локален для
+    процесса: при отзыве запись сбрасывается, в остальных процессах
+    отозванный ключ действует не дольше CACHE.API_KEYS_TTL (несколько
+    секунд: при частых запросах ключа это один запрос к БД за TTL).
+    """
+
+    def __init__(
+        self,
+        session,
+        cache: Optional[TTLCache[str, Optional[ApiKeyCredentials]]] = None,
+    ) -> None:
+        super().__init__(session)
+        self.cache = get_api_key_cache() if cache is None else cache
+
+    async def get_credentials(
+        self, prefix: str
+    ) -> Optional[ApiKeyCredentials]:
+        credentials = self.cache.get(prefix, MISSING)
+        if credentials is not MISSING:
+            return credentials
+        credentials = await super().get_credentials(prefix)
+        negative_ttl = get_settings().CACHE.CREDENTIALS_NEGATIVE_TTL
+        ttl = None if credentials else negative_ttl
+        self.cache.set(prefix, credentials, ttl=ttl)
+        return credentials
+
+    async def revoke(self, user_id: int, prefix: str) -> bool:
+        revoked = await super().revoke(user_id, prefix)
+        self.cache.delete(prefix)
+        return revoked
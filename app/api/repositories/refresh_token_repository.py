@@ -0,0 +1,53 @@
+from typing import Optional, Protocol, Type, runtime_checkable
+
+from sqlalchemy import select, update
+
+from app.api.db.models import RefreshToken
+from app.api.repositories.alchemy_repository import AlchemyRepository
+
+
+@runtime_checkable
+class IRefreshTokenRepository(Protocol):
+    model = Type[RefreshToken]
+
+    async def add_one(self, token: RefreshToken) -> RefreshToken: ...
+    async def get_by_hash(self, token_hash: str) -> Optional[RefreshToken]: ...
+    async def revoke(self, token_id: int) -> bool: ...
+    async def revoke_all_for_user(self, user_id: int) -> None: ...
+
+
+class AlchemyRefreshTokenRepository(AlchemyRepository):
+    model = RefreshToken
+
+    async def add_one(self, token: RefreshToken) -> RefreshToken:
+        self.session.add(token)
+        await self.session.flush()
+        return token
+
+    async def get_by_hash(self, token_hash: str) -> Optional[RefreshToken]:
+        stmt = select(self.model).where(self.model.token_hash == token_hash)
+        res = await self.session.execute(stmt)
+        return res.scalar_one_or_none()
+
+    async def revoke(self, token_id: int) -> bool:
+        """Отзывает токен, если он еще не отозван.
+
+        Условный UPDATE атомарен: из параллельных запросов с одним токеном
+        True получает только один, остальные - False.
+        """
+
+        stmt = (
+            update(self.model)
+            .where(self.model.id == token_id, ~self.model.revoked)
+            .values(revoked=True)
+        )
+        res = await self.session.execute(stmt)
+        return res.rowcount == 1
+
+    async def revoke_all_for_user(self, user_id: int) -> None:
+        stmt = (
+            update(self.model)
+            .where(self.model.user_id == user_id, ~self.model.revoked)
+            .values(revoked=True)
+        )
+        await self.session.execute(stmt)
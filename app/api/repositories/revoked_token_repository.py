@@ -0,0 +1,60 @@
+import datetime
+from typing import Optional, Protocol, Type, runtime_checkable
+
+from sqlalchemy import delete, select
+
+from app.api.db.models import RevokedToken
+from app.api.repositories.alchemy_repository import AlchemyRepository
+
+
+@runtime_checkable
+class IRevokedTokenRepository(Protocol):
+    model = Type[RevokedToken]
+
+    async def add_one(self, token: RevokedToken) -> RevokedToken: ...
+    async def get_by_jti(self, jti: str) -> Optional[RevokedToken]: ...
+
+    async def list_since(
+        self, revoked_after: Optional[datetime.datetime]
+    ) -> list[RevokedToken]: ...
+
+    async def delete_expired(self) -> int: ...
+
+
+class AlchemyRevokedTokenRepository(AlchemyRepository):
+    model = RevokedToken
+
+    async def add_one(self, token: RevokedToken) -> RevokedToken:
+        self.session.add(token)
+        await self.session.flush()
+        return token
+
+    async def get_by_jti(self, jti: str) -> Optional[RevokedToken]:
+        stmt = select(self.model).where(self.model.jti == jti)
+        res = await self.session.execute(stmt)
+        return res.scalar_one_or_none()
+
+    async def list_since(
+        self, revoked_after: Optional[datetime.datetime]
+    ) -> list[RevokedToken]:
+        """Действующие отзывы, сделанные не раньше revoked_after.
+
+        None - все действующие отзывы.
+        """
+
+        stmt = (
+            select(self.model)
+            .where(self.model.expires_at > datetime.datetime.now(datetime.UTC))
+            .order_by(self.model.id)
+        )
+        if revoked_after is not None:
+            stmt = stmt.where(self.model.revoked_at >= revoked_after)
+        res = await self.session.execute(stmt)
+        return list(res.scalars())
+
+    async def delete_expired(self) -> int:
+        stmt = delete(self.model).where(
+            self.model.expires_at <= datetime.datetime.now(datetime.UTC)
+        )
+        res = await self.session.execute(stmt)
+        return res.rowcount
@@ -1,10 +1,19 @@
-from typing import Optional, Protocol, Type, runtime_checkable
+from functools import cache
+from typing import NamedTuple, Optional, Protocol, Type, runtime_checkable
 
 from pydantic import EmailStr
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 
 from app.api.db.models import User
 from app.api.repositories.alchemy_repository import AlchemyRepository
+from app.api.utils.cache import MISSING, TTLCache
+from app.core.config import get_settings
+
+
+class UserCredentials(NamedTuple):
+    id: int
+    username: str
+    hashed_password: str
 
 
 @runtime_checkable
@@ -15,6 +24,14 @@ class IUserRepository(Protocol):
     async def get_by_username(self, username: str) -> Optional[User]: ...
     async def get_by_email(self, email: EmailStr) -> Optional[User]: ...
 
+    async def get_credentials(
+        self, username: str
+    ) -> Optional[UserCredentials]: ...
+
+    async def update_password(
+        self, user_id: int, username: str, hashed_password: str
+    ) -> None: ...
+
 
 class AlchemyUserRepository(AlchemyRepository):
     model = User
@@ -25,11 +42,88 @@ class AlchemyUserRepository(AlchemyRepository):
         return user
 
     async def get_by_username(self, username: str) -> Optional[User]:
-        stmt = select(self.model).where(self.model.username == username)
+        stmt = select(self.model).where(
+            func.lower(self.model.username) == username.lower()
+        )
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
 
     async def get_by_email(self, email: EmailStr) -> Optional[User]:
-        stmt = select(self.model).where(self.model.email == email)
+        stmt = select(self.model).where(
+            func.lower(self.model.email) == email.lower()
+        )
         res = await self.session.execute(stmt)
         return res.scalar_one_or_none()
+
+    async def get_credentials(
+        self, username: str
+    ) -> Optional[UserCredentials]:
+        stmt = select(
+            self.model.id, self.model.username, self.model.hashed_password
+        ).where(func.lower(self.model.username) == username.lower())
+        res = await self.session.execute(stmt)
+        row = res.one_or_none()
+        return UserCredentials(*row) if row else None
+
+    async def update_password(
+        self, user_id: int, username: str, hashed_password: str
+    ) -> None:
+        """Меняет хеш пароля; username - имя, по которому искали
+        учетные данные (get_credentials).
+        """
+
+        stmt = (
+            update(self.model)
+            .where(self.model.id == user_id)
+            .values(hashed_password=hashed_password)
+        )
+        await self.session.execute(stmt)
+
+
+@cache
+def get_credentials_cache() -> TTLCache[str, Optional[UserCredentials]]:
+    cache_settings = get_settings().CACHE
+    return TTLCache(
+        maxsize=cache_settings.CREDENTIALS_MAXSIZE,
+        ttl=cache_settings.CREDENTIALS_TTL,
+    )
+
+
+class CachedUserRepository(AlchemyUserRepository):
+    """Репозиторий пользователей с кешем учетных данных.
+
+    Кеширует username -> (id, username, hashed_password), а также
+    отсутствие пользователя (негативный кеш с коротким TTL), чтобы вход
+    не обращался к БД. Кеш локален для процесса: запись сбрасывается при
+    регистрации и смене пароля, в остальных процессах устаревает по TTL.
+    """
+
+    def __init__(
+        self,
+        session,
+        cache: Optional[TTLCache[str, Optional[UserCredentials]]] = None,
+    ) -> None:
+        super().__init__(session)
+        self.cache = get_credentials_cache() if cache is None else cache
+
+    async def add_one(self, user: User) -> User:
+        self.cache.delete(user.username)
+        return await super().add_one(user)
+
+    async def get_credentials(
+        self, username: str
+    ) -> Optional[UserCredentials]:
+        credentials = self.cache.get(username, MISSING)
+        if credentials is not MISSING:
+            return credentials
+        credentials = await super().get_credentials(username)
+        negative_ttl = get_settings().CACHE.CREDENTIALS_NEGATIVE_TTL
+        ttl = None if credentials else negative_ttl
+        self.cache.set(username, credentials, ttl=ttl)
+        return credentials
+
+    async def update_password(
+        self, user_id: int, username: str, hashed_password: str
+    ) -> None:
+        await super().update_password(user_id, username, hashed_password)
+        self.cache.delete(username)
@@ -0,0 +1,64 @@
+from typing import Annotated, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from app.api.schemas.currency import CurrencyPair, ThreeLetterUppercase
+
+
+class AgeStats(BaseModel):
+    """Возраст записей кеша в секундах."""
+
+    min: float
+    p50: float
+    p90: float
+    max: float
+
+
+class CacheStats(BaseModel):
+    name: str
+    # записи L1 и их примерный размер (pickle), байт
+    entries: int
+    bytes: int
+    maxsize: int
+    ttl: float
+    l1_hits: int
+    l2_hits: int
+    misses: int
+    l1_hit_ratio: float
+    l2_hit_ratio: float
+    # записи в общем кеше хоста (None, если он отключен)
+    shared_entries: Optional[int]
+    age: Optional[AgeStats]
+
+
+class RateEntry(CurrencyPair):
+    rate: float
+    version: str
+    age: float
+    expires_in: float
+
+
+class RateInvalidation(BaseModel):
+    """Какие курсы удалить: пара, все пары с base или все (без полей)."""
+
+    model_config = ConfigDict(validate_by_name=True, validate_by_alias=True)
+
+    currency_1: Annotated[
+        Optional[ThreeLetterUppercase], Field(alias="from")
+    ] = None
+    currency_2: Annotated[
+        Optional[ThreeLetterUppercase], Field(alias="to")
+    ] = None
+    base: Optional[ThreeLetterUppercase] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.currency_1 is None) != (self.currency_2 is None):
+            raise ValueError("Пара валют задается параметрами from и to.")
+        if self.base is not None and self.currency_1 is not None:
+            raise ValueError("Задайте либо пару валют, либо base.")
+        return self
+
+
+class InvalidationResult(BaseModel):
+    deleted: int
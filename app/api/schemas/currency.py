@@ -1,18 +1,41 @@
+from decimal import Decimal
 from typing import Annotated
 
-from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    StringConstraints,
+    model_validator,
+)
+
+from app.api.utils.fixed_point import minor_units, to_minor
 
 
 ThreeLetterUppercase = Annotated[
     str, StringConstraints(to_upper=True, pattern=r"^[A-Z]{3}$")
 ]
+# верхняя граница и число цифр точной суммы: без них сумма вида 1E+100000
+# стоит секунд CPU на пересчет в минимальные единицы
+EXACT_AMOUNT_MAX = Decimal(10) ** 15
+EXACT_AMOUNT_MAX_DIGITS = 28
+PositiveDecimal = Annotated[
+    Decimal,
+    Field(gt=0, le=EXACT_AMOUNT_MAX, max_digits=EXACT_AMOUNT_MAX_DIGITS),
+]
+
+# максимальное количество сумм в одном запросе пакетной конвертации
+EXACT_BATCH_MAX_LENGTH = 10_000
 
 
-class CurrencyRequest(BaseModel):
+class CurrencyPair(BaseModel):
     model_config = ConfigDict(validate_by_name=True, validate_by_alias=True)
 
     currency_1: Annotated[ThreeLetterUppercase, Field(alias="from")]
     currency_2: Annotated[ThreeLetterUppercase, Field(alias="to")]
+
+
+class CurrencyRequest(CurrencyPair):
     amount: Annotated[float, Field(gt=0)] = 1
 
 
@@ -20,5 +43,44 @@ class CurrencyResponse(CurrencyRequest):
     result: Annotated[float, Field(gt=0)]
 
 
+class ExactCurrencyRequest(CurrencyPair):
+    """Запрос точной конвертации: сумма - десятичное число.
+
+    Сумма должна быть представима в минимальных единицах исходной
+    валюты (для USD - не больше 2 знаков после запятой, для JPY - целое).
+    """
+
+    amount: PositiveDecimal = Decimal(1)
+
+    @model_validator(mode="after")
+    def check_amount_scale(self):
+        to_minor(self.amount, minor_units(self.currency_1))
+        return self
+
+
+class ExactCurrencyResponse(ExactCurrencyRequest):
+    rate: Decimal
+    result: Annotated[Decimal, Field(ge=0)]
+
+
+class ExactBatchRequest(CurrencyPair):
+    amounts: Annotated[
+        list[PositiveDecimal],
+        Field(min_length=1, max_length=EXACT_BATCH_MAX_LENGTH),
+    ]
+
+    @model_validator(mode="after")
+    def check_amounts_scale(self):
+        exponent = minor_units(self.currency_1)
+        for amount in self.amounts:
+            to_minor(amount, exponent)
+        return self
+
+
+class ExactBatchResponse(CurrencyPair):
+    rate: Decimal
+    results: list[Annotated[Decimal, Field(ge=0)]]
+
+
 class CurrencyAll(BaseModel):
     currencies: Annotated[dict[ThreeLetterUppercase, str], Field(min_length=1)]
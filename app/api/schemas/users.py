@@ -1,3 +1,4 @@
+import datetime
 from typing import Annotated
 
 from pydantic import (
@@ -52,3 +53,30 @@ class UserReturn(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+
+
+class TokenPair(Token):
+    refresh_token: str
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class ApiKeyCreate(BaseModel):
+    # назначение ключа, например имя сервиса
+    name: Annotated[str, Field(min_length=1, max_length=50)]
+
+
+class ApiKeyInfo(BaseModel):
+    prefix: str
+    name: str
+    created_at: datetime.datetime
+    revoked: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ApiKeyCreated(ApiKeyInfo):
+    # сам ключ возвращается только при создании
+    key: str
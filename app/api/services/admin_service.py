@@ -0,0 +1,150 @@
+import asyncio
+import math
+import pickle
+import time
+from typing import Protocol
+
+from app.api.schemas.admin import (
+    AgeStats,
+    CacheStats,
+    InvalidationResult,
+    RateEntry,
+    RateInvalidation,
+)
+from app.api.schemas.currency import CurrencyPair
+from app.api.utils.external_api import (
+    RateQuote,
+    ext_api_refresh_rate,
+    get_currencies_cache,
+    get_currencies_tiers,
+    get_rates_cache,
+    get_rates_tiers,
+    get_shared_cache,
+    invalidate_quotes,
+    invalidate_rates,
+)
+from app.api.utils.tiered_cache import TwoTierCache
+from app.core.metrics import metrics
+
+
+class IAdminService(Protocol):
+    async def cache_stats(self) -> list[CacheStats]: ...
+    async def dump_rates(self) -> list[RateEntry]: ...
+
+    async def invalidate_rates(
+        self, target: RateInvalidation
+    ) -> InvalidationResult: ...
+
+    async def invalidate_currencies(self) -> InvalidationResult: ...
+    async def refresh_rate(self, pair: CurrencyPair) -> RateEntry: ...
+
+
+def percentile(ordered: list[float], percent: float) -> float:
+    index = math.ceil(percent / 100 * len(ordered)) - 1
+    return ordered[max(0, index)]
+
+
+class AdminService:
+    """Состояние кешей внешнего API и управление ими.
+
+    Возраст записи считается по оставшемуся времени ее жизни и времени
+    жизни кеша. Удаление и обновление затрагивают кеш процесса и общий
+    кеш хоста; кеши других процессов истекают сами.
+    """
+
+    async def _tier_stats(self, tiers: TwoTierCache) -> CacheStats:
+        now = time.monotonic()
+        entries = tiers.l1.snapshot()
+        ages = sorted(
+            max(0.0, now - (expires_at - tiers.l1.ttl))
+            for _, _, expires_at in entries
+        )
+        l1_hits, l2_hits, misses = (
+            int(metrics.value(f"{tiers.name}_cache_{suffix}"))
+            for suffix in ("l1_hits_total", "l2_hits_total", "misses_total")
+        )
+        return CacheStats(
+            name=tiers.name,
+            entries=len(entries),
+            bytes=sum(
+                len(pickle.dumps((key, value))) for key, value, _ in entries
+            ),
+            maxsize=tiers.l1.maxsize,
+            ttl=tiers.l1.ttl,
+            l1_hits=l1_hits,
+            l2_hits=l2_hits,
+            misses=misses,
+            l1_hit_ratio=metrics.value(f"{tiers.name}_cache_l1_hit_ratio"),
+            l2_hit_ratio=metrics.value(f"{tiers.name}_cache_l2_hit_ratio"),
+            shared_entries=None,
+            age=(
+                AgeStats(
+                    min=ages[0],
+                    p50=percentile(ages, 50),
+                    p90=percentile(ages, 90),
+                    max=ages[-1],
+                )
+                if ages
+                else None
+            ),
+        )
+
+    async def cache_stats(self) -> list[CacheStats]:
+        stats = [
+            await self._tier_stats(get_rates_tiers()),
+            await self._tier_stats(get_currencies_tiers()),
+        ]
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            # L2 общий для курсов и списка валют
+            shared_entries = await asyncio.to_thread(shared_cache.count)
+            for item in stats:
+                item.shared_entries = shared_entries
+        return stats
+
+    def _rate_entry(
+        self, pair: tuple[str, str], quote: RateQuote, expires_at: float
+    ) -> RateEntry:
+        now = time.monotonic()
+        return RateEntry(
+            currency_1=pair[0],
+            currency_2=pair[1],
+            rate=quote.rate,
+            version=quote.version,
+            age=max(0.0, now - (expires_at - get_rates_cache().ttl)),
+            expires_in=max(0.0, expires_at - now),
+        )
+
+    async def dump_rates(self) -> list[RateEntry]:
+        return [
+            self._rate_entry(pair, quote, expires_at)
+            for pair, quote, expires_at in sorted(get_rates_cache().snapshot())
+        ]
+
+    async def invalidate_rates(
+        self, target: RateInvalidation
+    ) -> InvalidationResult:
+        if target.currency_1 is not None:
+            pair = (target.currency_1, target.currency_2)
+            await invalidate_quotes(target.currency_1)
+            deleted = int(await get_rates_tiers().delete(pair))
+        else:
+            deleted = await invalidate_rates(target.base)
+        return InvalidationResult(deleted=deleted)
+
+    async def invalidate_currencies(self) -> InvalidationResult:
+        deleted = await get_currencies_tiers().delete("currencies")
+        # сжатое представление списка хранится только в кеше процесса
+        get_currencies_cache().delete("payload")
+        return InvalidationResult(deleted=int(deleted))
+
+    async def refresh_rate(self, pair: CurrencyPair) -> RateEntry:
+        key = (pair.currency_1, pair.currency_2)
+        quote = await ext_api_refresh_rate(*key)
+        rates_cache = get_rates_cache()
+        remaining = rates_cache.remaining_ttl(key) or rates_cache.ttl
+        return self._rate_entry(key, quote, time.monotonic() + remaining)
+
+
+def get_admin_service() -> IAdminService:
+    return AdminService()
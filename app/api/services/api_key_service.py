@@ -0,0 +1,130 @@
+import hmac
+from typing import Annotated, Optional, Protocol
+
+from fastapi import Depends
+
+from app.api.db.models import ApiKey
+from app.api.db.UoW import (
+    IUserUnitOfWork,
+    ReadOnlyUserUnitOfWork,
+    UserUnitOfWork,
+)
+from app.api.errors.exceptions import (
+    ApiKeyNotFoundException,
+    InvalidTokenException,
+    UserUnauthorisedException,
+)
+from app.api.schemas.users import ApiKeyCreate, ApiKeyCreated, ApiKeyInfo
+from app.core.security import (
+    api_key_scheme,
+    create_api_key,
+    get_api_key_prefix,
+    get_username_from_token,
+    hash_api_key,
+    optional_oauth2_scheme,
+)
+
+
+class IApiKeyService(Protocol):
+    async def create_key(
+        self, username: str, data: ApiKeyCreate
+    ) -> ApiKeyCreated: ...
+
+    async def list_keys(self, username: str) -> list[ApiKeyInfo]: ...
+    async def revoke_key(self, username: str, prefix: str) -> None: ...
+    async def authenticate(self, key: str) -> str: ...
+
+
+class ApiKeyService:
+    """API-ключи сервисных учетных записей.
+
+    Проверка ключа - поиск по prefix (в кеше процесса или по индексу в
+    БД) и сравнение HMAC-SHA256, без хеширования пароля.
+    """
+
+    def __init__(
+        self, uow: IUserUnitOfWork, read_uow: Optional[IUserUnitOfWork] = None
+    ) -> None:
+        self.uow = uow
+        self.read_uow = read_uow or uow
+
+    async def _get_user_id(self, username: str) -> int:
+        credentials = await self.uow.user_repo.get_credentials(username)
+        if credentials is None:
+            raise UserUnauthorisedException()
+        return credentials.id
+
+    async def create_key(
+        self, username: str, data: ApiKeyCreate
+    ) -> ApiKeyCreated:
+        key, prefix, key_hash = create_api_key()
+        async with self.uow:
+            api_key = await self.uow.api_key_repo.add_one(
+                ApiKey(
+                    prefix=prefix,
+                    key_hash=key_hash,
+                    name=data.name,
+                    user_id=await self._get_user_id(username),
+                )
+            )
+            info = ApiKeyInfo.model_validate(api_key)
+        return ApiKeyCreated(**info.model_dump(), key=key)
+
+    async def list_keys(self, username: str) -> list[ApiKeyInfo]:
+        async with self.read_uow:
+            credentials = await self.read_uow.user_repo.get_credentials(
+                username
+            )
+            if credentials is None:
+                raise UserUnauthorisedException()
+            api_keys = await self.read_uow.api_key_repo.list_for_user(
+                credentials.id
+            )
+            return [ApiKeyInfo.model_validate(item) for item in api_keys]
+
+    async def revoke_key(self, username: str, prefix: str) -> None:
+        """Отзывает ключ; нет действующего ключа с prefix - 404."""
+
+        async with self.uow:
+            revoked = await self.uow.api_key_repo.revoke(
+                await self._get_user_id(username), prefix
+            )
+        if not revoked:
+            raise ApiKeyNotFoundException(prefix)
+
+    async def authenticate(self, key: str) -> str:
+        """Имя владельца ключа; недействительный ключ - 401."""
+
+        prefix = get_api_key_prefix(key)
+        credentials = None
+        if prefix is not None:
+            async with self.read_uow:
+                credentials = await self.read_uow.api_key_repo.get_credentials(
+                    prefix
+                )
+        if credentials is None or not hmac.compare_digest(
+            hash_api_key(key), credentials.key_hash
+        ):
+            raise InvalidTokenException(detail="API-ключ недействителен")
+        return credentials.username
+
+
+async def get_api_key_service(
+    uow: Annotated[IUserUnitOfWork, Depends(UserUnitOfWork)],
+    read_uow: Annotated[IUserUnitOfWork, Depends(ReadOnlyUserUnitOfWork)],
+) -> IApiKeyService:
+    return ApiKeyService(uow, read_uow)
+
+
+async def get_current_username(
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
+    api_key: Annotated[Optional[str], Depends(api_key_scheme)],
+    api_key_service: Annotated[IApiKeyService, Depends(get_api_key_service)],
+) -> str:
+    """Имя пользователя по заголовку X-API-Key или по JWT-токену."""
+
+    if api_key is not None:
+        return await api_key_service.authenticate(api_key)
+    if token is None:
+        raise InvalidTokenException(detail="Требуется токен или API-ключ")
+    return get_username_from_token(token)
@@ -0,0 +1,88 @@
+from typing import Protocol
+
+from app.api.schemas.currency import (
+    ExactBatchRequest,
+    ExactBatchResponse,
+    ExactCurrencyRequest,
+    ExactCurrencyResponse,
+)
+from app.api.utils.external_api import ext_api_get_rate
+from app.api.utils.fixed_point import (
+    RoundingMode,
+    convert_minor_batch,
+    from_minor,
+    minor_units,
+    rate_to_fixed,
+    to_minor,
+)
+from app.core.config import get_settings
+
+
+class ICurrencyService(Protocol):
+    async def convert_exact(
+        self, request: ExactCurrencyRequest
+    ) -> ExactCurrencyResponse: ...
+
+    async def convert_exact_batch(
+        self, request: ExactBatchRequest
+    ) -> ExactBatchResponse: ...
+
+
+class CurrencyService:
+    """Точная конвертация сумм в целых числах минимальных единиц валют.
+
+    Курс берется тот же, что и для конвертации во float (кеш курсов),
+    и переводится в целое число с rate_digits знаками после запятой.
+    """
+
+    def __init__(self, rounding: RoundingMode, rate_digits: int) -> None:
+        self.rounding = rounding
+        self.rate_digits = rate_digits
+
+    async def convert_exact(
+        self, request: ExactCurrencyRequest
+    ) -> ExactCurrencyResponse:
+        batch = await self.convert_exact_batch(
+            ExactBatchRequest(
+                currency_1=request.currency_1,
+                currency_2=request.currency_2,
+                amounts=[request.amount],
+            )
+        )
+        return ExactCurrencyResponse(
+            currency_1=request.currency_1,
+            currency_2=request.currency_2,
+            amount=request.amount,
+            rate=batch.rate,
+            result=batch.results[0],
+        )
+
+    async def convert_exact_batch(
+        self, request: ExactBatchRequest
+    ) -> ExactBatchResponse:
+        quote = await ext_api_get_rate(request.currency_1, request.currency_2)
+        rate = rate_to_fixed(quote.rate, self.rate_digits)
+        from_exponent = minor_units(request.currency_1)
+        to_exponent = minor_units(request.currency_2)
+        results = convert_minor_batch(
+            [to_minor(amount, from_exponent) for amount in request.amounts],
+            rate,
+            self.rate_digits,
+            from_exponent,
+            to_exponent,
+            self.rounding,
+        )
+        return ExactBatchResponse(
+            currency_1=request.currency_1,
+            currency_2=request.currency_2,
+            rate=from_minor(rate, self.rate_digits),
+            results=[from_minor(result, to_exponent) for result in results],
+        )
+
+
+def get_currency_service() -> ICurrencyService:
+    currency_settings = get_settings().CURRENCY
+    return CurrencyService(
+        rounding=currency_settings.EXACT_ROUNDING,
+        rate_digits=currency_settings.EXACT_RATE_DIGITS,
+    )
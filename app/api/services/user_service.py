@@ -1,27 +1,79 @@
-from typing import Annotated, Protocol
+import datetime
+import time
+from typing import Annotated, Optional, Protocol
 
 from fastapi import Depends
 
-from app.api.db.models import User
-from app.api.db.UoW import IUserUnitOfWork, UserUnitOfWork
+from app.api.db.models import RefreshToken, RevokedToken, User
+from app.api.db.UoW import (
+    IUserUnitOfWork,
+    ReadOnlyUserUnitOfWork,
+    UserUnitOfWork,
+)
 from app.api.errors.exceptions import (
+    InvalidTokenException,
     UniqueFieldException,
+    UserNotFoundException,
     UserUnauthorisedException,
 )
 from app.api.schemas.users import UserCreate, UserReturn
-from app.core.security import verify_password
+from app.api.utils.revocation import RevocationEntry, get_revocation_list
+from app.core.config import get_settings
+from app.core.security import (
+    create_refresh_token,
+    get_password_hash,
+    get_refresh_token_expiry,
+    hash_refresh_token,
+    password_needs_rehash,
+    verify_password,
+)
 
 
 class IUserService(Protocol):
     async def register_user(self, user: UserCreate) -> UserReturn: ...
     async def authenticate_user(self, username: str, password: str) -> str: ...
+    async def issue_refresh_token(self, username: str) -> str: ...
+
+    async def rotate_refresh_token(
+        self, refresh_token: str
+    ) -> tuple[str, str]: ...
+    async def revoke_refresh_token(self, refresh_token: str) -> None: ...
+
+    async def revoke_access_token(
+        self, jti: str, username: str, expires_at: float
+    ) -> None: ...
+
+    async def revoke_all_tokens(self, username: str) -> None: ...
+    async def sync_revocations(self) -> int: ...
+
+
+def to_timestamp(value: datetime.datetime) -> float:
+    # SQLite не хранит часовой пояс, значения в БД всегда в UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.UTC)
+    return value.timestamp()
+
+
+def revocation_entry(token: RevokedToken) -> RevocationEntry:
+    return RevocationEntry(
+        id=token.id,
+        jti=token.jti,
+        username=token.username,
+        revoked_at=to_timestamp(token.revoked_at),
+        expires_at=to_timestamp(token.expires_at),
+    )
 
 
 class UserService:
-    def __init__(self, uow: IUserUnitOfWork) -> None:
+    def __init__(
+        self, uow: IUserUnitOfWork, read_uow: Optional[IUserUnitOfWork] = None
+    ) -> None:
         self.uow = uow
+        # UoW для чтения без commit, по умолчанию - общий UoW
+        self.read_uow = read_uow or uow
 
     async def register_user(self, user: UserCreate) -> UserReturn:
+        self.uow.route_key = user.username
         async with self.uow:
             if await self.uow.user_repo.get_by_username(user.username):
                 raise UniqueFieldException("username", user.username)
@@ -31,16 +83,173 @@ class UserService:
             return UserReturn.model_validate(model)
 
     async def authenticate_user(self, username: str, password: str) -> str:
-        async with self.uow:
-            user: User = await self.uow.user_repo.get_by_username(
-                username.lower()
+        username = username.lower()
+        self.read_uow.route_key = username
+        async with self.read_uow:
+            credentials = await self.read_uow.user_repo.get_credentials(
+                username
             )
-        if user and verify_password(password, user.hashed_password):
-            return user.username
+        if credentials and verify_password(
+            password, credentials.hashed_password
+        ):
+            # хеш создан по устаревшей политике - перехешируем, пока
+            # известен пароль в открытом виде
+            if password_needs_rehash(credentials.hashed_password):
+                self.uow.route_key = username
+                async with self.uow:
+                    await self.uow.user_repo.update_password(
+                        credentials.id, username, get_password_hash(password)
+                    )
+            return credentials.username
         raise UserUnauthorisedException()
 
+    async def issue_refresh_token(self, username: str) -> str:
+        token, token_hash = create_refresh_token()
+        async with self.uow:
+            credentials = await self.uow.user_repo.get_credentials(username)
+            if credentials is None:
+                raise UserUnauthorisedException()
+            await self.uow.refresh_token_repo.add_one(
+                RefreshToken(
+                    token_hash=token_hash,
+                    user_id=credentials.id,
+                    expires_at=get_refresh_token_expiry(),
+                )
+            )
+        return token
+
+    async def rotate_refresh_token(
+        self, refresh_token: str
+    ) -> tuple[str, str]:
+        """Обменивает refresh-токен на новый (ротация).
+
+        Возвращает имя пользователя и новый refresh-токен. Старый токен
+        отзывается. Повторное предъявление уже отозванного токена (в том
+        числе параллельное: отозвать токен может только один запрос)
+        считается признаком кражи: отзываются все токены пользователя.
+        """
+
+        new_token, new_token_hash = create_refresh_token()
+        async with self.uow:
+            token = await self.uow.refresh_token_repo.get_by_hash(
+                hash_refresh_token(refresh_token)
+            )
+            if token is None or token.is_expired:
+                raise InvalidTokenException(
+                    detail="Refresh-токен недействителен"
+                )
+            reused = token.revoked or not (
+                await self.uow.refresh_token_repo.revoke(token.id)
+            )
+            if reused:
+                await self.uow.refresh_token_repo.revoke_all_for_user(
+                    token.user_id
+                )
+            else:
+                await self.uow.refresh_token_repo.add_one(
+                    RefreshToken(
+                        token_hash=new_token_hash,
+                        user_id=token.user_id,
+                        expires_at=get_refresh_token_expiry(),
+                    )
+                )
+        # исключение бросается после commit, чтобы отзыв токенов сохранился
+        if reused:
+            raise InvalidTokenException(detail="Refresh-токен недействителен")
+        return token.user.username, new_token
+
+    async def revoke_refresh_token(self, refresh_token: str) -> None:
+        async with self.uow:
+            token = await self.uow.refresh_token_repo.get_by_hash(
+                hash_refresh_token(refresh_token)
+            )
+            if token is not None:
+                token.revoked = True
+
+    async def _add_revocation(self, token: RevokedToken) -> RevocationEntry:
+        await self.uow.revoked_token_repo.delete_expired()
+        await self.uow.revoked_token_repo.add_one(token)
+        return revocation_entry(token)
+
+    async def revoke_access_token(
+        self, jti: str, username: str, expires_at: float
+    ) -> None:
+        token = RevokedToken(
+            jti=jti,
+            username=username,
+            revoked_at=datetime.datetime.now(datetime.UTC),
+            expires_at=datetime.datetime.fromtimestamp(
+                expires_at, datetime.UTC
+            ),
+        )
+        async with self.uow:
+            # повторный выход с тем же токеном, возможно, через другой
+            # процесс: отзыв уже есть
+            existing = await self.uow.revoked_token_repo.get_by_jti(jti)
+            if existing is not None:
+                entry = revocation_entry(existing)
+            else:
+                entry = await self._add_revocation(token)
+        # в этом процессе отзыв действует сразу, в остальных - после
+        # загрузки из БД (sync_revocations)
+        get_revocation_list().add(entry)
+
+    async def revoke_all_tokens(self, username: str) -> None:
+        """Отзывает все выданные пользователю токены доступа и refresh."""
+
+        now = datetime.datetime.now(datetime.UTC)
+        self.uow.route_key = username.lower()
+        async with self.uow:
+            credentials = await self.uow.user_repo.get_credentials(username)
+            if credentials is None:
+                raise UserNotFoundException(username)
+            await self.uow.refresh_token_repo.revoke_all_for_user(
+                credentials.id
+            )
+            # позже истекут все токены доступа, выданные до отзыва
+            token = RevokedToken(
+                username=credentials.username,
+                revoked_at=now,
+                expires_at=now
+                + datetime.timedelta(
+                    minutes=get_settings().JWT.EXPIRES_MINUTES
+                ),
+            )
+            entry = await self._add_revocation(token)
+        get_revocation_list().add(entry)
+
+    async def sync_revocations(self) -> int:
+        """Загружает новые отзывы токенов из БД в память процесса.
+
+        Читает основную БД: на реплике недавний отзыв может еще
+        отсутствовать, а окно повторной загрузки его уже не покроет.
+        Возвращает число новых для процесса отзывов.
+        """
+
+        revocations = get_revocation_list()
+        revoked_after = None
+        if revocations.synced_until is not None:
+            revoked_after = datetime.datetime.fromtimestamp(
+                revocations.synced_until
+                - get_settings().JWT.REVOCATION_SYNC_OVERLAP,
+                datetime.UTC,
+            )
+        async with self.uow:
+            tokens = await self.uow.revoked_token_repo.list_since(
+                revoked_after
+            )
+            entries = [revocation_entry(token) for token in tokens]
+        added = sum(revocations.add(entry) for entry in entries)
+        revocations.synced_until = max(
+            [entry.revoked_at for entry in entries],
+            default=revocations.synced_until,
+        )
+        revocations.prune(time.time())
+        return added
+
 
 async def get_user_service(
-    uow: Annotated[IUserUnitOfWork, Depends(UserUnitOfWork)]
+    uow: Annotated[IUserUnitOfWork, Depends(UserUnitOfWork)],
+    read_uow: Annotated[IUserUnitOfWork, Depends(ReadOnlyUserUnitOfWork)],
 ) -> IUserService:
-    return UserService(uow)
+    return UserService(uow, read_uow)
@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, Iterator, Optional, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# значение по умолчанию для get: позволяет хранить в кеше None
+MISSING: Any = object()
+
+
+class TTLCache(Generic[K, V]):
+    """Ограниченный по размеру LRU-кеш с временем жизни записей.
+
+    При переполнении вытесняется давно не использованная запись.
+    Просроченные записи удаляются при обращении к ним. version
+    увеличивается при каждом изменении набора записей.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.version += 1
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def remaining_ttl(self, key: K) -> Optional[float]:
+        """Сколько секунд осталось жить записи (None, если ее нет)."""
+
+        item = self._data.get(key)
+        if item is None:
+            return None
+        remaining = item[1] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        self.version += 1
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def snapshot(self) -> list[tuple[K, V, float]]:
+        """Непросроченные записи с моментом истечения (time.monotonic).
+
+        Порядок вытеснения при этом не меняется.
+        """
+
+        now = time.monotonic()
+        return [
+            (key, value, expires_at)
+            for key, (value, expires_at) in self._data.items()
+            if expires_at > now
+        ]
+
+    def delete(self, key: K) -> None:
+        if self._data.pop(key, MISSING) is not MISSING:
+            self.version += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.version += 1
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._data))
@@ -0,0 +1,134 @@
+"""Сохранение кешированных курсов и списка валют на диск.
+
+Кеш периодически записывается в JSON-файл и загружается при старте,
+поэтому перезапуск приложения не приводит к всплеску запросов к внешнему
+API. Для каждой записи хранятся время получения и истечения (Unix time):
+после загрузки запись живет ровно столько, сколько ей оставалось.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointEntry(NamedTuple):
+    key: Any
+    value: Any
+    # Unix time получения записи и ее истечения
+    fetched_at: float
+    expires_at: float
+
+
+class Checkpoint(NamedTuple):
+    created_at: float
+    rates: list[CheckpointEntry]
+    currencies: Optional[CheckpointEntry]
+
+
+class CheckpointFormatError(ValueError):
+    pass
+
+
+def atomic_write(path: str | Path, data: bytes) -> None:
+    """Записывает файл целиком или не изменяет его.
+
+    Данные пишутся во временный файл в том же каталоге, который затем
+    переименовывается: при сбое посреди записи остается прежний файл.
+    """
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def write_checkpoint(
+    path: str | Path,
+    rates: list[CheckpointEntry],
+    currencies: Optional[CheckpointEntry] = None,
+) -> None:
+    """Записывает курсы (ключ - пара валют) и список валют."""
+
+    data = {
+        "version": CHECKPOINT_VERSION,
+        "created_at": time.time(),
+        "rates": [
+            {
+                "pair": list(entry.key),
+                "rate": entry.value,
+                "fetched_at": entry.fetched_at,
+                "expires_at": entry.expires_at,
+            }
+            for entry in rates
+        ],
+        "currencies": (
+            None
+            if currencies is None
+            else {
+                "currencies": currencies.value,
+                "fetched_at": currencies.fetched_at,
+                "expires_at": currencies.expires_at,
+            }
+        ),
+    }
+    atomic_write(path, json.dumps(data, ensure_ascii=False).encode())
+
+
+def read_checkpoint(path: str | Path) -> Checkpoint:
+    """Читает файл, записанный write_checkpoint.
+
+    Файл другой версии формата или с неверной структурой дает
+    CheckpointFormatError, отсутствующий файл - FileNotFoundError.
+    """
+
+    with open(path, "rb") as file:
+        try:
+            data = json.load(file)
+        except ValueError as e:
+            raise CheckpointFormatError(
+                f"Файл {path} не является JSON."
+            ) from e
+    if not isinstance(data, dict) or data.get("version") != (
+        CHECKPOINT_VERSION
+    ):
+        raise CheckpointFormatError(
+            f"Файл {path} не является сохраненным кешем версии "
+            f"{CHECKPOINT_VERSION}."
+        )
+    try:
+        rates = [
+            CheckpointEntry(
+                tuple(item["pair"]),
+                float(item["rate"]),
+                float(item["fetched_at"]),
+                float(item["expires_at"]),
+            )
+            for item in data["rates"]
+        ]
+        currencies = None
+        if data["currencies"] is not None:
+            currencies = CheckpointEntry(
+                "currencies",
+                dict(data["currencies"]["currencies"]),
+                float(data["currencies"]["fetched_at"]),
+                float(data["currencies"]["expires_at"]),
+            )
+        return Checkpoint(float(data["created_at"]), rates, currencies)
+    except (KeyError, TypeError, ValueError) as e:
+        raise CheckpointFormatError(
+            f"Сохраненный кеш {path} поврежден."
+        ) from e
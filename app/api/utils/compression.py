@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+from functools import cache
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+from fastapi import Request, Response, status
+
+from app.core.config import get_settings
+
+
+# порядок предпочтения кодировок при одинаковом q в Accept-Encoding
+ENCODINGS = ("br", "gzip")
+
+
+class CompressedPayload(NamedTuple):
+    """Тело ответа, заранее сжатое всеми доступными кодировками."""
+
+    media_type: str
+    digest: str
+    variants: dict[str, bytes]
+
+    def etag(self, encoding: str) -> str:
+        # у каждого представления (кодировки) свой сильный ETag
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'
+
+
+def compress_payload(body: bytes, media_type: str) -> CompressedPayload:
+    compression_settings = get_settings().COMPRESSION
+    variants = {
+        "identity": body,
+        "gzip": gzip.compress(
+            body,
+            compresslevel=compression_settings.PRECOMPRESS_GZIP_LEVEL,
+            mtime=0,
+        ),
+    }
+    try:
+        import brotli
+    except ImportError:
+        # brotli необязателен: без него отдаются gzip и несжатый вариант
+        pass
+    else:
+        variants["br"] = brotli.compress(
+            body, quality=compression_settings.PRECOMPRESS_BROTLI_QUALITY
+        )
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return CompressedPayload(media_type, digest, variants)
+
+
+@cache
+def load_static_payload(path: str, media_type: str) -> CompressedPayload:
+    """Читает и сжимает статический файл один раз за время работы."""
+
+    return compress_payload(Path(path).read_bytes(), media_type)
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Разбирает Accept-Encoding в словарь кодировка -> q."""
+
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str]) -> str:
+    """Выбирает лучшую из доступных кодировок, приемлемых для клиента."""
+
+    accepted = parse_accept_encoding(accept_encoding)
+    best, best_quality = "identity", 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def etag_matches(if_none_match: str, etags: Iterable[str]) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match сравнивается слабо: префикс W/ не учитывается
+    candidates = {
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    }
+    return not candidates.isdisjoint(tag.removeprefix("W/") for tag in etags)
+
+
+def precompressed_response(
+    request: Request, payload: CompressedPayload, cache_control: str
+) -> Response:
+    """Отдает подходящий клиенту вариант заранее сжатого тела.
+
+    Если у клиента уже есть актуальная версия (любое из представлений),
+    возвращается 304 без тела.
+    """
+
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding", ""), payload.variants
+    )
+    headers = {
+        "ETag": payload.etag(encoding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(
+        if_none_match, (payload.etag(e) for e in payload.variants)
+    ):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        payload.variants[encoding],
+        media_type=payload.media_type,
+        headers=headers,
+    )
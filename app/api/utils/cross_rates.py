@@ -0,0 +1,149 @@
+"""Кросс-курсы по графу известных курсов.
+
+Вершины графа - коды валют, ребра - кешированные курсы пар. Каждый
+курс дает два ребра: прямое (a -> b, rate) и обратное (b -> a, 1 / rate),
+если обратная пара не запрошена отдельно. Для каждой пары вершин
+выбирается путь с наименьшим числом ребер (каждый шаг добавляет
+погрешность), а среди них - путь с самым свежим из самых старых курсов.
+
+Граф пересобирается при первом обращении после изменения кеша курсов
+или истечения одного из курсов (один проход по курсам). Кросс-курсы
+ищутся лениво: при первом запросе от исходной валюты - поиск в ширину
+только из нее, дальше до пересборки графа - обращение к словарю. Полный
+пересчет всех пар на каждое изменение кеша занимал бы цикл событий на
+сотни миллисекунд.
+"""
+
+import hashlib
+import math
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from app.api.utils.cache import TTLCache
+
+
+if TYPE_CHECKING:
+    from app.api.utils.external_api import RateQuote
+
+
+class Edge(NamedTuple):
+    rate: float
+    expires_at: float
+    # курс, из которого получено ребро, и направление
+    token: str
+
+
+class CrossRate(NamedTuple):
+    rate: float
+    # валюты пути, от исходной к целевой
+    path: tuple[str, ...]
+    # моменты по time.monotonic: истечение и получение самого старого
+    # курса на пути
+    expires_at: float
+    fetched_at: float
+    tokens: tuple[str, ...]
+
+    @property
+    def version(self) -> str:
+        """Версия кросс-курса: меняется вместе с любым курсом пути."""
+
+        snapshot = "|".join(self.tokens).encode()
+        return hashlib.sha256(snapshot).hexdigest()[:16]
+
+
+def build_graph(
+    quotes: list[tuple[tuple[str, str], "RateQuote", float]],
+) -> dict[str, dict[str, Edge]]:
+    graph: dict[str, dict[str, Edge]] = defaultdict(dict)
+    for (first, second), quote, expires_at in quotes:
+        graph[first][second] = Edge(
+            quote.rate, expires_at, f"{first}>{second}:{quote.version}"
+        )
+    # обратное ребро - только если обратная пара не известна напрямую
+    for (first, second), quote, expires_at in quotes:
+        if quote.rate > 0:
+            graph[second].setdefault(
+                first,
+                Edge(
+                    1 / quote.rate,
+                    expires_at,
+                    f"{second}<{first}:{quote.version}",
+                ),
+            )
+    return graph
+
+
+def search(
+    graph: dict[str, dict[str, Edge]], source: str, max_hops: int, ttl: float
+) -> dict[str, CrossRate]:
+    """Кросс-курсы из source во все достижимые валюты (поиск в ширину)."""
+
+    if source not in graph:
+        return {}
+    # вершина -> (курс, путь, истечение, курсы пути)
+    best = {source: (1.0, (source,), math.inf, ())}
+    layer = [source]
+    for _ in range(max_hops):
+        next_layer: dict[str, tuple] = {}
+        for node in layer:
+            rate, path, expires_at, tokens = best[node]
+            for target, edge in graph[node].items():
+                if target in best:
+                    continue
+                candidate = (
+                    rate * edge.rate,
+                    path + (target,),
+                    min(expires_at, edge.expires_at),
+                    tokens + (edge.token,),
+                )
+                current = next_layer.get(target)
+                if current is None or candidate[2] > current[2]:
+                    next_layer[target] = candidate
+        if not next_layer:
+            break
+        best.update(next_layer)
+        layer = list(next_layer)
+    return {
+        target: CrossRate(rate, path, expires_at, expires_at - ttl, tokens)
+        for target, (rate, path, expires_at, tokens) in best.items()
+        if target != source
+    }
+
+
+class CrossRateTable:
+    """Кросс-курсы поверх кеша курсов пар, найденные по запросу."""
+
+    def __init__(
+        self, rates: TTLCache[tuple[str, str], "RateQuote"], max_hops: int
+    ) -> None:
+        self.rates = rates
+        self.max_hops = max_hops
+        self._graph: dict[str, dict[str, Edge]] = {}
+        # исходная валюта -> кросс-курсы из нее
+        self._sources: dict[str, dict[str, CrossRate]] = {}
+        self._version: Optional[int] = None
+        self._expires_at = math.inf
+
+    def get(self, currency_1: str, currency_2: str) -> Optional[CrossRate]:
+        if (
+            self._version != self.rates.version
+            or self._expires_at <= time.monotonic()
+        ):
+            self.rebuild()
+        targets = self._sources.get(currency_1)
+        if targets is None:
+            targets = self._sources[currency_1] = search(
+                self._graph, currency_1, self.max_hops, self.rates.ttl
+            )
+        return targets.get(currency_2)
+
+    def rebuild(self) -> None:
+        # версия до снимка: изменения во время пересчета не потеряются
+        self._version = self.rates.version
+        quotes = self.rates.snapshot()
+        self._graph = build_graph(quotes)
+        self._sources = {}
+        self._expires_at = min(
+            (expires_at for _, _, expires_at in quotes), default=math.inf
+        )
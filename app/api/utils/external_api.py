@@ -1,11 +1,17 @@
-from typing import Any
+import asyncio
+import hashlib
+import json
+import time
+from functools import cache
+from typing import TYPE_CHECKING, Annotated, Any, NamedTuple, Optional
 
-import httpx
-from pydantic import ValidationError
+from pydantic import Field, TypeAdapter, ValidationError
 
 from app.api.errors.exceptions import (
     ExternalAPIDataError,
     ExternalAPIHTTPError,
+    ShuttingDownException,
+    UnknownCurrencyException,
 )
 from app.api.errors.logger import logger
 from app.api.schemas.currency import (
@@ -13,24 +19,237 @@ from app.api.schemas.currency import (
     CurrencyRequest,
     CurrencyResponse,
 )
-from app.core.config import settings
+from app.api.utils.cache import TTLCache
+from app.api.utils.checkpoint import (
+    CheckpointEntry,
+    read_checkpoint,
+    write_checkpoint,
+)
+from app.api.utils.compression import CompressedPayload, compress_payload
+from app.api.utils.cross_rates import CrossRateTable
+from app.api.utils.hedging import HedgePolicy, hedged
+from app.api.utils.providers import (
+    IRateProvider,
+    LocalFileProvider,
+    ProviderAggregator,
+    SnapshotProvider,
+)
+from app.api.utils.rate_snapshot import write_snapshot
+from app.api.utils.tiered_cache import SQLiteCache, TwoTierCache
+from app.core.config import get_settings
+
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class RateQuote(NamedTuple):
+    """Курс пары валют за единицу валюты."""
+
+    rate: float
+    # версия снимка курса: зависит только от пары и значения курса,
+    # поэтому не меняется, если при обновлении курс остался прежним
+    version: str
+
+
+def make_rate_quote(pair: tuple[str, str], rate: float) -> RateQuote:
+    snapshot = f"{pair[0]}/{pair[1]}:{rate!r}".encode()
+    return RateQuote(rate, hashlib.sha256(snapshot).hexdigest()[:16])
+
+
+# список валют меняется редко, курс хранится за единицу валюты
+@cache
+def get_currencies_cache() -> (
+    TTLCache[str, CurrencyAll | tuple[CurrencyAll, CompressedPayload]]
+):
+    # список валют и его сжатое JSON-представление (вместе со списком,
+    # из которого оно построено)
+    return TTLCache(maxsize=2, ttl=get_settings().CURRENCY.LIST_TTL)
+
+
+@cache
+def get_rates_cache() -> TTLCache[tuple[str, str], RateQuote]:
+    currency_settings = get_settings().CURRENCY
+    return TTLCache(
+        maxsize=currency_settings.RATES_MAXSIZE,
+        ttl=currency_settings.RATES_TTL,
+    )
+
+
+@cache
+def get_shared_cache() -> Optional[SQLiteCache]:
+    """Общий для процессов хоста кеш (L2), если задан SHARED_CACHE_PATH."""
+
+    currency_settings = get_settings().CURRENCY
+    if not currency_settings.SHARED_CACHE_PATH:
+        return None
+    return SQLiteCache(
+        currency_settings.SHARED_CACHE_PATH,
+        currency_settings.SHARED_CACHE_MAXSIZE,
+    )
+
+
+@cache
+def get_rates_tiers() -> TwoTierCache[tuple[str, str], RateQuote]:
+    return TwoTierCache(
+        "rates",
+        get_rates_cache(),
+        get_shared_cache(),
+        encode_key=lambda pair: f"rate:{pair[0]}/{pair[1]}",
+        dump=lambda quote: repr(quote.rate),
+        load=lambda pair, text: make_rate_quote(pair, float(text)),
+        lease_seconds=get_settings().CURRENCY.SHARED_CACHE_LEASE_SECONDS,
+    )
+
+
+# курсы всех валют к базовой валюте (FETCH_MODE=quotes); базовых валют
+# не больше числа валют
+QUOTES_MAXSIZE = 256
+
+
+@cache
+def get_quotes_tiers() -> TwoTierCache[str, dict[str, float]]:
+    """Загрузки курсов к базовой валюте: одна на ключ для всех процессов.
+
+    Курсы пар из загрузки записываются и в кеш курсов (get_rates_tiers),
+    здесь хранится сама загрузка, чтобы ожидающие ее получили.
+    """
+
+    currency_settings = get_settings().CURRENCY
+    return TwoTierCache(
+        "quotes",
+        TTLCache(maxsize=QUOTES_MAXSIZE, ttl=currency_settings.RATES_TTL),
+        get_shared_cache(),
+        encode_key=lambda base: f"quotes:{base}",
+        dump=json.dumps,
+        load=lambda base, text: json.loads(text),
+        lease_seconds=currency_settings.SHARED_CACHE_LEASE_SECONDS,
+    )
+
+
+@cache
+def get_currencies_tiers() -> TwoTierCache[str, CurrencyAll]:
+    return TwoTierCache(
+        "currencies",
+        get_currencies_cache(),
+        get_shared_cache(),
+        encode_key=lambda key: key,
+        dump=lambda currencies: currencies.model_dump_json(),
+        load=lambda key, text: CurrencyAll.model_validate_json(text),
+        lease_seconds=get_settings().CURRENCY.SHARED_CACHE_LEASE_SECONDS,
+    )
+
+
+@cache
+def get_cross_rates() -> CrossRateTable:
+    return CrossRateTable(
+        get_rates_cache(), get_settings().CURRENCY.CROSS_RATE_MAX_HOPS
+    )
+
+
+@cache
+def get_hedge_policy() -> HedgePolicy:
+    currency_settings = get_settings().CURRENCY
+    return HedgePolicy(
+        percentile=currency_settings.HEDGE_PERCENTILE,
+        initial_delay=currency_settings.HEDGE_INITIAL_DELAY,
+        max_ratio=currency_settings.HEDGE_MAX_RATIO,
+    )
+
+
+_http_client: Optional["httpx.AsyncClient"] = None
+# запросы к внешнему API, ожидающие ответа
+_upstream_tasks: set[asyncio.Task] = set()
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """Общий HTTP-клиент для запросов к внешнему API.
+
+    Соединения (и TLS-сессии) с внешним API переиспользуются между
+    запросами, а не устанавливаются заново для каждого из них.
+    """
+
+    import httpx
+
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient()
+    return _http_client
+
+
+def use_http_client(client: Optional["httpx.AsyncClient"]) -> None:
+    """Подменяет общий HTTP-клиент.
+
+    Например, клиентом с httpx.ASGITransport, чтобы запросы к внешнему
+    API обрабатывало приложение в том же процессе (см.
+    benchmarks/fake_upstream.py). None - вернуть клиент по умолчанию.
+    """
+
+    global _http_client
+    _http_client = client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def close_shared_cache() -> None:
+    if get_shared_cache() is not None:
+        get_shared_cache().close()
+
+
+def cancel_upstream_requests() -> int:
+    """Отменяет ожидающие ответа запросы к внешнему API.
+
+    Вызывается при остановке приложения: обработчики этих запросов
+    получают ShuttingDownException и отвечают клиенту 503.
+    """
+
+    for task in _upstream_tasks:
+        task.cancel()
+    return len(_upstream_tasks)
+
+
+def _track_upstream_task(task: asyncio.Future) -> None:
+    _upstream_tasks.add(task)
+    task.add_done_callback(_upstream_tasks.discard)
 
 
 async def ext_api_request(url: str, **kwargs) -> dict:
+    """GET-запрос к внешнему API с хеджированием (см. app.api.utils.hedging)."""
+
+    import httpx
+
+    def send():
+        return get_http_client().get(
+            url.format(**kwargs),
+            headers={"apikey": get_settings().CURRENCY.API_KEY},
+        )
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url.format(**kwargs),
-                headers={"apikey": settings.CURRENCY.API_KEY},
-            )
+        response = await hedged(send, get_hedge_policy(), _track_upstream_task)
     except httpx.RequestError as e:
         raise ExternalAPIHTTPError(detail=str(e)) from e
+    except asyncio.CancelledError as e:
+        # отменены сами запросы к внешнему API, а не обрабатывающая задача
+        if not asyncio.current_task().cancelling():
+            raise ShuttingDownException() from e
+        raise
     else:
         st_code, text = response.status_code, response.text
         logger.debug(f"Запрос к внешнему API. Ответ с кодом {st_code}: {text}")
-        if st_code == 200:
+        if st_code != 200:
+            raise ExternalAPIHTTPError(status_code=st_code, detail=text)
+        try:
             return response.json()
-        raise ExternalAPIHTTPError(status_code=st_code, detail=text)
+        except ValueError as e:
+            raise ExternalAPIDataError(
+                detail="Ответ внешнего API не является JSON.",
+                ext_api_data=text,
+            ) from e
 
 
 def ext_api_get_data(key: str, data: dict) -> Any:
@@ -44,30 +263,341 @@ def ext_api_get_data(key: str, data: dict) -> Any:
     return result
 
 
+class ApilayerProvider:
+    """Поставщик курсов apilayer (currency_data): URL из CurrencySettings."""
+
+    name = "apilayer"
+    fallback = False
+
+    async def get_currencies(self) -> dict[str, str]:
+        data = await ext_api_request(get_settings().CURRENCY.URL_LIST)
+        return ext_api_get_data(key="currencies", data=data)
+
+    async def get_quotes(self, base: str) -> dict[str, float]:
+        data = await ext_api_request(
+            get_settings().CURRENCY.URL_LIVE, base=base
+        )
+        # ключи вида "USDEUR": базовая валюта и валюта курса
+        quotes = ext_api_get_data(key="quotes", data=data)
+        return {
+            key[len(base) :]: value
+            for key, value in quotes.items()
+            if key.startswith(base)
+        }
+
+    async def convert(
+        self, currency_1: str, currency_2: str, amount: float
+    ) -> Any:
+        data = await ext_api_request(
+            get_settings().CURRENCY.URL_EXCHANGE,
+            currency_1=currency_1,
+            currency_2=currency_2,
+            amount=amount,
+        )
+        return ext_api_get_data(key="result", data=data)
+
+
+@cache
+def get_rate_provider() -> IRateProvider:
+    """Поставщики курсов из CURRENCY.PROVIDERS в порядке опроса."""
+
+    currency_settings = get_settings().CURRENCY
+    factories = {
+        "apilayer": ApilayerProvider,
+        "file": lambda: LocalFileProvider(currency_settings.FILE_PATH),
+        "snapshot": lambda: SnapshotProvider(currency_settings.SNAPSHOT_PATH),
+    }
+    return ProviderAggregator(
+        [factories[name]() for name in currency_settings.PROVIDERS],
+        eject_seconds=currency_settings.PROVIDER_EJECT_SECONDS,
+    )
+
+
 async def ext_api_get_currencies() -> CurrencyAll:
-    data = await ext_api_request(settings.CURRENCY.URL_LIST)
-    currencies_dict = ext_api_get_data(key="currencies", data=data)
+    currencies_tiers = get_currencies_tiers()
+    cached = await currencies_tiers.get("currencies")
+    if cached is not None:
+        return cached
+
+    async def fetch() -> CurrencyAll:
+        currencies_dict = await get_rate_provider().get_currencies()
+        try:
+            return CurrencyAll(currencies=currencies_dict)
+        except ValidationError as e:
+            raise ExternalAPIDataError(
+                detail="Ошибка валидации данных из внешнего API.",
+                ext_api_data=currencies_dict,
+            ) from e
+
+    return await currencies_tiers.refresh("currencies", fetch)
+
+
+async def ext_api_get_currencies_payload() -> CompressedPayload:
+    """Список валют в виде JSON, сжатого один раз на каждый список.
+
+    Сжатый ответ хранится вместе со списком, из которого построен, и
+    истекает одновременно с ним: новый список (из внешнего API, L2 или
+    сохраненного кеша) сжимается заново.
+    """
+
+    currencies = await ext_api_get_currencies()
+    currencies_cache = get_currencies_cache()
+    cached = currencies_cache.get("payload")
+    if cached is not None and cached[0] is currencies:
+        return cached[1]
+    payload = compress_payload(
+        currencies.model_dump_json().encode(), "application/json"
+    )
+    ttl = currencies_cache.remaining_ttl("currencies")
+    if ttl is not None:
+        currencies_cache.set("payload", (currencies, payload), ttl)
+    return payload
+
+
+_quotes_adapter = TypeAdapter(dict[str, Annotated[float, Field(gt=0)]])
+
+
+async def ext_api_load_quotes(base: str) -> None:
+    """Загружает в кеш курсы всех валют к base одним запросом.
+
+    Одновременные загрузки для base (в процессе и в процессах хоста)
+    выполняют один запрос к внешнему API; остальные получают его
+    результат и переносят курсы в свой кеш процесса.
+    """
+
+    quotes_tiers, rates_tiers = get_quotes_tiers(), get_rates_tiers()
+
+    async def fetch() -> dict[str, float]:
+        quotes = await get_rate_provider().get_quotes(base)
+        try:
+            quotes = _quotes_adapter.validate_python(quotes)
+        except ValidationError as e:
+            raise ExternalAPIDataError(
+                detail="Ошибка валидации данных из внешнего API.",
+                ext_api_data=quotes,
+            ) from e
+        await rates_tiers.set_many(
+            {
+                (base, currency): make_rate_quote((base, currency), rate)
+                for currency, rate in quotes.items()
+            }
+        )
+        return quotes
+
+    quotes = await quotes_tiers.get(base)
+    if quotes is None:
+        quotes = await quotes_tiers.refresh(base, fetch)
+    ttl = quotes_tiers.l1.remaining_ttl(base)
+    if ttl is None:
+        return
+    rates_cache = get_rates_cache()
+    for currency, rate in quotes.items():
+        pair = (base, currency)
+        if pair not in rates_cache:
+            rates_cache.set(pair, make_rate_quote(pair, rate), ttl)
+
+
+async def _fetch_exchange(currency: CurrencyRequest) -> CurrencyResponse:
+    counted_result = await get_rate_provider().convert(
+        currency.currency_1, currency.currency_2, currency.amount
+    )
     try:
-        result = CurrencyAll(currencies=currencies_dict)
+        return CurrencyResponse(**currency.model_dump(), result=counted_result)
     except ValidationError as e:
         raise ExternalAPIDataError(
             detail="Ошибка валидации данных из внешнего API.",
-            ext_api_data=currencies_dict,
+            ext_api_data=counted_result,
         ) from e
-    return result
 
 
 async def ext_api_get_exchange(currency: CurrencyRequest) -> CurrencyResponse:
     req_params = currency.model_dump()
-    data_dict = await ext_api_request(
-        settings.CURRENCY.URL_EXCHANGE, **req_params
+    # курс валюты к себе - 1: в загрузке курсов к базовой валюте (quotes)
+    # ее самой нет
+    if currency.currency_1 == currency.currency_2:
+        return CurrencyResponse(**req_params, result=currency.amount)
+    rates_cache, rates_tiers = get_rates_cache(), get_rates_tiers()
+    pair = (currency.currency_1, currency.currency_2)
+    quote = await rates_tiers.get(pair)
+    if quote is not None:
+        return CurrencyResponse(
+            **req_params, result=quote.rate * currency.amount
+        )
+    # пара не запрошена напрямую, но курс выводится из известных курсов
+    cross_rate = get_cross_rates().get(*pair)
+    if cross_rate is not None:
+        return CurrencyResponse(
+            **req_params, result=cross_rate.rate * currency.amount
+        )
+    if get_settings().CURRENCY.FETCH_MODE == "quotes":
+        await ext_api_load_quotes(currency.currency_1)
+        quote = rates_cache.get(pair)
+        if quote is None:
+            raise UnknownCurrencyException(currency.currency_2)
+        return CurrencyResponse(
+            **req_params, result=quote.rate * currency.amount
+        )
+    result: Optional[CurrencyResponse] = None
+
+    async def fetch() -> RateQuote:
+        nonlocal result
+        result = await _fetch_exchange(currency)
+        return make_rate_quote(pair, result.result / currency.amount)
+
+    quote = await rates_tiers.refresh(pair, fetch)
+    if result is not None:
+        return result
+    # курс получен другим запросом процесса или другим процессом хоста
+    return CurrencyResponse(**req_params, result=quote.rate * currency.amount)
+
+
+async def ext_api_get_rate(currency_1: str, currency_2: str) -> RateQuote:
+    """Курс пары за единицу валюты: из кеша или запросом к внешнему API."""
+
+    pair = (currency_1, currency_2)
+    quote = get_rates_cache().get(pair)
+    if quote is None:
+        response = await ext_api_get_exchange(
+            CurrencyRequest(currency_1=currency_1, currency_2=currency_2)
+        )
+        quote = make_rate_quote(pair, response.result)
+    return quote
+
+
+async def invalidate_rates(base: Optional[str] = None) -> int:
+    """Удаляет из кеша курсы пар с валютой base (все курсы, если base нет).
+
+    Удаляются пары base/X и X/base. Кросс-курсы строятся по кешу курсов
+    и пересчитываются без удаленных пар.
+    """
+
+    rates_tiers = get_rates_tiers()
+    # вместе с загрузками курсов: иначе курсы восстановятся из них, а
+    # X/base есть в загрузке по любой X
+    await invalidate_quotes()
+    if base is None:
+        return await rates_tiers.delete_prefix("rate:")
+    return await rates_tiers.delete_prefix(
+        f"rate:{base}/"
+    ) + await rates_tiers.delete_suffix(f"/{base}")
+
+
+async def invalidate_quotes(base: Optional[str] = None) -> None:
+    """Удаляет загрузки курсов к base (все загрузки, если base нет)."""
+
+    quotes_tiers = get_quotes_tiers()
+    if base is None:
+        await quotes_tiers.delete_prefix("quotes:")
+    else:
+        await quotes_tiers.delete(base)
+
+
+async def ext_api_refresh_rate(currency_1: str, currency_2: str) -> RateQuote:
+    """Заново запрашивает курс пары, минуя кеш и кросс-курсы."""
+
+    pair = (currency_1, currency_2)
+    rates_tiers = get_rates_tiers()
+    await rates_tiers.delete(pair)
+
+    async def fetch() -> RateQuote:
+        response = await _fetch_exchange(
+            CurrencyRequest(currency_1=currency_1, currency_2=currency_2)
+        )
+        return make_rate_quote(pair, response.result)
+
+    return await rates_tiers.refresh(pair, fetch)
+
+
+def _wall_clock_entries(cache: TTLCache) -> list[CheckpointEntry]:
+    """Записи кеша со временем получения и истечения в Unix time.
+
+    Время получения восстанавливается по оставшемуся времени жизни
+    записи и времени жизни кеша.
+    """
+
+    offset = time.time() - time.monotonic()
+    return [
+        CheckpointEntry(
+            key, value, expires_at - cache.ttl + offset, expires_at + offset
+        )
+        for key, value, expires_at in cache.snapshot()
+    ]
+
+
+def export_rate_snapshot(path: Optional[str] = None) -> int:
+    """Выгружает курсы из кеша в двоичный снимок (CURRENCY.SNAPSHOT_PATH).
+
+    Вместе с курсами сохраняются названия валют из кешированного списка
+    валют. Возвращает число выгруженных курсов.
+    """
+
+    path = path or get_settings().CURRENCY.SNAPSHOT_PATH
+    currencies = get_currencies_cache().get("currencies")
+    return write_snapshot(
+        path,
+        (
+            (entry.key, entry.value.rate, entry.fetched_at)
+            for entry in _wall_clock_entries(get_rates_cache())
+        ),
+        names=currencies.currencies if currencies is not None else None,
     )
-    counted_result = ext_api_get_data(key="result", data=data_dict)
-    try:
-        result = CurrencyResponse(**req_params, result=counted_result)
-    except ValidationError as e:
-        raise ExternalAPIDataError(
-            detail="Ошибка валидации данных из внешнего API.",
-            ext_api_data=counted_result,
-        ) from e
-    return result
+
+
+def save_cache_checkpoint(path: str) -> int:
+    """Сохраняет кешированные курсы и список валют в файл.
+
+    Возвращает число сохраненных курсов.
+    """
+
+    rates = [
+        entry._replace(value=entry.value.rate)
+        for entry in _wall_clock_entries(get_rates_cache())
+    ]
+    currencies = next(
+        (
+            entry._replace(value=entry.value.currencies)
+            for entry in _wall_clock_entries(get_currencies_cache())
+            if entry.key == "currencies"
+        ),
+        None,
+    )
+    write_checkpoint(path, rates, currencies)
+    return len(rates)
+
+
+def load_cache_checkpoint(path: str) -> int:
+    """Загружает в кеш курсы и список валют, сохраненные в файле.
+
+    Запись живет столько, сколько ей оставалось на момент сохранения,
+    но не дольше текущего времени жизни кеша с момента получения;
+    просроченные записи пропускаются. Возвращает число загруженных
+    курсов.
+    """
+
+    checkpoint = read_checkpoint(path)
+    now = time.time()
+
+    def remaining(entry: CheckpointEntry, cache: TTLCache) -> float:
+        expires_at = min(entry.expires_at, entry.fetched_at + cache.ttl)
+        return expires_at - now
+
+    rates_cache = get_rates_cache()
+    loaded = 0
+    # сначала самые старые: при переполнении вытесняются они
+    for entry in sorted(checkpoint.rates, key=lambda entry: entry.expires_at):
+        ttl = remaining(entry, rates_cache)
+        if ttl > 0:
+            rates_cache.set(
+                entry.key, make_rate_quote(entry.key, entry.value), ttl
+            )
+            loaded += 1
+    currencies_cache = get_currencies_cache()
+    if checkpoint.currencies is not None:
+        ttl = remaining(checkpoint.currencies, currencies_cache)
+        if ttl > 0:
+            currencies_cache.set(
+                "currencies",
+                CurrencyAll(currencies=checkpoint.currencies.value),
+                ttl,
+            )
+    return loaded
@@ -0,0 +1,151 @@
+"""Точная конвертация сумм в целых числах (fixed-point).
+
+Сумма хранится как целое число минимальных единиц валюты (центов,
+филсов и т.п.) по таблице ISO 4217, курс - как целое число, умноженное
+на 10 ** rate_digits. Конвертация пакета сумм по одному курсу сводится
+к одному целочисленному умножению и делению с округлением на каждую
+сумму: множитель и делитель пакета вычисляются один раз.
+
+Целые числа Python не переполняются, поэтому точность не теряется при
+любых суммах и количестве знаков курса.
+"""
+
+from decimal import (
+    ROUND_DOWN,
+    ROUND_HALF_EVEN,
+    ROUND_HALF_UP,
+    ROUND_UP,
+    Decimal,
+)
+from math import gcd
+from typing import Callable, Iterable, Literal
+
+
+RoundingMode = Literal[
+    "ROUND_HALF_EVEN", "ROUND_HALF_UP", "ROUND_DOWN", "ROUND_UP"
+]
+
+# количество знаков после запятой по ISO 4217 для валют, где оно
+# отличается от 2; для остальных кодов (в т.ч. неизвестных) - 2
+MINOR_UNITS: dict[str, int] = {
+    # без разменной единицы
+    "BIF": 0,
+    "CLP": 0,
+    "DJF": 0,
+    "GNF": 0,
+    "ISK": 0,
+    "JPY": 0,
+    "KMF": 0,
+    "KRW": 0,
+    "PYG": 0,
+    "RWF": 0,
+    "UGX": 0,
+    "UYI": 0,
+    "VND": 0,
+    "VUV": 0,
+    "XAF": 0,
+    "XOF": 0,
+    "XPF": 0,
+    # три знака
+    "BHD": 3,
+    "IQD": 3,
+    "JOD": 3,
+    "KWD": 3,
+    "LYD": 3,
+    "OMR": 3,
+    "TND": 3,
+    # четыре знака
+    "CLF": 4,
+    "UYW": 4,
+}
+DEFAULT_MINOR_UNITS = 2
+
+
+def minor_units(currency: str) -> int:
+    return MINOR_UNITS.get(currency, DEFAULT_MINOR_UNITS)
+
+
+def to_minor(amount: Decimal, exponent: int) -> int:
+    """Сумма в минимальных единицах валюты с exponent знаками.
+
+    Сумма с большим числом знаков после запятой не округляется молча:
+    выбрасывается ValueError (как и для суммы вне диапазона Decimal).
+    """
+
+    try:
+        scaled = amount.scaleb(exponent)
+        integral = scaled.to_integral_value()
+    except ArithmeticError as e:
+        raise ValueError(f"Сумма {amount} вне допустимого диапазона") from e
+    if scaled != integral:
+        raise ValueError(
+            f"Сумма {amount} содержит больше {exponent} знаков после запятой"
+        )
+    return int(scaled)
+
+
+def from_minor(value: int, exponent: int) -> Decimal:
+    return Decimal(value).scaleb(-exponent)
+
+
+def rate_to_fixed(rate: float | Decimal, digits: int) -> int:
+    """Курс, умноженный на 10 ** digits и округленный до целого.
+
+    float переводится в Decimal через repr - кратчайшее десятичное
+    представление, - а не через двоичное значение: курс 0.1 становится
+    ровно 0.1, а не 0.1000000000000000055...
+    """
+
+    value = Decimal(repr(rate)) if isinstance(rate, float) else rate
+    return int(value.scaleb(digits).to_integral_value(ROUND_HALF_EVEN))
+
+
+def _round_half_even(numerator: int, denominator: int) -> int:
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        return quotient + 1
+    return quotient
+
+
+# деление неотрицательного числителя на положительный знаменатель
+_DIVIDERS: dict[str, Callable[[int, int], int]] = {
+    ROUND_HALF_EVEN: _round_half_even,
+    ROUND_HALF_UP: lambda n, d: (2 * n + d) // (2 * d),
+    ROUND_DOWN: lambda n, d: n // d,
+    ROUND_UP: lambda n, d: -(-n // d),
+}
+
+
+def divide_rounded(numerator: int, denominator: int, rounding: str) -> int:
+    return _DIVIDERS[rounding](numerator, denominator)
+
+
+def convert_minor_batch(
+    amounts: Iterable[int],
+    rate: int,
+    rate_digits: int,
+    from_exponent: int,
+    to_exponent: int,
+    rounding: RoundingMode = ROUND_HALF_EVEN,
+) -> list[int]:
+    """Конвертирует суммы в минимальных единицах по одному курсу.
+
+    result = amount * rate * 10 ** to_exponent
+             / (10 ** rate_digits * 10 ** from_exponent)
+
+    Множитель и делитель сокращаются на НОД один раз для всего пакета,
+    в цикле остаются только целочисленные умножение и деление.
+    """
+
+    multiplier = rate * 10**to_exponent
+    denominator = 10 ** (rate_digits + from_exponent)
+    common = gcd(multiplier, denominator)
+    multiplier //= common
+    denominator //= common
+    divide = _DIVIDERS[rounding]
+    if denominator == 1:
+        return [amount * multiplier for amount in amounts]
+    if rounding == ROUND_DOWN:
+        return [amount * multiplier // denominator for amount in amounts]
+    return [divide(amount * multiplier, denominator) for amount in amounts]
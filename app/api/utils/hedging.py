@@ -0,0 +1,135 @@
+"""Хеджирование запросов к внешнему API.
+
+Если ответ на запрос не пришел за задержку, равную заданному перцентилю
+недавних времен ответа, отправляется второй такой же запрос. Берется
+первый успешный ответ, оставшийся запрос отменяется. Время отмененного
+запроса тоже учитывается (как нижняя граница времени ответа): иначе
+медленные ответы не попадали бы в окно замеров, и задержка
+хеджирования оказывалась бы заниженной. Дополнительная
+нагрузка ограничена: каждый запрос дает max_ratio "жетона", каждый
+хеджирующий запрос тратит один жетон.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.core.metrics import metrics
+
+
+T = TypeVar("T")
+
+metrics.counter("upstream_requests_total", "Запросы к внешнему API.")
+metrics.counter("upstream_hedges_total", "Отправленные хеджирующие запросы.")
+metrics.counter(
+    "upstream_hedge_wins_total",
+    "Хеджирующие запросы, ответ на которые пришел первым.",
+)
+metrics.gauge(
+    "upstream_hedge_rate",
+    "Доля запросов к внешнему API, для которых отправлен хеджирующий.",
+    lambda: metrics.value("upstream_hedges_total")
+    / (metrics.value("upstream_requests_total") or 1),
+)
+metrics.gauge(
+    "upstream_hedge_win_rate",
+    "Доля хеджирующих запросов, выигравших у основного.",
+    lambda: metrics.value("upstream_hedge_wins_total")
+    / (metrics.value("upstream_hedges_total") or 1),
+)
+
+
+class HedgePolicy:
+    """Задержка хеджирования и ограничение дополнительной нагрузки."""
+
+    def __init__(
+        self,
+        percentile: float,
+        initial_delay: float,
+        max_ratio: float,
+        window: int = 500,
+        min_samples: int = 20,
+        burst: float = 10,
+    ) -> None:
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.burst = burst
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.tokens = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+
+    def delay(self) -> float:
+        """Перцентиль времени ответа (initial_delay, пока замеров мало)."""
+
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(self.latencies)
+        index = math.ceil(self.percentile / 100 * len(ordered)) - 1
+        return ordered[max(0, index)]
+
+    def on_request(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.max_ratio)
+
+    def try_acquire(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+async def hedged(
+    send: Callable[[], Awaitable[T]],
+    policy: HedgePolicy,
+    track: Callable[[asyncio.Future], None] = lambda task: None,
+) -> T:
+    """Выполняет send(), при задержке ответа - повторно и параллельно.
+
+    track вызывается для каждого запущенного запроса (см.
+    external_api.cancel_upstream_requests). Если все запросы завершились
+    ошибкой, выбрасывается ошибка основного. Отмена самих запросов
+    извне дает asyncio.CancelledError.
+    """
+
+    async def attempt() -> T:
+        start = time.monotonic()
+        try:
+            result = await send()
+        except asyncio.CancelledError:
+            policy.observe(time.monotonic() - start)
+            raise
+        policy.observe(time.monotonic() - start)
+        return result
+
+    metrics.inc("upstream_requests_total")
+    policy.on_request()
+    primary = asyncio.ensure_future(attempt())
+    track(primary)
+    pending = {primary}
+    hedge: Optional[asyncio.Future] = None
+    try:
+        done, pending = await asyncio.wait(pending, timeout=policy.delay())
+        if not done and policy.try_acquire():
+            hedge = asyncio.ensure_future(attempt())
+            track(hedge)
+            pending.add(hedge)
+            metrics.inc("upstream_hedges_total")
+        while True:
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    if task is hedge:
+                        metrics.inc("upstream_hedge_wins_total")
+                    return task.result()
+            if not pending:
+                return primary.result()
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+    finally:
+        for task in pending:
+            task.cancel()
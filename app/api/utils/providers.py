@@ -0,0 +1,370 @@
+"""Поставщики курсов валют.
+
+Поставщик умеет вернуть список валют, курсы всех валют к базовой одним
+запросом и результат конвертации суммы. Реализации: apilayer (см.
+app.api.utils.external_api.ApilayerProvider), локальный снимок курсов
+ЕЦБ и двоичный снимок курсов приложения (см. app.api.utils.rate_snapshot).
+ProviderAggregator опрашивает поставщиков, начиная с самого
+быстрого исправного, и переключается на следующий при ошибке; локальные
+снимки (fallback = True) опрашиваются только после всех исправных
+внешних поставщиков.
+"""
+
+import asyncio
+import csv
+import io
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Optional, Protocol
+
+from app.api.errors.exceptions import (
+    ExternalAPIDataError,
+    ExternalAPIHTTPError,
+    UnknownCurrencyException,
+)
+from app.api.errors.logger import logger
+from app.api.utils.rate_snapshot import RateSnapshot, SnapshotFormatError
+from app.core.metrics import metrics
+
+
+metrics.counter(
+    "upstream_provider_failovers_total",
+    "Переключения на следующего поставщика курсов после ошибки.",
+)
+
+
+class IRateProvider(Protocol):
+    name: str
+    # запасной поставщик (локальный снимок с устаревающими курсами)
+    fallback: bool
+
+    async def get_currencies(self) -> dict[str, str]: ...
+    async def get_quotes(self, base: str) -> dict[str, float]: ...
+
+    async def convert(
+        self, currency_1: str, currency_2: str, amount: float
+    ) -> Any: ...
+
+
+# названия валют снимка ЕЦБ (в самом снимке их нет) в том виде, в каком
+# их отдает apilayer
+ECB_CURRENCY_NAMES = {
+    "AUD": "Australian Dollar",
+    "BGN": "Bulgarian Lev",
+    "BRL": "Brazilian Real",
+    "CAD": "Canadian Dollar",
+    "CHF": "Swiss Franc",
+    "CNY": "Chinese Yuan",
+    "CZK": "Czech Republic Koruna",
+    "DKK": "Danish Krone",
+    "EUR": "Euro",
+    "GBP": "British Pound Sterling",
+    "HKD": "Hong Kong Dollar",
+    "HUF": "Hungarian Forint",
+    "IDR": "Indonesian Rupiah",
+    "ILS": "Israeli New Sheqel",
+    "INR": "Indian Rupee",
+    "ISK": "Icelandic Króna",
+    "JPY": "Japanese Yen",
+    "KRW": "South Korean Won",
+    "MXN": "Mexican Peso",
+    "MYR": "Malaysian Ringgit",
+    "NOK": "Norwegian Krone",
+    "NZD": "New Zealand Dollar",
+    "PHP": "Philippine Peso",
+    "PLN": "Polish Zloty",
+    "RON": "Romanian Leu",
+    "SEK": "Swedish Krona",
+    "SGD": "Singapore Dollar",
+    "THB": "Thai Baht",
+    "TRY": "Turkish Lira",
+    "USD": "United States Dollar",
+    "ZAR": "South African Rand",
+}
+
+
+def parse_ecb_xml(text: str) -> dict[str, float]:
+    """Курсы за 1 EUR из XML ЕЦБ (eurofxref-daily.xml или -hist.xml).
+
+    В историческом файле берется первый (самый свежий) день.
+    """
+
+    root = ET.fromstring(text)
+    cubes = [
+        element for element in root.iter() if element.tag.endswith("Cube")
+    ]
+    day = next((cube for cube in cubes if "time" in cube.attrib), None)
+    rates = day if day is not None else cubes
+    return {
+        cube.attrib["currency"]: float(cube.attrib["rate"])
+        for cube in rates
+        if "currency" in cube.attrib
+    }
+
+
+def parse_ecb_csv(text: str) -> dict[str, float]:
+    """Курсы за 1 EUR из CSV ЕЦБ (eurofxref.csv): заголовок и строка дня."""
+
+    header, values = list(csv.reader(io.StringIO(text)))[:2]
+    return {
+        code.strip(): float(value)
+        for code, value in zip(header[1:], values[1:])
+        if code.strip() and value.strip() not in ("", "N/A")
+    }
+
+
+class LocalFileProvider:
+    """Курсы из локального снимка ЕЦБ в формате XML или CSV.
+
+    Сеть не нужна: подходит для работы без доступа к внешнему API, тестов
+    и замеров. Курсы в снимке - за 1 EUR, курсы к другим базовым валютам
+    вычисляются через EUR. Файл перечитывается, если он изменился.
+    """
+
+    name = "file"
+    fallback = True
+    base = "EUR"
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._rates: dict[str, float] = {}
+        self._mtime: Optional[int] = None
+
+    def _read(self) -> dict[str, float]:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+            if mtime == self._mtime:
+                return self._rates
+            text = self.path.read_text(encoding="utf-8")
+        except OSError as e:
+            raise ExternalAPIHTTPError(
+                detail=f"Снимок курсов недоступен: {e}"
+            ) from e
+        parse = parse_ecb_csv if self.path.suffix == ".csv" else parse_ecb_xml
+        try:
+            rates = parse(text)
+        except (ET.ParseError, ValueError, KeyError) as e:
+            raise ExternalAPIDataError(
+                detail=f"Ошибка разбора снимка курсов {self.path}.",
+                ext_api_data=text[:1000],
+            ) from e
+        self._rates = {self.base: 1.0} | rates
+        self._mtime = mtime
+        return self._rates
+
+    async def _load(self) -> dict[str, float]:
+        return await asyncio.to_thread(self._read)
+
+    async def get_currencies(self) -> dict[str, str]:
+        # в снимке ЕЦБ нет названий валют; неизвестные - по коду
+        return {
+            code: ECB_CURRENCY_NAMES.get(code, code)
+            for code in await self._load()
+        }
+
+    async def get_quotes(self, base: str) -> dict[str, float]:
+        rates = await self._load()
+        if base not in rates:
+            raise UnknownCurrencyException(base)
+        return {
+            code: rate / rates[base]
+            for code, rate in rates.items()
+            if code != base
+        }
+
+    async def convert(
+        self, currency_1: str, currency_2: str, amount: float
+    ) -> float:
+        quotes = await self.get_quotes(currency_1)
+        if currency_2 not in quotes:
+            raise UnknownCurrencyException(currency_2)
+        return quotes[currency_2] * amount
+
+
+class SnapshotProvider:
+    """Курсы из двоичного снимка, выгруженного приложением.
+
+    Снимок отображается в память, поэтому открывается мгновенно и не
+    требует сети: подходит для работы без внешнего API (PROVIDERS =
+    ["snapshot"]) и как запасной поставщик при его недоступности.
+    Курс пары берется из снимка напрямую или как обратный к курсу
+    обратной пары. Снимок открывается заново, если файл заменен.
+    """
+
+    name = "snapshot"
+    fallback = True
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._snapshot: Optional[RateSnapshot] = None
+        self._mtime: Optional[int] = None
+
+    def snapshot(self) -> RateSnapshot:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+            if mtime != self._mtime:
+                snapshot = RateSnapshot(self.path)
+                if self._snapshot is not None:
+                    self._snapshot.close()
+                self._snapshot, self._mtime = snapshot, mtime
+        except OSError as e:
+            raise ExternalAPIHTTPError(
+                detail=f"Снимок курсов недоступен: {e}"
+            ) from e
+        except SnapshotFormatError as e:
+            raise ExternalAPIDataError(
+                detail=str(e), ext_api_data=str(self.path)
+            ) from e
+        return self._snapshot
+
+    def rate(self, currency_1: str, currency_2: str) -> Optional[float]:
+        snapshot = self.snapshot()
+        direct = snapshot.get(currency_1, currency_2)
+        if direct is not None:
+            return direct.rate
+        inverse = snapshot.get(currency_2, currency_1)
+        if inverse is not None and inverse.rate > 0:
+            return 1 / inverse.rate
+        return None
+
+    async def get_currencies(self) -> dict[str, str]:
+        codes = set()
+        snapshot = self.snapshot()
+        for currency_1, currency_2, _ in snapshot:
+            codes.update((currency_1, currency_2))
+        try:
+            names = snapshot.names
+        except SnapshotFormatError as e:
+            raise ExternalAPIDataError(
+                detail=str(e), ext_api_data=str(self.path)
+            ) from e
+        return {code: names.get(code, code) for code in sorted(codes)}
+
+    async def get_quotes(self, base: str) -> dict[str, float]:
+        snapshot = self.snapshot()
+        quotes = {
+            code: quote.rate for code, quote in snapshot.quotes(base).items()
+        }
+        for currency_1, currency_2, quote in snapshot:
+            if currency_2 == base and quote.rate > 0:
+                quotes.setdefault(currency_1, 1 / quote.rate)
+        if not quotes:
+            raise UnknownCurrencyException(base)
+        return quotes
+
+    async def convert(
+        self, currency_1: str, currency_2: str, amount: float
+    ) -> float:
+        rate = self.rate(currency_1, currency_2)
+        if rate is None:
+            raise UnknownCurrencyException(currency_2)
+        return rate * amount
+
+
+def is_provider_failure(exc: Exception) -> bool:
+    """Ошибка говорит о неисправности поставщика, а не о запросе."""
+
+    if isinstance(exc, ExternalAPIHTTPError):
+        return (
+            exc.status_code is None
+            or exc.status_code == 429
+            or exc.status_code >= 500
+        )
+    return isinstance(exc, ExternalAPIDataError)
+
+
+class ProviderAggregator:
+    """Опрашивает поставщиков по очереди до первого успешного ответа.
+
+    Первым опрашивается исправный поставщик с наименьшим средним (EWMA)
+    временем ответа; еще не опрошенные - после опрошенных, в порядке
+    настроек (иначе поставщик, до которого не дошла очередь, навсегда
+    оказывался бы "самым быстрым"). Запасные поставщики (fallback)
+    опрашиваются только после того, как ответили ошибкой или исключены
+    все внешние: иначе устаревший снимок, однажды ответивший быстрее
+    внешнего API, обслуживал бы почти все запросы. Поставщик, ответивший
+    ошибкой неисправности (сеть, 5xx, 429, данные не того формата),
+    исключается на eject_seconds: опрашивается после исправных.
+    Если ошибкой ответили все, выбрасывается ошибка первого.
+    """
+
+    name = "aggregator"
+
+    def __init__(
+        self,
+        providers: list[IRateProvider],
+        eject_seconds: float,
+        alpha: float = 0.2,
+    ) -> None:
+        self.providers = providers
+        self.eject_seconds = eject_seconds
+        self.alpha = alpha
+        self.latencies: dict[str, float] = {}
+        self._ejected_until: dict[str, float] = {}
+        # последний успешный ответ: поставщик и время по time.monotonic
+        self.last_success_provider: Optional[str] = None
+        self.last_success: Optional[float] = None
+
+    def ordered(self) -> list[IRateProvider]:
+        now = time.monotonic()
+        return sorted(
+            self.providers,
+            key=lambda provider: (
+                self._ejected_until.get(provider.name, 0) > now,
+                provider.fallback,
+                provider.name not in self.latencies,
+                self.latencies.get(provider.name, 0),
+            ),
+        )
+
+    def observe(self, provider: IRateProvider, seconds: float) -> None:
+        previous = self.latencies.get(provider.name)
+        self.latencies[provider.name] = (
+            seconds
+            if previous is None
+            else previous + self.alpha * (seconds - previous)
+        )
+
+    def eject(self, provider: IRateProvider) -> None:
+        self._ejected_until[provider.name] = (
+            time.monotonic() + self.eject_seconds
+        )
+
+    async def _call(self, method: str, *args) -> Any:
+        errors = []
+        for provider in self.ordered():
+            if errors:
+                metrics.inc("upstream_provider_failovers_total")
+            start = time.monotonic()
+            try:
+                result = await getattr(provider, method)(*args)
+            except (
+                ExternalAPIHTTPError,
+                ExternalAPIDataError,
+                UnknownCurrencyException,
+            ) as e:
+                if is_provider_failure(e):
+                    self.eject(provider)
+                logger.warning(
+                    f"Поставщик курсов '{provider.name}' ответил ошибкой "
+                    f"{type(e).__name__}: {e}"
+                )
+                errors.append(e)
+                continue
+            self.last_success = time.monotonic()
+            self.last_success_provider = provider.name
+            self.observe(provider, self.last_success - start)
+            return result
+        raise errors[0]
+
+    async def get_currencies(self) -> dict[str, str]:
+        return await self._call("get_currencies")
+
+    async def get_quotes(self, base: str) -> dict[str, float]:
+        return await self._call("get_quotes", base)
+
+    async def convert(
+        self, currency_1: str, currency_2: str, amount: float
+    ) -> Any:
+        return await self._call("convert", currency_1, currency_2, amount)
@@ -0,0 +1,335 @@
+"""Ограничение частоты запросов (token bucket).
+
+У каждого клиента на каждый ограниченный префикс пути свое "ведро" на
+limit жетонов, которое равномерно
+пополняется за period секунд; запрос тратит один жетон. Кратковременно
+можно сделать до limit запросов подряд, в среднем - не больше limit за
+period. Лимиты задаются по префиксам путей (RATE_LIMIT.ROUTES), побеждает
+самый длинный подходящий префикс. Клиент - пользователь (по API-ключу
+или токену), для обмена и отзыва refresh-токена - сам refresh-токен, а
+для входа и регистрации - IP (за доверенными прокси RATE_LIMIT.
+TRUSTED_PROXIES - из X-Forwarded-For).
+
+Состояние ведер хранится в памяти процесса или в файле SQLite, общем
+для процессов хоста (RATE_LIMIT.BACKEND).
+"""
+
+import asyncio
+import ipaddress
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import cache
+from pathlib import Path
+from typing import Annotated, NamedTuple, Optional, Protocol, Sequence
+
+from fastapi import Depends, Request
+
+from app.api.errors.exceptions import RateLimitExceededException
+from app.api.schemas.users import RefreshTokenRequest
+from app.api.services.api_key_service import get_current_username
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from app.core.security import get_username_from_token, hash_refresh_token
+
+
+metrics.counter(
+    "rate_limited_requests_total", "Запросы, отклоненные с кодом 429."
+)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class Rate(NamedTuple):
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, text: str) -> "Rate":
+        """Лимит вида "60/minute"."""
+
+        limit, period = text.split("/")
+        return cls(int(limit), PERIODS[period])
+
+
+class RateLimitDecision(NamedTuple):
+    allowed: bool
+    rate: Rate
+    # жетонов осталось после запроса
+    remaining: int
+    # секунд до полного пополнения ведра и до следующего жетона
+    reset: float
+    retry_after: float
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.rate.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+            "RateLimit-Policy": (
+                f"{self.rate.limit};w={math.ceil(self.rate.period)}"
+            ),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(math.ceil(self.retry_after))
+        return headers
+
+
+def take_token(
+    tokens: float, elapsed: float, rate: Rate
+) -> tuple[float, RateLimitDecision]:
+    """Пополняет ведро за elapsed секунд и пытается взять из него жетон.
+
+    Возвращает новое число жетонов и решение.
+    """
+
+    refill = rate.limit / rate.period
+    tokens = min(float(rate.limit), tokens + elapsed * refill)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    decision = RateLimitDecision(
+        allowed=allowed,
+        rate=rate,
+        remaining=math.floor(tokens),
+        reset=(rate.limit - tokens) / refill,
+        retry_after=0 if allowed else (1 - tokens) / refill,
+    )
+    return tokens, decision
+
+
+class IRateLimitBackend(Protocol):
+    async def hit(self, key: str, rate: Rate) -> RateLimitDecision: ...
+
+
+class MemoryRateLimitBackend:
+    """Ведра в памяти процесса; давно не использованные вытесняются."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        # ключ -> (жетоны, время обновления по time.monotonic)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, rate: Rate) -> RateLimitDecision:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (rate.limit, now))
+        tokens, decision = take_token(tokens, now - updated_at, rate)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return decision
+
+
+class SQLiteRateLimitBackend:
+    """Ведра в файле SQLite (WAL), общие для процессов хоста.
+
+    Чтение и обновление ведра выполняются в одной транзакции BEGIN
+    IMMEDIATE, поэтому процессы не теряют жетоны друг друга. Ведро, не
+    обновлявшееся дольше самого длинного периода, полное - такие ведра
+    удаляются каждые prune_every запросов.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        busy_timeout: float = 5,
+        prune_every: int = 1000,
+    ) -> None:
+        self.path = Path(path)
+        self.busy_timeout = busy_timeout
+        self.prune_every = prune_every
+        self._hits = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, "
+                "tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS buckets_updated_at "
+                "ON buckets (updated_at)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def _hit(self, key: str, rate: Rate) -> RateLimitDecision:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = connection.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                tokens, updated_at = row or (rate.limit, now)
+                tokens, decision = take_token(
+                    tokens, max(0.0, now - updated_at), rate
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                self._hits += 1
+                if self._hits % self.prune_every == 0:
+                    connection.execute(
+                        "DELETE FROM buckets WHERE updated_at < ?",
+                        (now - max(PERIODS.values()),),
+                    )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        return decision
+
+    async def hit(self, key: str, rate: Rate) -> RateLimitDecision:
+        return await asyncio.to_thread(self._hit, key, rate)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+IPNetwork = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        routes: dict[str, str],
+        backend: IRateLimitBackend,
+        trusted_proxies: Sequence[IPNetwork] = (),
+    ) -> None:
+        # самые длинные префиксы - первыми
+        self.routes = sorted(
+            ((prefix, Rate.parse(rate)) for prefix, rate in routes.items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.backend = backend
+        self.trusted_proxies = trusted_proxies
+
+    def is_trusted(self, host: str) -> bool:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def client_ip(self, request: Request) -> str:
+        """IP клиента с учетом X-Forwarded-For от доверенных прокси.
+
+        Адреса в заголовке добавляет каждый прокси на пути запроса, поэтому
+        он читается справа налево до первого недоверенного адреса: левее
+        него значения мог подставить сам клиент.
+        """
+
+        host = request.client.host if request.client else "unknown"
+        if not self.is_trusted(host):
+            return host
+        hops = [
+            hop.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for hop in header.split(",")
+            if hop.strip()
+        ]
+        for hop in reversed(hops):
+            host = hop
+            if not self.is_trusted(hop):
+                break
+        return host
+
+    def match(self, path: str) -> Optional[tuple[str, Rate]]:
+        for prefix, rate in self.routes:
+            if path.startswith(prefix):
+                return prefix, rate
+        return None
+
+    async def check(
+        self, path: str, identity: str
+    ) -> Optional[RateLimitDecision]:
+        """Решение по запросу (None, если путь не ограничен)."""
+
+        route = self.match(path)
+        if route is None:
+            return None
+        prefix, rate = route
+        return await self.backend.hit(f"{prefix}|{identity}", rate)
+
+
+@cache
+def get_rate_limiter() -> RateLimiter:
+    rate_limit_settings = get_settings().RATE_LIMIT
+    if rate_limit_settings.BACKEND == "sqlite":
+        backend = SQLiteRateLimitBackend(rate_limit_settings.SQLITE_PATH)
+    else:
+        backend = MemoryRateLimitBackend(rate_limit_settings.MAXSIZE)
+    return RateLimiter(
+        rate_limit_settings.ROUTES,
+        backend,
+        rate_limit_settings.TRUSTED_PROXIES,
+    )
+
+
+async def enforce_rate_limit(request: Request, identity: str) -> None:
+    """Тратит жетон identity; без жетонов - RateLimitExceededException.
+
+    Решение сохраняется в request.state.rate_limit: заголовки RateLimit-*
+    добавляет к ответу RateLimitHeadersMiddleware.
+    """
+
+    decision = await get_rate_limiter().check(request.url.path, identity)
+    if decision is None:
+        return
+    request.state.rate_limit = decision
+    if not decision.allowed:
+        metrics.inc("rate_limited_requests_total")
+        raise RateLimitExceededException(
+            identity, decision.retry_after, decision.headers()
+        )
+
+
+async def limit_by_user(
+    request: Request,
+    username: Annotated[str, Depends(get_current_username)],
+) -> None:
+    await enforce_rate_limit(request, f"user:{username}")
+
+
+async def limit_by_token_user(
+    request: Request,
+    username: Annotated[str, Depends(get_username_from_token)],
+) -> None:
+    """Лимит по пользователю для маршрутов, принимающих только JWT."""
+
+    await enforce_rate_limit(request, f"user:{username}")
+
+
+async def limit_by_refresh_token(
+    request: Request, data: RefreshTokenRequest
+) -> None:
+    await enforce_rate_limit(
+        request, f"refresh:{hash_refresh_token(data.refresh_token)}"
+    )
+
+
+async def limit_by_ip(request: Request) -> None:
+    host = get_rate_limiter().client_ip(request)
+    await enforce_rate_limit(request, f"ip:{host}")
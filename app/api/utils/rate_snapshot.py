@@ -0,0 +1,206 @@
+"""Снимок курсов в двоичном файле для работы без внешнего API.
+
+Формат (little-endian): заголовок HEADER и записи RECORD фиксированной
+длины, отсортированные по паре валют. Файл отображается в память (mmap):
+при открытии читается только заголовок, курс пары находится двоичным
+поиском по записям без чтения и разбора всего файла.
+
+    заголовок: b"CXRS", версия формата, длина записи, число записей,
+               время создания снимка (Unix time)
+    запись:    код исходной валюты, код целевой валюты (ASCII, по 3
+               байта), 2 байта выравнивания, курс за единицу исходной
+               валюты и время его получения (Unix time), оба double
+    названия:  (с версии 2) после записей до конца файла - JSON-объект
+               {код: название валюты} в UTF-8
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from app.api.utils.checkpoint import atomic_write
+
+
+MAGIC = b"CXRS"
+FORMAT_VERSION = 2
+# снимки версии 1 (без названий валют) тоже читаются
+READABLE_VERSIONS = (1, 2)
+HEADER = struct.Struct("<4sHHId")
+RECORD = struct.Struct("<3s3s2xdd")
+KEY_SIZE = 6
+
+
+class SnapshotRate(NamedTuple):
+    rate: float
+    # время получения курса от внешнего API, Unix time
+    fetched_at: float
+
+
+class SnapshotFormatError(ValueError):
+    pass
+
+
+def _key(currency_1: str, currency_2: str) -> bytes:
+    key = (currency_1 + currency_2).encode("ascii")
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"Неверная пара валют: {currency_1}/{currency_2}")
+    return key
+
+
+def write_snapshot(
+    path: str | Path,
+    rates: Iterable[tuple[tuple[str, str], float, float]],
+    created_at: Optional[float] = None,
+    names: Optional[dict[str, str]] = None,
+) -> int:
+    """Записывает снимок курсов ((пара, курс, время получения), ...).
+
+    names - названия валют по кодам (список валют внешнего API).
+
+    Файл заменяется целиком (см. atomic_write): открытые снимки
+    продолжают читать старый файл. Возвращает число записанных курсов.
+    """
+
+    records = sorted(
+        (_key(*pair), rate, fetched_at) for pair, rate, fetched_at in rates
+    )
+    created_at = time.time() if created_at is None else created_at
+    names_block = json.dumps(names or {}, ensure_ascii=False).encode()
+    records_end = HEADER.size + RECORD.size * len(records)
+    buffer = bytearray(records_end + len(names_block))
+    HEADER.pack_into(
+        buffer, 0, MAGIC, FORMAT_VERSION, RECORD.size, len(records), created_at
+    )
+    for index, (key, rate, fetched_at) in enumerate(records):
+        RECORD.pack_into(
+            buffer,
+            HEADER.size + index * RECORD.size,
+            key[:3],
+            key[3:],
+            rate,
+            fetched_at,
+        )
+    buffer[records_end:] = names_block
+    atomic_write(path, buffer)
+    return len(records)
+
+
+class _Keys:
+    """Ключи записей как последовательность для bisect."""
+
+    def __init__(self, snapshot: "RateSnapshot") -> None:
+        self._snapshot = snapshot
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __getitem__(self, index: int) -> bytes:
+        offset = self._snapshot._offset(index)
+        return self._snapshot._mmap[offset : offset + KEY_SIZE]
+
+
+class RateSnapshot:
+    """Снимок курсов, отображенный в память только для чтения."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size:
+                raise SnapshotFormatError(f"Файл {self.path} слишком мал.")
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, count, created_at = HEADER.unpack_from(
+            self._mmap
+        )
+        if magic != MAGIC or version not in READABLE_VERSIONS:
+            self.close()
+            raise SnapshotFormatError(
+                f"Файл {self.path} не является снимком курсов версии "
+                f"{FORMAT_VERSION}."
+            )
+        records_end = HEADER.size + record_size * count
+        if (
+            record_size != RECORD.size
+            or size < records_end
+            or (version == 1 and size != records_end)
+        ):
+            self.close()
+            raise SnapshotFormatError(f"Снимок курсов {self.path} поврежден.")
+        self.count = count
+        self.created_at = created_at
+        self._records_end = records_end
+        self._names: Optional[dict[str, str]] = None
+        self._keys = _Keys(self)
+
+    @property
+    def names(self) -> dict[str, str]:
+        """Названия валют по кодам (пусто для снимка версии 1)."""
+
+        if self._names is None:
+            block = self._mmap[self._records_end :]
+            try:
+                self._names = json.loads(block) if block else {}
+            except ValueError as e:
+                raise SnapshotFormatError(
+                    f"Снимок курсов {self.path} поврежден."
+                ) from e
+        return self._names
+
+    def _offset(self, index: int) -> int:
+        return HEADER.size + index * RECORD.size
+
+    def _record(self, index: int) -> tuple[str, str, SnapshotRate]:
+        currency_1, currency_2, rate, fetched_at = RECORD.unpack_from(
+            self._mmap, self._offset(index)
+        )
+        return (
+            currency_1.decode("ascii"),
+            currency_2.decode("ascii"),
+            SnapshotRate(rate, fetched_at),
+        )
+
+    def get(self, currency_1: str, currency_2: str) -> Optional[SnapshotRate]:
+        try:
+            key = _key(currency_1, currency_2)
+        except (UnicodeEncodeError, ValueError):
+            return None
+        index = bisect.bisect_left(self._keys, key)
+        if index < self.count and self._keys[index] == key:
+            return self._record(index)[2]
+        return None
+
+    def quotes(self, base: str) -> dict[str, SnapshotRate]:
+        """Курсы всех валют к base (записи с base идут подряд)."""
+
+        try:
+            prefix = _key(base, "AAA")[:3]
+        except (UnicodeEncodeError, ValueError):
+            return {}
+        index = bisect.bisect_left(self._keys, prefix)
+        result = {}
+        while index < self.count and self._keys[index][:3] == prefix:
+            _, currency, rate = self._record(index)
+            result[currency] = rate
+            index += 1
+        return result
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self._record(index)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    def __enter__(self) -> "RateSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,176 @@
+"""Отозванные JWT-токены в памяти процесса.
+
+Токен отзывается по jti (выход) или целиком для пользователя: тогда
+отозваны все его токены, выданные не позже времени отзыва. Каждый запрос
+к защищенному маршруту проверяет токен, поэтому сначала проверяется
+фильтр Блума: для неотозванного токена (обычный случай) это несколько
+проверок битов без обращения к БД. Только при срабатывании фильтра
+проверяются точные множества отзывов.
+
+Отзывы хранятся в таблице revoked_tokens; процесс догружает из нее новые
+записи каждые JWT.REVOCATION_SYNC_INTERVAL секунд, свои отзывы применяет
+сразу. Порядок id не совпадает с порядком фиксации транзакций, поэтому
+загружаются записи, отозванные не раньше JWT.REVOCATION_SYNC_OVERLAP
+секунд до последней загруженной: повторно загруженные записи ничего не
+меняют.
+"""
+
+import hashlib
+import math
+from functools import cache
+from typing import NamedTuple, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+
+
+metrics.counter(
+    "token_revocation_false_positives_total",
+    "Срабатывания фильтра Блума для неотозванных токенов.",
+)
+
+
+class BloomFilter:
+    """Фильтр Блума на capacity ключей с долей ложных срабатываний
+    error_rate (при заполнении не больше capacity).
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.size = max(
+            64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> list[int]:
+        # двойное хеширование: k позиций из двух половин одного хеша
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [
+            (first + index * second) % self.size
+            for index in range(self.hashes)
+        ]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class RevocationEntry(NamedTuple):
+    id: int
+    # None - отозваны все токены пользователя, выданные до revoked_at
+    jti: Optional[str]
+    username: str
+    # Unix time
+    revoked_at: float
+    # после этого времени отозванные записью токены истекли сами
+    expires_at: float
+
+
+class RevocationList:
+    """Фильтр Блума и точные множества отзывов."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # jti -> время истечения
+        self._jtis: dict[str, float] = {}
+        # пользователь -> (отозваны токены, выданные до, время истечения)
+        self._users: dict[str, tuple[float, float]] = {}
+        # время отзыва (Unix time) последней загруженной из БД записи;
+        # свои отзывы процесса его не сдвигают
+        self.synced_until: Optional[float] = None
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        # ключей больше, чем рассчитан фильтр, - новый фильтр вдвое больше
+        while len(self._jtis) + len(self._users) > self.capacity:
+            self.capacity *= 2
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in self._jtis:
+            self._bloom.add(f"jti:{jti}")
+        for username in self._users:
+            self._bloom.add(f"user:{username}")
+
+    def __len__(self) -> int:
+        return len(self._jtis) + len(self._users)
+
+    def add(self, entry: RevocationEntry) -> bool:
+        """Добавляет отзыв; False - он уже был (ничего не изменилось)."""
+
+        if entry.jti is not None:
+            if entry.jti in self._jtis:
+                return False
+            self._jtis[entry.jti] = entry.expires_at
+            self._bloom.add(f"jti:{entry.jti}")
+        else:
+            current = self._users.get(entry.username)
+            if current is None:
+                self._bloom.add(f"user:{entry.username}")
+                current = (0.0, 0.0)
+            revoked = (
+                max(current[0], entry.revoked_at),
+                max(current[1], entry.expires_at),
+            )
+            if revoked == current:
+                return False
+            self._users[entry.username] = revoked
+        if len(self._bloom) > self.capacity:
+            self._rebuild()
+        return True
+
+    def prune(self, now: float) -> int:
+        """Удаляет истекшие отзывы; фильтр пересоздается без них."""
+
+        expired_jtis = [
+            jti for jti, expires_at in self._jtis.items() if expires_at <= now
+        ]
+        expired_users = [
+            username
+            for username, (_, expires_at) in self._users.items()
+            if expires_at <= now
+        ]
+        for jti in expired_jtis:
+            del self._jtis[jti]
+        for username in expired_users:
+            del self._users[username]
+        removed = len(expired_jtis) + len(expired_users)
+        if removed:
+            self._rebuild()
+        return removed
+
+    def is_revoked(
+        self, jti: Optional[str], username: str, issued_at: float
+    ) -> bool:
+        if jti is not None and f"jti:{jti}" in self._bloom:
+            if jti in self._jtis:
+                return True
+            metrics.inc("token_revocation_false_positives_total")
+        if f"user:{username}" in self._bloom:
+            revoked = self._users.get(username)
+            if revoked is not None and issued_at <= revoked[0]:
+                return True
+            if revoked is None:
+                metrics.inc("token_revocation_false_positives_total")
+        return False
+
+
+@cache
+def get_revocation_list() -> RevocationList:
+    jwt_settings = get_settings().JWT
+    return RevocationList(
+        jwt_settings.REVOCATION_CAPACITY, jwt_settings.REVOCATION_ERROR_RATE
+    )
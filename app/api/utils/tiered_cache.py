@@ -0,0 +1,400 @@
+"""Двухуровневый кеш: в памяти процесса (L1) и общий для процессов (L2).
+
+Несколько процессов uvicorn на одном хосте без общего кеша запрашивают
+у внешнего API одни и те же курсы каждый сам. L2 - файл SQLite в режиме
+WAL: читатели не блокируют друг друга и писателя. Запись, которой нет
+ни в одном уровне, обновляет только один процесс: он берет в L2
+"аренду" ключа на lease_seconds, остальные ждут появления записи в L2
+(или истечения аренды, если ее владелец упал). Внутри процесса
+одновременные запросы одного ключа ждут одно обновление.
+
+Попадания в L1 и L2 и промахи считаются в метриках
+<name>_cache_l1_hits_total, <name>_cache_l2_hits_total и
+<name>_cache_misses_total, доли попаданий - <name>_cache_l1_hit_ratio
+(от всех обращений) и <name>_cache_l2_hit_ratio (от промахов L1).
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Generic, Hashable, Optional, TypeVar
+
+from app.api.utils.cache import TTLCache
+from app.core.metrics import metrics
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SQLiteCache:
+    """Кеш строк в файле SQLite (WAL), общий для процессов хоста.
+
+    Время истечения записей и аренд - Unix time: оно одинаково для всех
+    процессов. При переполнении удаляются записи, истекающие раньше
+    других.
+    """
+
+    def __init__(
+        self, path: str | Path, maxsize: int, busy_timeout: float = 5
+    ) -> None:
+        self.path = Path(path)
+        self.maxsize = maxsize
+        self.busy_timeout = busy_timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        # соединение одно на процесс, запросы - из потоков asyncio.to_thread
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_expires_at "
+                "ON entries (expires_at)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, "
+                "owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def get(self, key: str) -> Optional[tuple[str, float]]:
+        """Значение и время истечения (None, если записи нет или истекла)."""
+
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT value, expires_at FROM entries "
+                    "WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                )
+                .fetchone()
+            )
+        return row
+
+    def set(self, key: str, value: str, expires_at: float) -> None:
+        self.set_many([(key, value, expires_at)])
+
+    def set_many(self, entries: list[tuple[str, str, float]]) -> None:
+        """Записывает (ключ, значение, время истечения) одной транзакцией."""
+
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", entries
+                )
+                connection.execute(
+                    "DELETE FROM entries WHERE expires_at <= ?",
+                    (time.time(),),
+                )
+                connection.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM "
+                    "entries ORDER BY expires_at LIMIT max(0, "
+                    "(SELECT count(*) FROM entries) - ?))",
+                    (self.maxsize,),
+                )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM entries WHERE key = ?", (key,)
+            )
+        return cursor.rowcount == 1
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Удаляет записи с ключом, начинающимся с prefix."""
+
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM entries WHERE substr(key, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        return cursor.rowcount
+
+    def delete_suffix(self, suffix: str) -> int:
+        """Удаляет записи с ключом, оканчивающимся на suffix."""
+
+        with self._lock:
+            cursor = self._connect().execute(
+                "DELETE FROM entries WHERE substr(key, -?) = ?",
+                (len(suffix), suffix),
+            )
+        return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return (
+                self._connect()
+                .execute(
+                    "SELECT count(*) FROM entries WHERE expires_at > ?",
+                    (time.time(),),
+                )
+                .fetchone()[0]
+            )
+
+    def acquire(self, key: str, owner: str, seconds: float) -> bool:
+        """Берет аренду ключа, если она свободна или истекла."""
+
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (key) "
+                "DO UPDATE SET owner = excluded.owner, "
+                "expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ? OR leases.owner = ?",
+                (key, owner, now + seconds, now, owner),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM entries")
+            connection.execute("DELETE FROM leases")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class TwoTierCache(Generic[K, V]):
+    """L1 (TTLCache процесса) поверх необязательного L2 (SQLiteCache).
+
+    Значения хранятся в L2 строками: dump и load преобразуют значение,
+    encode_key - ключ. Без L2 кеш работает как один L1 со счетчиками.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        l1: TTLCache[K, V],
+        l2: Optional[SQLiteCache],
+        encode_key: Callable[[K], str],
+        dump: Callable[[V], str],
+        load: Callable[[K, str], V],
+        lease_seconds: float = 10,
+        poll_interval: float = 0.05,
+    ) -> None:
+        self.name = name
+        self.l1 = l1
+        self.l2 = l2
+        self.encode_key = encode_key
+        self.dump = dump
+        self.load = load
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        # обновления ключей, выполняемые сейчас в этом процессе
+        self._refreshing: dict[K, asyncio.Task[V]] = {}
+        self._register_metrics()
+
+    def _metric(self, suffix: str) -> str:
+        return f"{self.name}_cache_{suffix}"
+
+    def _register_metrics(self) -> None:
+        l1_hits = self._metric("l1_hits_total")
+        l2_hits = self._metric("l2_hits_total")
+        misses = self._metric("misses_total")
+        metrics.counter(l1_hits, "Попадания в кеш процесса (L1).")
+        metrics.counter(l2_hits, "Попадания в общий кеш хоста (L2).")
+        metrics.counter(misses, "Промахи обоих уровней кеша.")
+        metrics.gauge(
+            self._metric("l1_hit_ratio"),
+            "Доля обращений к кешу, найденных в L1.",
+            lambda: metrics.value(l1_hits)
+            / (
+                metrics.value(l1_hits)
+                + metrics.value(l2_hits)
+                + metrics.value(misses)
+                or 1
+            ),
+        )
+        metrics.gauge(
+            self._metric("l2_hit_ratio"),
+            "Доля промахов L1, найденных в L2.",
+            lambda: metrics.value(l2_hits)
+            / (metrics.value(l2_hits) + metrics.value(misses) or 1),
+        )
+
+    async def _get_l2(self, key: K) -> Optional[V]:
+        row = await asyncio.to_thread(self.l2.get, self.encode_key(key))
+        if row is None:
+            return None
+        text, expires_at = row
+        value = self.load(key, text)
+        # в L1 запись живет столько же, сколько в L2
+        self.l1.set(key, value, expires_at - time.time())
+        return value
+
+    async def get(self, key: K) -> Optional[V]:
+        value = self.l1.get(key)
+        if value is not None:
+            metrics.inc(self._metric("l1_hits_total"))
+            return value
+        if self.l2 is not None:
+            value = await self._get_l2(key)
+            if value is not None:
+                metrics.inc(self._metric("l2_hits_total"))
+                return value
+        metrics.inc(self._metric("misses_total"))
+        return None
+
+    async def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.l1.ttl if ttl is None else ttl
+        self.l1.set(key, value, ttl)
+        if self.l2 is not None:
+            await asyncio.to_thread(
+                self.l2.set,
+                self.encode_key(key),
+                self.dump(value),
+                time.time() + ttl,
+            )
+
+    async def set_many(
+        self, items: dict[K, V], ttl: Optional[float] = None
+    ) -> None:
+        """Записывает несколько значений; в L2 - одной транзакцией."""
+
+        ttl = self.l1.ttl if ttl is None else ttl
+        for key, value in items.items():
+            self.l1.set(key, value, ttl)
+        if self.l2 is not None:
+            expires_at = time.time() + ttl
+            await asyncio.to_thread(
+                self.l2.set_many,
+                [
+                    (self.encode_key(key), self.dump(value), expires_at)
+                    for key, value in items.items()
+                ],
+            )
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Удаляет из обоих уровней записи с ключом, начинающимся с prefix.
+
+        Ключ сравнивается в виде encode_key. Возвращает большее из чисел
+        удаленных записей L1 и L2.
+        """
+
+        keys = [
+            key for key in self.l1 if self.encode_key(key).startswith(prefix)
+        ]
+        for key in keys:
+            self.l1.delete(key)
+        deleted = 0
+        if self.l2 is not None:
+            deleted = await asyncio.to_thread(self.l2.delete_prefix, prefix)
+        return max(len(keys), deleted)
+
+    async def delete_suffix(self, suffix: str) -> int:
+        """Удаляет из обоих уровней записи с ключом, оканчивающимся на suffix.
+
+        Ключ сравнивается в виде encode_key, как в delete_prefix.
+        """
+
+        keys = [
+            key for key in self.l1 if self.encode_key(key).endswith(suffix)
+        ]
+        for key in keys:
+            self.l1.delete(key)
+        deleted = 0
+        if self.l2 is not None:
+            deleted = await asyncio.to_thread(self.l2.delete_suffix, suffix)
+        return max(len(keys), deleted)
+
+    async def delete(self, key: K) -> bool:
+        """Удаляет запись из обоих уровней."""
+
+        deleted = key in self.l1
+        self.l1.delete(key)
+        if self.l2 is not None:
+            deleted = (
+                await asyncio.to_thread(self.l2.delete, self.encode_key(key))
+                or deleted
+            )
+        return deleted
+
+    async def refresh(self, key: K, fetch: Callable[[], Awaitable[V]]) -> V:
+        """Получает отсутствующую в кеше запись через fetch() и кеширует.
+
+        Одновременные вызовы для ключа в процессе ждут одно обновление:
+        fetch() первого из них. Отмена одного вызова не отменяет
+        обновление для остальных.
+        """
+
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key, fetch))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _refresh(self, key: K, fetch: Callable[[], Awaitable[V]]) -> V:
+        """Обновление ключа, согласованное между процессами через L2.
+
+        fetch() для ключа выполняет один процесс хоста - владелец аренды;
+        остальные получают его результат из L2. Если владелец не записал
+        значение (ошибка или падение), аренду берет следующий. Ожидание
+        ограничено lease_seconds: если аренду все это время держат
+        другие, процесс выполняет fetch() сам.
+        """
+
+        if self.l2 is not None:
+            lease_key = self.encode_key(key)
+            # у каждого обновления свой владелец: аренда не переходит
+            # к другому обновлению того же процесса
+            owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+            deadline = time.monotonic() + self.lease_seconds
+            while time.monotonic() < deadline:
+                acquired = await asyncio.to_thread(
+                    self.l2.acquire, lease_key, owner, self.lease_seconds
+                )
+                if acquired:
+                    try:
+                        # значение могло появиться, пока аренду держал другой
+                        value = await self._get_l2(key)
+                        if value is None:
+                            value = await fetch()
+                            await self.set(key, value)
+                        return value
+                    finally:
+                        await asyncio.to_thread(
+                            self.l2.release, lease_key, owner
+                        )
+                await asyncio.sleep(self.poll_interval)
+                value = await self._get_l2(key)
+                if value is not None:
+                    return value
+        value = await fetch()
+        await self.set(key, value)
+        return value
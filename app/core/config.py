@@ -1,34 +1,194 @@
-from pydantic import BaseModel
+from functools import cache
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, IPvAnyNetwork, StringConstraints
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class AppSettings(BaseModel):
     HOST: str
     PORT: int
+    # максимальная длительность прогрева при старте, секунды
+    WARMUP_TIMEOUT: float = 30
+    # время на завершение запросов в обработке при остановке, секунды
+    SHUTDOWN_TIMEOUT: float = 20
+    # пользователи с доступом к маршрутам /admin
+    ADMIN_USERNAMES: list[str] = ["admin"]
+    # проверки для /health/ready выполняются в фоне каждые
+    # HEALTH_CHECK_INTERVAL секунд (запрос к БД - не дольше
+    # HEALTH_CHECK_TIMEOUT), задержка цикла событий замеряется каждые
+    # LOOP_LAG_INTERVAL секунд
+    HEALTH_CHECK_INTERVAL: float = 5
+    HEALTH_CHECK_TIMEOUT: float = 2
+    LOOP_LAG_INTERVAL: float = 0.5
 
 
 class JWTSettings(BaseModel):
     SECRET_KEY: str
     ALGORITHM: str
     EXPIRES_MINUTES: int
+    REFRESH_EXPIRES_DAYS: int = 30
+    # секрет HMAC для хешей API-ключей; пустая строка - SECRET_KEY
+    API_KEY_SECRET: str = ""
+    # отзывы токенов загружаются из БД каждые REVOCATION_SYNC_INTERVAL
+    # секунд; фильтр Блума рассчитан на REVOCATION_CAPACITY отзывов с
+    # долей ложных срабатываний REVOCATION_ERROR_RATE (при переполнении
+    # пересоздается вдвое больше)
+    REVOCATION_SYNC_INTERVAL: float = 5
+    # каждая загрузка повторно читает отзывы за REVOCATION_SYNC_OVERLAP
+    # секунд до последнего загруженного: транзакции фиксируются не в
+    # порядке id, а часы серверов расходятся
+    REVOCATION_SYNC_OVERLAP: float = 60
+    REVOCATION_CAPACITY: int = 100000
+    REVOCATION_ERROR_RATE: float = 0.001
+
+
+class PasswordSettings(BaseModel):
+    # первая схема используется для новых хешей, остальные только
+    # проверяются и перехешируются при успешном входе
+    SCHEMES: list[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+
+class CacheSettings(BaseModel):
+    CREDENTIALS_MAXSIZE: int = 10000
+    CREDENTIALS_TTL: int = 300
+    CREDENTIALS_NEGATIVE_TTL: int = 30
+    API_KEYS_MAXSIZE: int = 10000
+    # отозванный ключ принимается другими процессами, пока не истечет
+    # их запись кеша, - не дольше, чем отозванный JWT
+    # (JWT.REVOCATION_SYNC_INTERVAL)
+    API_KEYS_TTL: int = 5
+
+
+class CompressionSettings(BaseModel):
+    # динамические ответы меньше этого размера (байт) не сжимаются
+    MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    # статика и кешированные ответы сжимаются один раз, с максимальным уровнем
+    PRECOMPRESS_GZIP_LEVEL: int = 9
+    PRECOMPRESS_BROTLI_QUALITY: int = 11
+
+
+class RateLimitSettings(BaseModel):
+    # лимиты вида "60/minute" (second, minute, hour, day) по префиксам
+    # путей, побеждает самый длинный префикс; запросы к /currency и
+    # маршрутам /auth с токеном считаются по пользователю, к
+    # /auth/refresh/ и /auth/logout/ - по refresh-токену, к /auth/login/
+    # и /auth/register/ - по IP клиента
+    ROUTES: dict[
+        str,
+        Annotated[
+            str, StringConstraints(pattern=r"^\d+/(second|minute|hour|day)$")
+        ],
+    ] = {
+        "/currency/exchange/": "60/minute",
+        "/currency/": "120/minute",
+        "/auth/login/": "10/minute",
+        "/auth/register/": "10/minute",
+        "/auth/": "60/minute",
+    }
+    # адреса и сети доверенных обратных прокси: у запросов от них IP
+    # клиента берется из X-Forwarded-For (последний недоверенный адрес)
+    TRUSTED_PROXIES: list[IPvAnyNetwork] = []
+    # memory - счетчики в каждом процессе свои, sqlite - общие для
+    # процессов хоста (в файле SQLITE_PATH)
+    BACKEND: Literal["memory", "sqlite"] = "memory"
+    SQLITE_PATH: str = "./data/rate_limit.db"
+    # сколько клиентов помнит memory
+    MAXSIZE: int = 100000
 
 
 class CurrencySettings(BaseModel):
     API_KEY: str
     URL_LIST: str
     URL_EXCHANGE: str
+    URL_LIVE: str = "https://api.apilayer.com/currency_data/live?source={base}"
+    # поставщики курсов в порядке предпочтения: apilayer, file -
+    # локальный снимок курсов ЕЦБ (XML или CSV) из FILE_PATH, snapshot -
+    # двоичный снимок курсов приложения из SNAPSHOT_PATH (см.
+    # python -m app.core.snapshot); ["snapshot"] - работа без внешнего API.
+    # file и snapshot - запасные: опрашиваются только после внешних
+    PROVIDERS: list[Literal["apilayer", "file", "snapshot"]] = ["apilayer"]
+    FILE_PATH: str = "./data/eurofxref-daily.xml"
+    SNAPSHOT_PATH: str = "./data/rates.snapshot"
+    # на сколько секунд неисправный поставщик опрашивается последним
+    PROVIDER_EJECT_SECONDS: float = 30
+    # convert - курс пары запрашивается отдельно, quotes - курсы всех
+    # валют к исходной загружаются одним запросом
+    FETCH_MODE: Literal["convert", "quotes"] = "convert"
+    # время жизни кешированных ответов внешнего API, секунды
+    LIST_TTL: int = 3600
+    RATES_TTL: int = 60
+    RATES_MAXSIZE: int = 1000
+    # файл, в который кеш курсов и списка валют сохраняется каждые
+    # CHECKPOINT_INTERVAL секунд и при остановке и из которого он
+    # загружается при старте; пустая строка - не сохранять
+    CHECKPOINT_PATH: str = ""
+    CHECKPOINT_INTERVAL: float = 60
+    # общий для процессов хоста кеш (L2) в файле SQLite: курс, которого
+    # нет в кеше, у внешнего API запрашивает только один процесс, а
+    # остальные до SHARED_CACHE_LEASE_SECONDS секунд ждут его результат;
+    # пустая строка - у каждого процесса только свой кеш
+    SHARED_CACHE_PATH: str = ""
+    SHARED_CACHE_MAXSIZE: int = 10000
+    SHARED_CACHE_LEASE_SECONDS: float = 10
+    # наибольшее число курсов в цепочке кросс-курса: 1 - только прямой
+    # и обратный курс пары, 2 - через одну промежуточную валюту и т.д.
+    CROSS_RATE_MAX_HOPS: int = 2
+    # Cache-Control ответов конвертации: private - только кеш клиента,
+    # public - еще и общие кеши (CDN), если они сами проверяют авторизацию
+    EXCHANGE_CACHE_SCOPE: Literal["private", "public"] = "private"
+    # хеджирование запросов к внешнему API: второй запрос отправляется,
+    # если ответа нет дольше HEDGE_PERCENTILE-го перцентиля времени
+    # ответа (HEDGE_INITIAL_DELAY секунд, пока замеров мало); доля
+    # дополнительных запросов не больше HEDGE_MAX_RATIO, 0 - отключено
+    HEDGE_PERCENTILE: float = 95
+    HEDGE_INITIAL_DELAY: float = 1
+    HEDGE_MAX_RATIO: float = 0.05
+    # пары валют вида "USD/EUR", курсы которых загружаются при старте
+    WARMUP_PAIRS: list[str] = []
+    # точный режим конвертации: округление результата до минимальных
+    # единиц валюты и количество знаков курса после запятой
+    EXACT_ROUNDING: Literal[
+        "ROUND_HALF_EVEN", "ROUND_HALF_UP", "ROUND_DOWN", "ROUND_UP"
+    ] = "ROUND_HALF_EVEN"
+    EXACT_RATE_DIGITS: int = 10
 
 
 class DatabaseSettings(BaseModel):
     URL: str
     URL_SYNC: str
+    # реплики только для чтения (например, PostgreSQL streaming replicas)
+    REPLICA_URLS: list[str] = []
+    REPLICA_EJECT_SECONDS: int = 30
+    REPLICA_STICKY_SECONDS: int = 10
+    ECHO: bool = True
+    # пул соединений и кеши подготовленных выражений (для PostgreSQL)
+    POOL_SIZE: int = 10
+    MAX_OVERFLOW: int = 10
+    POOL_RECYCLE: int = 1800
+    # кеш prepared statements на стороне asyncpg (0 - отключить,
+    # нужно при pgbouncer в режиме transaction)
+    STATEMENT_CACHE_SIZE: int = 100
+    # кеш подготовленных выражений в драйвере SQLAlchemy для asyncpg
+    PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    # сколько соединений пула открыть при старте приложения
+    WARMUP_CONNECTIONS: int = 4
 
 
 class Settings(BaseSettings):
     APP: AppSettings
     JWT: JWTSettings
+    PASSWORD: PasswordSettings = PasswordSettings()
     CURRENCY: CurrencySettings
     DATABASE: DatabaseSettings
+    CACHE: CacheSettings = CacheSettings()
+    COMPRESSION: CompressionSettings = CompressionSettings()
+    RATE_LIMIT: RateLimitSettings = RateLimitSettings()
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -36,4 +196,15 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()
+@cache
+def get_settings() -> Settings:
+    """Настройки приложения, читаются из окружения при первом обращении."""
+
+    return Settings()
+
+
+def __getattr__(name: str):
+    # from app.core.config import settings - для обратной совместимости
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,131 @@
+"""Состояние приложения для проверки готовности (GET /health/ready).
+
+Проверки выполняются в фоне каждые APP.HEALTH_CHECK_INTERVAL секунд, а
+/health/ready отдает последний результат: частые проверки оркестратора
+не создают запросов к БД и внешнему API. Задержка цикла событий
+замеряется чаще (APP.LOOP_LAG_INTERVAL), в отчет попадает наибольшая за
+период между проверками.
+"""
+
+import asyncio
+import datetime
+import time
+from typing import Any, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.api.db.database import get_engine
+from app.api.utils.external_api import (
+    get_currencies_cache,
+    get_rate_provider,
+    get_rates_cache,
+    get_shared_cache,
+)
+
+
+def pool_status(engine: AsyncEngine) -> dict[str, Any]:
+    """Соединения пула: размер, свободные, выданные и сверх размера."""
+
+    pool = engine.pool
+    status: dict[str, Any] = {"class": type(pool).__name__}
+    # у StaticPool и NullPool счетчиков нет
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    return status
+
+
+class HealthMonitor:
+    def __init__(self) -> None:
+        # последний отчет проверок (пустой до первой проверки)
+        self.report: dict[str, Any] = {}
+        self._max_loop_lag = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        """Нет ошибок критичных проверок (БД) в последнем отчете."""
+
+        return self.report.get("database", {}).get("status") != "error"
+
+    async def measure_loop_lag(self, interval: float) -> None:
+        """Замеряет, насколько позже срока просыпается sleep(interval)."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            lag = loop.time() - start - interval
+            self._max_loop_lag = max(self._max_loop_lag, lag)
+
+    async def check_database(self, timeout: float) -> dict[str, Any]:
+        engine = get_engine()
+        status: dict[str, Any] = {"pool": pool_status(engine)}
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            status.update(status="error", error=f"{type(e).__name__}: {e}")
+        else:
+            status.update(
+                status="ok", latency_ms=(time.monotonic() - start) * 1000
+            )
+        return status
+
+    def check_upstream(self) -> dict[str, Any]:
+        provider = get_rate_provider()
+        last_success: Optional[float] = provider.last_success
+        return {
+            "provider": provider.last_success_provider,
+            # секунд с последнего успешного ответа поставщика курсов
+            "last_success_age": (
+                None
+                if last_success is None
+                else time.monotonic() - last_success
+            ),
+        }
+
+    async def check_caches(self) -> dict[str, Any]:
+        # просроченные записи удаляются только при обращении к ним
+        caches: dict[str, Any] = {
+            "rates": len(get_rates_cache().snapshot()),
+            "currencies": len(get_currencies_cache().snapshot()),
+        }
+        shared_cache = get_shared_cache()
+        if shared_cache is not None:
+            caches["shared"] = await asyncio.to_thread(shared_cache.count)
+        return caches
+
+    async def check(self, timeout: float) -> dict[str, Any]:
+        loop_lag, self._max_loop_lag = self._max_loop_lag, 0.0
+        self.report = {
+            "checked_at": datetime.datetime.now(datetime.UTC).isoformat(
+                timespec="seconds"
+            ),
+            "database": await self.check_database(timeout),
+            "upstream": self.check_upstream(),
+            "caches": await self.check_caches(),
+            "event_loop_lag_ms": loop_lag * 1000,
+        }
+        return self.report
+
+    async def run(
+        self, interval: float, timeout: float, loop_lag_interval: float
+    ) -> None:
+        """Выполняет проверки сразу и затем каждые interval секунд."""
+
+        lag_task = asyncio.create_task(
+            self.measure_loop_lag(loop_lag_interval)
+        )
+        try:
+            while True:
+                await self.check(timeout)
+                await asyncio.sleep(interval)
+        finally:
+            lag_task.cancel()
+
+
+health_monitor = HealthMonitor()
@@ -0,0 +1,294 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.api.db.database import (
+    dispose_engines,
+    get_engine,
+    get_replica_router,
+)
+from app.api.db.UoW import UserUnitOfWork
+from app.api.errors.logger import logger, setup_logger
+from app.api.middleware import in_flight
+from app.api.schemas.currency import CurrencyRequest
+from app.api.services.user_service import UserService
+from app.api.utils.external_api import (
+    cancel_upstream_requests,
+    close_http_client,
+    close_shared_cache,
+    ext_api_get_currencies_payload,
+    ext_api_get_exchange,
+    get_currencies_cache,
+    get_rates_cache,
+    load_cache_checkpoint,
+    save_cache_checkpoint,
+)
+from app.core.config import get_settings
+from app.core.health import health_monitor
+from app.core.security import get_password_hash
+
+
+class Readiness:
+    """Состояние готовности приложения принимать трафик."""
+
+    def __init__(self) -> None:
+        self.ready = False
+
+
+readiness = Readiness()
+
+# время на отправку ответов после отмены запросов к внешнему API, секунды
+UPSTREAM_CANCEL_GRACE = 2
+
+_drain_task: Optional[asyncio.Task] = None
+_checkpoint_task: Optional[asyncio.Task] = None
+_revocations_task: Optional[asyncio.Task] = None
+_health_task: Optional[asyncio.Task] = None
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int) -> None:
+    """Открывает одновременно несколько соединений пула.
+
+    Соединения удерживаются до тех пор, пока не будут открыты все,
+    поэтому пул создает их, а не переиспользует одно и то же.
+    """
+
+    async def checkout():
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    results = await asyncio.gather(
+        *(checkout() for _ in range(connections)), return_exceptions=True
+    )
+    await asyncio.gather(
+        *(conn.close() for conn in results if not isinstance(conn, Exception))
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+
+async def warm_up_database() -> None:
+    engines = [get_engine()] + [
+        maker.kw["bind"] for maker in get_replica_router().replicas
+    ]
+    connections = get_settings().DATABASE.WARMUP_CONNECTIONS
+    await asyncio.gather(
+        *(warm_up_engine(engine, connections) for engine in engines)
+    )
+
+
+async def warm_up_upstream() -> None:
+    """Загружает в кеш список валют и курсы популярных пар.
+
+    Запросы идут параллельно через общий HTTP-клиент, поэтому заодно
+    устанавливаются соединения с внешним API.
+    """
+
+    requests = [
+        CurrencyRequest(currency_1=first, currency_2=second)
+        for first, second in (
+            pair.upper().split("/")
+            for pair in get_settings().CURRENCY.WARMUP_PAIRS
+        )
+    ]
+    await asyncio.gather(
+        ext_api_get_currencies_payload(),
+        *(ext_api_get_exchange(request) for request in requests),
+    )
+
+
+def load_checkpoint() -> None:
+    """Загружает кеш, сохраненный до перезапуска (CURRENCY.CHECKPOINT_PATH).
+
+    Загруженные записи истекают в то же время, что и до перезапуска, и
+    прогрев не запрашивает их у внешнего API повторно.
+    """
+
+    path = get_settings().CURRENCY.CHECKPOINT_PATH
+    if not path:
+        return
+    try:
+        loaded = load_cache_checkpoint(path)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logger.warning(
+            f"Сохраненный кеш не загружен из {path}. "
+            f"{type(e).__name__}: {e}"
+        )
+        return
+    logger.info(f"Из сохраненного кеша загружено курсов: {loaded}.")
+
+
+def save_checkpoint() -> None:
+    path = get_settings().CURRENCY.CHECKPOINT_PATH
+    if not path:
+        return
+    try:
+        save_cache_checkpoint(path)
+    except OSError as e:
+        logger.warning(f"Кеш не сохранен в {path}. {type(e).__name__}: {e}")
+
+
+async def save_checkpoint_periodically(interval: float) -> None:
+    """Сохраняет кеш каждые interval секунд, если он изменился."""
+
+    saved_versions = None
+    while True:
+        await asyncio.sleep(interval)
+        versions = (get_rates_cache().version, get_currencies_cache().version)
+        if versions != saved_versions:
+            save_checkpoint()
+            saved_versions = versions
+
+
+async def sync_token_revocations() -> int:
+    service = UserService(UserUnitOfWork())
+    return await service.sync_revocations()
+
+
+async def sync_token_revocations_periodically(interval: float) -> None:
+    """Загружает отзывы токенов из других процессов каждые interval секунд."""
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sync_token_revocations()
+        except Exception as e:
+            logger.warning(
+                f"Отзывы токенов не загружены из БД. "
+                f"{type(e).__name__}: {e}"
+            )
+
+
+async def warm_up_password_hashing() -> None:
+    # первый вызов загружает бэкенд хеширования
+    await asyncio.to_thread(get_password_hash, "warm-up")
+
+
+async def warm_up() -> None:
+    """Прогрев приложения после старта.
+
+    Шаги выполняются параллельно. Ошибка шага только логгируется: после
+    завершения прогрева (или по таймауту) приложение считается готовым,
+    иначе недоступность внешнего API не давала бы ему принимать трафик.
+    """
+
+    steps = {
+        "database": warm_up_database(),
+        "upstream": warm_up_upstream(),
+        "password_hashing": warm_up_password_hashing(),
+        "token_revocations": sync_token_revocations(),
+    }
+    try:
+        async with asyncio.timeout(get_settings().APP.WARMUP_TIMEOUT):
+            results = await asyncio.gather(
+                *steps.values(), return_exceptions=True
+            )
+    except TimeoutError:
+        logger.warning("Прогрев приложения прерван по таймауту.")
+    else:
+        for name, result in zip(steps, results):
+            if isinstance(result, Exception):
+                logger.warning(
+                    f"Шаг прогрева '{name}' завершился ошибкой "
+                    f"{type(result).__name__}: {result}"
+                )
+    readiness.ready = not in_flight.draining
+    logger.info("Прогрев приложения завершен.")
+
+
+async def drain(timeout: float) -> None:
+    """Дожидается завершения запросов в обработке.
+
+    Если за timeout секунд они не завершились, ожидающие запросы к
+    внешнему API отменяются: клиенты получают 503, а не обрыв соединения.
+    """
+
+    if await in_flight.wait_idle(timeout):
+        return
+    cancelled = cancel_upstream_requests()
+    logger.warning(
+        f"За {timeout} с не завершено запросов: {in_flight.count}, "
+        f"отменено запросов к внешнему API: {cancelled}."
+    )
+    await in_flight.wait_idle(UPSTREAM_CANCEL_GRACE)
+
+
+def start_draining() -> None:
+    """Переводит приложение в режим остановки.
+
+    Проверка готовности начинает отвечать 503, новые запросы отклоняются,
+    запросам в обработке дается APP.SHUTDOWN_TIMEOUT секунд. Вызывается
+    по сигналу остановки (см. app.core.server) или при lifespan shutdown.
+    """
+
+    global _drain_task
+    if _drain_task is not None:
+        return
+    logger.info("Остановка приложения: новые запросы не принимаются.")
+    in_flight.draining = True
+    readiness.ready = False
+    _drain_task = asyncio.create_task(
+        drain(get_settings().APP.SHUTDOWN_TIMEOUT)
+    )
+
+
+async def shutdown() -> None:
+    start_draining()
+    await _drain_task
+    save_checkpoint()
+    await close_http_client()
+    close_shared_cache()
+    await dispose_engines()
+    for handler in logger.handlers:
+        handler.flush()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _drain_task, _checkpoint_task, _revocations_task, _health_task
+    setup_logger()
+    readiness.ready = False
+    in_flight.draining = False
+    _drain_task = None
+    load_checkpoint()
+    warm_up_task = asyncio.create_task(warm_up())
+    if get_settings().CURRENCY.CHECKPOINT_PATH:
+        _checkpoint_task = asyncio.create_task(
+            save_checkpoint_periodically(
+                get_settings().CURRENCY.CHECKPOINT_INTERVAL
+            )
+        )
+    _revocations_task = asyncio.create_task(
+        sync_token_revocations_periodically(
+            get_settings().JWT.REVOCATION_SYNC_INTERVAL
+        )
+    )
+    app_settings = get_settings().APP
+    _health_task = asyncio.create_task(
+        health_monitor.run(
+            app_settings.HEALTH_CHECK_INTERVAL,
+            app_settings.HEALTH_CHECK_TIMEOUT,
+            app_settings.LOOP_LAG_INTERVAL,
+        )
+    )
+    yield
+    for task in (
+        warm_up_task,
+        _checkpoint_task,
+        _revocations_task,
+        _health_task,
+    ):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    _checkpoint_task = _revocations_task = _health_task = None
+    await shutdown()
@@ -0,0 +1,61 @@
+"""Метрики приложения в текстовом формате Prometheus (GET /metrics)."""
+
+from typing import Callable
+
+
+def format_value(value: float) -> str:
+    """Значение без потери точности: целые - полностью, дробные - repr.
+
+    Формат :g округлял бы счетчики больше 10^6 (1234567 -> 1.23457e+06),
+    и rate()/increase() в Prometheus считались бы неверно.
+    """
+
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Metrics:
+    """Реестр счетчиков и вычисляемых показателей (gauge)."""
+
+    def __init__(self) -> None:
+        self._help: dict[str, str] = {}
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+        self._counters.setdefault(name, 0)
+
+    def gauge(
+        self, name: str, help_text: str, func: Callable[[], float]
+    ) -> None:
+        self._help[name] = help_text
+        self._gauges[name] = func
+
+    def inc(self, name: str, value: float = 1) -> None:
+        self._counters[name] += value
+
+    def value(self, name: str) -> float:
+        if name in self._gauges:
+            return self._gauges[name]()
+        return self._counters[name]
+
+    def reset(self) -> None:
+        for name in self._counters:
+            self._counters[name] = 0
+
+    def render(self) -> str:
+        lines = []
+        for kind, names in (
+            ("counter", self._counters),
+            ("gauge", self._gauges),
+        ):
+            for name in names:
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {format_value(self.value(name))}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -1,47 +1,193 @@
 import datetime
-from typing import Annotated
+import hashlib
+import hmac
+import secrets
+from functools import cache
+from typing import TYPE_CHECKING, Annotated, Optional
 
 import jwt
 from fastapi import Depends
-from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 
-from app.api.errors.exceptions import InvalidTokenException
-from app.core.config import settings
+from app.api.errors.exceptions import (
+    ForbiddenException,
+    InvalidTokenException,
+)
+from app.api.utils.revocation import get_revocation_list
+from app.core.config import PasswordSettings, get_settings
+
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+def make_pwd_context(password_settings: PasswordSettings) -> "CryptContext":
+    """Создает CryptContext по настройкам политики хеширования паролей.
+
+    Стоимость хеширования фиксируется точно (min = max = default), поэтому
+    хеши с другой стоимостью или устаревшей схемой требуют перехеширования.
+    """
+
+    from passlib.context import CryptContext
+
+    schemes = password_settings.SCHEMES
+    options = {}
+    if "bcrypt" in schemes:
+        rounds = password_settings.BCRYPT_ROUNDS
+        options.update(
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+    if "argon2" in schemes:
+        options.update(
+            argon2__time_cost=password_settings.ARGON2_TIME_COST,
+            argon2__memory_cost=password_settings.ARGON2_MEMORY_COST,
+            argon2__parallelism=password_settings.ARGON2_PARALLELISM,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-pwd_context = CryptContext(schemes="bcrypt")
+# для маршрутов, принимающих JWT или API-ключ
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="auth/login", auto_error=False
+)
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+API_KEY_PREFIX = "cx"
+
+
+@cache
+def get_pwd_context() -> "CryptContext":
+    return make_pwd_context(get_settings().PASSWORD)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    return get_pwd_context().verify(password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return get_pwd_context().needs_update(hashed_password)
 
 
 def create_jwt_token(data: dict) -> str:
+    jwt_settings = get_settings().JWT
     to_encode = data.copy()
-    expire = datetime.datetime.now(datetime.UTC) + datetime.timedelta(
-        minutes=settings.JWT.EXPIRES_MINUTES
+    now = datetime.datetime.now(datetime.UTC)
+    expire = now + datetime.timedelta(minutes=jwt_settings.EXPIRES_MINUTES)
+    # jti - идентификатор для отзыва токена, iat с долями секунды -
+    # для отзыва всех токенов пользователя, выданных до момента отзыва
+    to_encode.update(
+        {"exp": expire, "iat": now.timestamp(), "jti": secrets.token_hex(16)}
     )
-    to_encode.update({"exp": expire})
     return jwt.encode(
-        to_encode, settings.JWT.SECRET_KEY, algorithm=settings.JWT.ALGORITHM
+        to_encode, jwt_settings.SECRET_KEY, algorithm=jwt_settings.ALGORITHM
     )
 
 
-def get_username_from_token(
-    token: Annotated[str, Depends(oauth2_scheme)]
-) -> str:
+def create_refresh_token() -> tuple[str, str]:
+    """Создает непрозрачный refresh-токен.
+
+    Возвращает сам токен (отдается клиенту) и его SHA-256 хеш
+    (хранится в БД).
+    """
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_api_key() -> tuple[str, str, str]:
+    """Создает API-ключ вида cx_<prefix>_<secret>.
+
+    Возвращает сам ключ (отдается клиенту один раз), его открытый
+    prefix (по нему ключ ищется в БД) и HMAC-SHA256 ключа (хранится в БД).
+    """
+
+    prefix = secrets.token_hex(6)
+    key = f"{API_KEY_PREFIX}_{prefix}_{secrets.token_urlsafe(32)}"
+    return key, prefix, hash_api_key(key)
+
+
+def hash_api_key(key: str) -> str:
+    # у ключа 256 бит энтропии, медленный хеш (bcrypt) не нужен, а
+    # секрет HMAC не дает проверять ключи по украденной таблице
+    jwt_settings = get_settings().JWT
+    secret = jwt_settings.API_KEY_SECRET or jwt_settings.SECRET_KEY
+    return hmac.new(secret.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+
+def get_api_key_prefix(key: str) -> Optional[str]:
+    """Открытая часть ключа (None, если ключ не в формате create_api_key)."""
+
+    parts = key.split("_", 2)
+    if len(parts) != 3 or parts[0] != API_KEY_PREFIX or len(parts[1]) != 12:
+        return None
+    return parts[1]
+
+
+def get_refresh_token_expiry() -> datetime.datetime:
+    return datetime.datetime.now(datetime.UTC) + datetime.timedelta(
+        days=get_settings().JWT.REFRESH_EXPIRES_DAYS
+    )
+
+
+def decode_jwt_token(token: str) -> dict:
+    """Проверяет подпись, срок действия и отзыв токена."""
+
+    jwt_settings = get_settings().JWT
     try:
         payload = jwt.decode(
-            token, settings.JWT.SECRET_KEY, algorithms=[settings.JWT.ALGORITHM]
+            token, jwt_settings.SECRET_KEY, algorithms=[jwt_settings.ALGORITHM]
         )
-        return payload.get("sub")
     except jwt.ExpiredSignatureError as e:
         raise InvalidTokenException(detail="Токен устарел") from e
     except jwt.InvalidTokenError as e:
         raise InvalidTokenException(detail="Ошибка чтения токена") from e
+    # проверка в памяти процесса, без запроса к БД
+    if get_revocation_list().is_revoked(
+        payload.get("jti"), payload.get("sub"), payload.get("iat", 0)
+    ):
+        raise InvalidTokenException(detail="Токен отозван")
+    return payload
+
+
+def read_jwt_token(token: str) -> Optional[dict]:
+    """Данные токена с верной подписью, без проверки срока и отзыва.
+
+    None - токен не читается или подписан другим ключом.
+    """
+
+    jwt_settings = get_settings().JWT
+    try:
+        return jwt.decode(
+            token,
+            jwt_settings.SECRET_KEY,
+            algorithms=[jwt_settings.ALGORITHM],
+            options={"verify_exp": False},
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+
+def get_username_from_token(
+    token: Annotated[str, Depends(oauth2_scheme)]
+) -> str:
+    return decode_jwt_token(token).get("sub")
+
+
+def get_admin_username(
+    username: Annotated[str, Depends(get_username_from_token)]
+) -> str:
+    """Имя пользователя из токена, если он в APP.ADMIN_USERNAMES."""
+
+    if username not in get_settings().APP.ADMIN_USERNAMES:
+        raise ForbiddenException(username)
+    return username
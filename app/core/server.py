@@ -0,0 +1,49 @@
+import asyncio
+import math
+import socket
+from types import FrameType
+from typing import Optional
+
+import uvicorn
+
+from app.api.errors.logger import setup_logger
+from app.core.config import get_settings
+from app.core.lifespan import UPSTREAM_CANCEL_GRACE, start_draining
+
+
+class GracefulServer(uvicorn.Server):
+    """uvicorn.Server, сообщающий приложению о начале остановки.
+
+    uvicorn вызывает lifespan shutdown только после закрытия всех
+    соединений, поэтому о сигнале остановки приложение узнает отсюда:
+    сразу перестает считаться готовым и начинает отсчет времени на
+    завершение запросов (см. app.core.lifespan.start_draining).
+    """
+
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def serve(self, sockets: Optional[list[socket.socket]] = None):
+        self._loop = asyncio.get_running_loop()
+        await super().serve(sockets)
+
+    def handle_exit(self, sig: int, frame: Optional[FrameType]) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(start_draining)
+        super().handle_exit(sig, frame)
+
+
+def run() -> None:
+    # сообщения до запуска lifespan (и при его ошибке) тоже выводятся
+    setup_logger()
+    settings = get_settings()
+    config = uvicorn.Config(
+        "main:app",
+        host=settings.APP.HOST,
+        port=settings.APP.PORT,
+        # после этого uvicorn отменяет оставшиеся запросы без ответа,
+        # поэтому он ждет дольше, чем приложение
+        timeout_graceful_shutdown=math.ceil(
+            settings.APP.SHUTDOWN_TIMEOUT + UPSTREAM_CANCEL_GRACE
+        ),
+    )
+    GracefulServer(config).run()
@@ -0,0 +1,87 @@
+"""Выгрузка и просмотр двоичного снимка курсов.
+
+Курсы загружаются в кеш приложения (курсы всех валют к каждой из
+базовых валют и пары CURRENCY.WARMUP_PAIRS) через настроенных
+поставщиков и выгружаются в CURRENCY.SNAPSHOT_PATH вместе с названиями
+валют:
+    python -m app.core.snapshot export --base USD --base EUR
+
+Содержимое снимка:
+    python -m app.core.snapshot info
+"""
+
+import argparse
+import asyncio
+import datetime
+
+from app.api.errors.logger import setup_logger
+from app.api.schemas.currency import CurrencyRequest
+from app.api.utils.external_api import (
+    close_http_client,
+    export_rate_snapshot,
+    ext_api_get_currencies,
+    ext_api_get_exchange,
+    ext_api_load_quotes,
+)
+from app.api.utils.rate_snapshot import RateSnapshot
+from app.core.config import get_settings
+
+
+async def export(bases: list[str], path: str) -> int:
+    try:
+        await ext_api_get_currencies()
+        for base in bases:
+            await ext_api_load_quotes(base)
+        for pair in get_settings().CURRENCY.WARMUP_PAIRS:
+            first, second = pair.upper().split("/")
+            await ext_api_get_exchange(
+                CurrencyRequest(currency_1=first, currency_2=second)
+            )
+    finally:
+        await close_http_client()
+    return export_rate_snapshot(path)
+
+
+def format_info(snapshot: RateSnapshot) -> str:
+    def when(timestamp: float) -> str:
+        return datetime.datetime.fromtimestamp(timestamp).isoformat(
+            " ", "seconds"
+        )
+
+    lines = [
+        f"Снимок: {snapshot.path}",
+        f"Создан: {when(snapshot.created_at)}",
+        f"Курсов: {len(snapshot)}",
+    ]
+    for currency_1, currency_2, quote in snapshot:
+        lines.append(
+            f"{currency_1}/{currency_2}: {quote.rate:.10g} "
+            f"({when(quote.fetched_at)})"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["export", "info"])
+    parser.add_argument(
+        "--base",
+        action="append",
+        default=[],
+        help="базовая валюта, курсы всех валют к которой выгружаются",
+    )
+    parser.add_argument("--path", default=None)
+    args = parser.parse_args()
+    setup_logger()
+    path = args.path or get_settings().CURRENCY.SNAPSHOT_PATH
+    if args.command == "export":
+        bases = [base.upper() for base in args.base]
+        count = asyncio.run(export(bases, path))
+        print(f"Выгружено курсов: {count} в {path}")
+    else:
+        with RateSnapshot(path) as snapshot:
+            print(format_info(snapshot))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Сравнение пропускной способности конвертации пакета сумм.
+
+Сравниваются три способа: float (приближенно), Decimal с quantize на
+каждую сумму и целочисленная fixed-point конвертация из
+app.api.utils.fixed_point. Результаты Decimal и fixed-point сверяются.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_exact_conversion --size 100000 --repeat 5
+"""
+
+import argparse
+import random
+import timeit
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Callable, NamedTuple
+
+from app.api.utils.fixed_point import (
+    convert_minor_batch,
+    from_minor,
+    rate_to_fixed,
+    to_minor,
+)
+
+
+RATE = 0.923871
+RATE_DIGITS = 10
+EXPONENT = 2
+
+
+class BenchResult(NamedTuple):
+    name: str
+    seconds: float
+    size: int
+
+    @property
+    def per_second(self) -> float:
+        return self.size / self.seconds
+
+
+def make_amounts(size: int, seed: int = 0) -> list[Decimal]:
+    rng = random.Random(seed)
+    return [
+        Decimal(rng.randint(1, 10_000_000)).scaleb(-EXPONENT)
+        for _ in range(size)
+    ]
+
+
+def convert_float(amounts: list[float]) -> list[float]:
+    return [round(amount * RATE, EXPONENT) for amount in amounts]
+
+
+def convert_decimal(amounts: list[Decimal]) -> list[Decimal]:
+    rate = Decimal(repr(RATE))
+    quantum = Decimal(1).scaleb(-EXPONENT)
+    return [
+        (amount * rate).quantize(quantum, rounding=ROUND_HALF_EVEN)
+        for amount in amounts
+    ]
+
+
+def convert_fixed_point(amounts: list[int]) -> list[int]:
+    return convert_minor_batch(
+        amounts,
+        rate_to_fixed(RATE, RATE_DIGITS),
+        RATE_DIGITS,
+        EXPONENT,
+        EXPONENT,
+    )
+
+
+def best_time(func: Callable, arg: list, repeat: int) -> float:
+    return min(timeit.repeat(lambda: func(arg), number=1, repeat=repeat))
+
+
+def run(size: int, repeat: int) -> list[BenchResult]:
+    amounts = make_amounts(size)
+    floats = [float(amount) for amount in amounts]
+    minors = [to_minor(amount, EXPONENT) for amount in amounts]
+
+    expected = convert_decimal(amounts)
+    actual = [
+        from_minor(value, EXPONENT) for value in convert_fixed_point(minors)
+    ]
+    if actual != expected:
+        raise AssertionError("fixed-point и Decimal дают разные результаты")
+
+    return [
+        BenchResult("float", best_time(convert_float, floats, repeat), size),
+        BenchResult(
+            "Decimal", best_time(convert_decimal, amounts, repeat), size
+        ),
+        BenchResult(
+            "fixed-point",
+            best_time(convert_fixed_point, minors, repeat),
+            size,
+        ),
+    ]
+
+
+def format_report(results: list[BenchResult]) -> str:
+    lines = [f"{'способ':<12} {'мс':>10} {'сумм/с':>14}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<12} {result.seconds * 1000:>10.2f} "
+            f"{result.per_second:>14,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(format_report(run(args.size, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
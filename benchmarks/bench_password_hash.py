@@ -0,0 +1,70 @@
+"""Замер стоимости хеширования и проверки паролей.
+
+Для каждой конфигурации политики хеширования выводит среднее время
+hash/verify. Помогает подобрать BCRYPT_ROUNDS / параметры argon2 под
+конкретное железо.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_password_hash --repeat 5
+"""
+
+import argparse
+import time
+
+from app.core.config import PasswordSettings
+from app.core.security import make_pwd_context
+
+
+CONFIGURATIONS = {
+    "bcrypt rounds=10": PasswordSettings(SCHEMES=["bcrypt"], BCRYPT_ROUNDS=10),
+    "bcrypt rounds=11": PasswordSettings(SCHEMES=["bcrypt"], BCRYPT_ROUNDS=11),
+    "bcrypt rounds=12": PasswordSettings(SCHEMES=["bcrypt"], BCRYPT_ROUNDS=12),
+    "bcrypt rounds=13": PasswordSettings(SCHEMES=["bcrypt"], BCRYPT_ROUNDS=13),
+    "argon2 t=2 m=19MiB p=1": PasswordSettings(
+        SCHEMES=["argon2"],
+        ARGON2_TIME_COST=2,
+        ARGON2_MEMORY_COST=19456,
+        ARGON2_PARALLELISM=1,
+    ),
+    "argon2 t=3 m=64MiB p=4": PasswordSettings(
+        SCHEMES=["argon2"],
+        ARGON2_TIME_COST=3,
+        ARGON2_MEMORY_COST=65536,
+        ARGON2_PARALLELISM=4,
+    ),
+}
+
+
+def measure(password_settings: PasswordSettings, repeat: int) -> tuple:
+    context = make_pwd_context(password_settings)
+    password = "Benchmark1!"
+    start = time.perf_counter()
+    for _ in range(repeat):
+        hashed = context.hash(password)
+    hash_time = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        context.verify(password, hashed)
+    verify_time = (time.perf_counter() - start) / repeat
+    return hash_time, verify_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'конфигурация':<26}{'hash, мс':>12}{'verify, мс':>12}")
+    for name, password_settings in CONFIGURATIONS.items():
+        try:
+            hash_time, verify_time = measure(password_settings, args.repeat)
+        except Exception as e:
+            # например, не установлен argon2-cffi
+            print(f"{name:<26}  пропущено: {e}")
+            continue
+        print(
+            f"{name:<26}{hash_time * 1000:>12.1f}{verify_time * 1000:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Замер запросов к внешнему API на фейковом API в том же процессе.
+
+Отправляет запросы конвертации через ext_api_request (общий HTTP-клиент,
+хеджирование) к benchmarks.fake_upstream с заданными задержкой и долей
+ошибок. Выводит перцентили времени ответа, ошибки по видам, число
+запросов, дошедших до фейкового API, и метрики хеджирования.
+
+Запуск из корня проекта (нужны переменные окружения приложения):
+    python -m benchmarks.bench_upstream --requests 500 --concurrency 20 \\
+        --latency-ms 20 --tail-rate 0.03 --tail-latency-ms 1000
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import NamedTuple
+
+import httpx
+
+from app.api.errors.logger import setup_logger
+from app.api.utils.external_api import (
+    close_http_client,
+    ext_api_request,
+    use_http_client,
+)
+from app.core.config import get_settings
+from app.core.metrics import metrics
+from benchmarks.fake_upstream import FakeUpstreamConfig, create_fake_upstream
+
+
+class UpstreamReport(NamedTuple):
+    latencies: list[float]
+    errors: Counter[str]
+    upstream_requests: int
+    seconds: float
+
+    def percentile(self, percent: float) -> float:
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return float("nan")
+        index = max(0, round(percent / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+
+async def run(
+    config: FakeUpstreamConfig, requests: int, concurrency: int
+) -> UpstreamReport:
+    app = create_fake_upstream(config)
+    use_http_client(
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://fake"
+        )
+    )
+    url = get_settings().CURRENCY.URL_EXCHANGE
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors: Counter[str] = Counter()
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await ext_api_request(
+                    url, currency_1="USD", currency_2="EUR", amount=index + 1
+                )
+            except Exception as e:
+                errors[type(e).__name__] += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(index) for index in range(requests)))
+    finally:
+        await close_http_client()
+    return UpstreamReport(
+        latencies,
+        errors,
+        sum(app.state.upstream.requests.values()),
+        time.perf_counter() - start,
+    )
+
+
+def format_report(report: UpstreamReport) -> str:
+    total = len(report.latencies) + sum(report.errors.values())
+    lines = [
+        f"Запросов: {total} за {report.seconds:.2f} с "
+        f"({total / report.seconds:.0f} в секунду)",
+        f"Дошло до внешнего API: {report.upstream_requests}",
+    ]
+    for percent in (50, 95, 99, 100):
+        lines.append(f"p{percent}: {report.percentile(percent) * 1000:.1f} мс")
+    for name, count in sorted(report.errors.items()):
+        lines.append(f"Ошибки {name}: {count}")
+    for name in ("upstream_hedge_rate", "upstream_hedge_win_rate"):
+        lines.append(f"{name}: {metrics.value(name):.3f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    for field, info in FakeUpstreamConfig.model_fields.items():
+        if info.annotation is float:
+            parser.add_argument(
+                f"--{field.replace('_', '-')}", type=float, default=0
+            )
+    parser.add_argument("--seed", type=int)
+    args = vars(parser.parse_args())
+    setup_logger()
+    requests, concurrency = args.pop("requests"), args.pop("concurrency")
+    report = asyncio.run(
+        run(FakeUpstreamConfig(**args), requests, concurrency)
+    )
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Локальная замена внешнего API курсов (apilayer currency_data).
+
+ASGI-приложение отвечает на list, convert и live по путям из URL
+CurrencySettings (URL_LIST, URL_EXCHANGE, URL_LIVE), поэтому для работы с
+ним достаточно заменить в этих URL адрес сервера. Задержка ответа и доля
+ошибок (500, 402, 429, некорректные данные) задаются FakeUpstreamConfig.
+
+В том же процессе (без сети):
+    app = create_fake_upstream(FakeUpstreamConfig(latency_ms=50))
+    use_http_client(httpx.AsyncClient(transport=httpx.ASGITransport(app)))
+
+На отдельном порту (CURRENCY__URL_* должны указывать на этот адрес):
+    python -m benchmarks.fake_upstream --port 8081 --latency-ms 50 \\
+        --latency-sigma 0.5 --error-rate 0.01 --rate-limit-rate 0.01
+"""
+
+import argparse
+import asyncio
+import math
+import random
+from collections import Counter
+from typing import Annotated, Optional
+from urllib.parse import urlsplit
+
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import CurrencySettings, get_settings
+
+
+# курсы за 1 USD и названия валют по умолчанию
+DEFAULT_RATES = {
+    "USD": 1.0,
+    "EUR": 0.92,
+    "GBP": 0.79,
+    "JPY": 150.25,
+    "CHF": 0.88,
+    "CNY": 7.2,
+    "RUB": 92.5,
+    "KWD": 0.307,
+}
+DEFAULT_NAMES = {
+    "USD": "United States Dollar",
+    "EUR": "Euro",
+    "GBP": "British Pound Sterling",
+    "JPY": "Japanese Yen",
+    "CHF": "Swiss Franc",
+    "CNY": "Chinese Yuan",
+    "RUB": "Russian Ruble",
+    "KWD": "Kuwaiti Dinar",
+}
+
+
+class FakeUpstreamConfig(BaseModel):
+    """Поведение фейкового API. Доли ошибок - вероятности от 0 до 1."""
+
+    # задержка: логнормальное распределение с медианой latency_ms
+    # (latency_sigma = 0 - постоянная задержка) и редкий "хвост"
+    latency_ms: float = 0
+    latency_sigma: float = 0
+    tail_rate: float = 0
+    tail_latency_ms: float = 0
+    # 500, 402 (квота исчерпана), 429 (превышен лимит запросов)
+    error_rate: float = 0
+    payment_required_rate: float = 0
+    rate_limit_rate: float = 0
+    # ответ 200 с битым JSON, без нужного ключа или с неверным типом
+    malformed_rate: float = 0
+    rates: dict[str, float] = DEFAULT_RATES
+    api_key: Optional[str] = None
+    seed: Optional[int] = None
+
+
+class FakeUpstream:
+    """Состояние фейкового API: генератор случайных чисел и статистика."""
+
+    def __init__(self, config: FakeUpstreamConfig) -> None:
+        self.config = config
+        self.random = random.Random(config.seed)
+        # число запросов по путям и по видам ответов
+        self.requests: Counter[str] = Counter()
+        self.outcomes: Counter[str] = Counter()
+
+    def latency(self) -> float:
+        """Задержка очередного ответа, секунды."""
+
+        config = self.config
+        if config.tail_rate and self.random.random() < config.tail_rate:
+            return config.tail_latency_ms / 1000
+        seconds = config.latency_ms / 1000
+        if config.latency_sigma:
+            seconds *= math.exp(self.random.gauss(0, config.latency_sigma))
+        return seconds
+
+    def fault(self) -> Optional[Response]:
+        """Случайная ошибка по долям из конфигурации (или None)."""
+
+        config = self.config
+        roll = self.random.random()
+        for outcome, share, status_code in (
+            ("error", config.error_rate, 500),
+            ("payment_required", config.payment_required_rate, 402),
+            ("rate_limited", config.rate_limit_rate, 429),
+        ):
+            if roll < share:
+                self.outcomes[outcome] += 1
+                return JSONResponse(
+                    {"message": f"Fake {outcome}"}, status_code=status_code
+                )
+            roll -= share
+        if roll < config.malformed_rate:
+            self.outcomes["malformed"] += 1
+            return self.random.choice(
+                [
+                    Response("{not json", media_type="application/json"),
+                    JSONResponse({"success": True}),
+                    JSONResponse({"success": True, "result": "NaN?"}),
+                ]
+            )
+        return None
+
+    def rate(self, currency_1: str, currency_2: str) -> Optional[float]:
+        rates = self.config.rates
+        if currency_1 not in rates or currency_2 not in rates:
+            return None
+        return rates[currency_2] / rates[currency_1]
+
+
+def create_fake_upstream(
+    config: Optional[FakeUpstreamConfig] = None,
+    currency_settings: Optional[CurrencySettings] = None,
+) -> FastAPI:
+    """Фейковый API; состояние доступно как app.state.upstream."""
+
+    config = config or FakeUpstreamConfig()
+    currency_settings = currency_settings or get_settings().CURRENCY
+    upstream = FakeUpstream(config)
+    app = FastAPI(openapi_url=None)
+    app.state.upstream = upstream
+
+    @app.middleware("http")
+    async def simulate(request: Request, call_next):
+        upstream.requests[request.url.path] += 1
+        await asyncio.sleep(upstream.latency())
+        if config.api_key and request.headers.get("apikey") != config.api_key:
+            upstream.outcomes["unauthorized"] += 1
+            return JSONResponse({"message": "Invalid API key"}, 401)
+        response = upstream.fault()
+        if response is None:
+            upstream.outcomes["ok"] += 1
+            response = await call_next(request)
+        return response
+
+    @app.get(urlsplit(currency_settings.URL_LIST).path)
+    async def currency_list() -> dict:
+        return {
+            "success": True,
+            "currencies": {
+                code: DEFAULT_NAMES.get(code, code) for code in config.rates
+            },
+        }
+
+    @app.get(urlsplit(currency_settings.URL_EXCHANGE).path)
+    async def convert(
+        from_: Annotated[str, Query(alias="from")], to: str, amount: float
+    ) -> Response:
+        rate = upstream.rate(from_, to)
+        if rate is None:
+            return JSONResponse(
+                {"message": "Invalid currency code"}, status_code=402
+            )
+        return JSONResponse(
+            {
+                "success": True,
+                "query": {"from": from_, "to": to, "amount": amount},
+                "info": {"quote": rate},
+                "result": rate * amount,
+            }
+        )
+
+    @app.get(urlsplit(currency_settings.URL_LIVE).path)
+    async def live(source: str = "USD") -> Response:
+        if source not in config.rates:
+            return JSONResponse(
+                {"message": "Invalid source currency"}, status_code=402
+            )
+        return JSONResponse(
+            {
+                "success": True,
+                "source": source,
+                "quotes": {
+                    f"{source}{code}": upstream.rate(source, code)
+                    for code in config.rates
+                    if code != source
+                },
+            }
+        )
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    for field, info in FakeUpstreamConfig.model_fields.items():
+        if info.annotation is float:
+            parser.add_argument(
+                f"--{field.replace('_', '-')}", type=float, default=0
+            )
+    parser.add_argument("--api-key")
+    parser.add_argument("--seed", type=int)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    import uvicorn
+
+    uvicorn.run(
+        create_fake_upstream(FakeUpstreamConfig(**args)), host=host, port=port
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Отчет о времени импорта модулей приложения (по `python -X importtime`).
+
+Импорт выполняется в отдельном процессе, чтобы уже загруженные модули
+не искажали замер. Выводит общее время импорта и самые долгие модули
+по суммарному (с зависимостями) и собственному времени.
+
+Запуск из корня проекта:
+    python -m benchmarks.import_time --top 20 --budget-ms 1000
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportRecord]:
+    """Разбирает вывод `-X importtime` (stderr интерпретатора)."""
+
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # строка заголовка
+            continue
+        module = name.rstrip()
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        records.append(
+            ImportRecord(
+                module=module.strip(),
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=depth,
+            )
+        )
+    return records
+
+
+def measure_import(
+    module: str = "main", repeat: int = 1
+) -> list[ImportRecord]:
+    """Импортирует модуль в отдельном процессе repeat раз.
+
+    Возвращает записи самого быстрого запуска: так меньше влияние
+    случайной нагрузки на машину.
+    """
+
+    best: list[ImportRecord] = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        records = parse_importtime(process.stderr)
+        if not best or total_us(records, module) < total_us(best, module):
+            best = records
+    return best
+
+
+def total_us(records: list[ImportRecord], module: str) -> int:
+    for record in records:
+        if record.module == module and record.depth == 0:
+            return record.cumulative_us
+    raise ValueError(f"Модуль {module} не найден в отчете")
+
+
+def format_report(records: list[ImportRecord], module: str, top: int) -> str:
+    lines = [f"Импорт {module}: {total_us(records, module) / 1000:.1f} мс"]
+    lines.append("\nДольше всего (суммарно, мс):")
+    for record in sorted(records, key=lambda r: -r.cumulative_us)[:top]:
+        lines.append(f"{record.cumulative_us / 1000:9.1f}  {record.module}")
+    lines.append("\nДольше всего (собственное время, мс):")
+    for record in sorted(records, key=lambda r: -r.self_us)[:top]:
+        lines.append(f"{record.self_us / 1000:9.1f}  {record.module}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        help="завершиться с ошибкой, если импорт дольше бюджета",
+    )
+    args = parser.parse_args()
+
+    records = measure_import(args.module, args.repeat)
+    print(format_report(records, args.module, args.top))
+    total_ms = total_us(records, args.module) / 1000
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nБюджет {args.budget_ms} мс превышен: {total_ms:.1f} мс")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
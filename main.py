@@ -1,28 +1,46 @@
-import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import HTMLResponse
 
+from app.api.endpoints.admin import admin_router
 from app.api.endpoints.currency import currency_router
+from app.api.endpoints.health import health_router
+from app.api.endpoints.metrics import metrics_router
 from app.api.endpoints.users import auth_router
 from app.api.errors.handlers import handlers
-from app.core.config import settings
+from app.api.middleware import (
+    CompressionMiddleware,
+    InFlightMiddleware,
+    RateLimitHeadersMiddleware,
+)
+from app.api.utils.compression import (
+    load_static_payload,
+    precompressed_response,
+)
+from app.core.lifespan import lifespan
 
 
-app = FastAPI(exception_handlers=handlers)
+app = FastAPI(exception_handlers=handlers, lifespan=lifespan)
+app.add_middleware(InFlightMiddleware)
+app.add_middleware(RateLimitHeadersMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 
 app.include_router(currency_router)
 app.include_router(auth_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 
-@app.get("/")
-async def index():
-    return FileResponse("./index.html")
+@app.get("/", response_class=HTMLResponse)
+async def index(request: Request) -> Response:
+    payload = load_static_payload("./index.html", "text/html; charset=utf-8")
+    # файл не версионируется: браузер кеширует его, но каждый раз
+    # проверяет актуальность по ETag
+    return precompressed_response(request, payload, cache_control="no-cache")
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host=settings.APP.HOST,
-        port=settings.APP.PORT,
-    )
+    from app.core.server import run
+
+    run()
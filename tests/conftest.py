@@ -1,23 +1,142 @@
+import os
+import shutil
+import socket
+import subprocess
+
+import pytest
 import pytest_asyncio
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.api.db.database import Base
 from app.api.db.models import User
+from app.api.repositories.api_key_repository import get_api_key_cache
+from app.api.repositories.user_repository import get_credentials_cache
+from app.api.utils.external_api import (
+    get_currencies_cache,
+    get_currencies_tiers,
+    get_hedge_policy,
+    get_quotes_tiers,
+    get_rate_provider,
+    get_rates_cache,
+    get_rates_tiers,
+    get_shared_cache,
+)
+from app.api.utils.rate_limit import get_rate_limiter
+from app.api.utils.revocation import get_revocation_list
+from app.core.metrics import metrics
 from app.core.security import get_password_hash
 
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    get_credentials_cache().clear()
+    get_api_key_cache().clear()
+    get_currencies_cache().clear()
+    get_rates_cache().clear()
+    get_hedge_policy.cache_clear()
+    get_rate_provider.cache_clear()
+    get_shared_cache.cache_clear()
+    get_rates_tiers.cache_clear()
+    get_quotes_tiers.cache_clear()
+    get_currencies_tiers.cache_clear()
+    get_rate_limiter.cache_clear()
+    get_revocation_list.cache_clear()
+    metrics.reset()
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def postgres_url(tmp_path_factory):
+    """URL PostgreSQL для тестов (драйвер asyncpg).
+
+    Берется из переменной окружения TEST_POSTGRES_URL. Если она не задана,
+    а initdb и pg_ctl есть в PATH, поднимается временный кластер. Если
+    PostgreSQL недоступен, зависящие от него тесты пропускаются.
+    """
+
+    pytest.importorskip("asyncpg")
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if url:
+        yield url
+        return
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    if not (initdb and pg_ctl):
+        pytest.skip("PostgreSQL не найден: задайте TEST_POSTGRES_URL")
+    data_dir = tmp_path_factory.mktemp("pgdata")
+    port = get_free_port()
+    options = f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1"
+    try:
+        subprocess.run(
+            [
+                initdb,
+                "-D",
+                data_dir,
+                "-U",
+                "postgres",
+                "--auth=trust",
+                "-E",
+                "UTF8",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            [pg_ctl, "-D", data_dir, "-o", options, "-w", "start"],
+            check=True,
+            capture_output=True,
+        )
+    except subprocess.CalledProcessError as e:
+        pytest.skip(f"Не удалось запустить PostgreSQL: {e.stderr!r}")
+    yield f"postgresql+asyncpg://postgres@127.0.0.1:{port}/postgres"
+    subprocess.run(
+        [pg_ctl, "-D", data_dir, "-m", "immediate", "stop"],
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def database_url():
+    return DATABASE_URL
+
+
+# модули, которые нужно прогнать на всех БД, переопределяют database_url:
+# @pytest.fixture
+# def database_url(all_backends_database_url):
+#     return all_backends_database_url
+@pytest.fixture(params=["sqlite", "postgresql"])
+def all_backends_database_url(request):
+    if request.param == "postgresql":
+        return request.getfixturevalue("postgres_url")
+    return DATABASE_URL
+
+
 @pytest_asyncio.fixture
-async def async_session():
-    engine = create_async_engine(DATABASE_URL, echo=False)
+async def async_engine(database_url):
+    engine = create_async_engine(database_url, echo=False)
     async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
-    async_session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_session(async_engine):
+    async_session_factory = async_sessionmaker(
+        async_engine, expire_on_commit=False
+    )
     async with async_session_factory() as session:
         yield session
-    await engine.dispose()
 
 
 @pytest_asyncio.fixture
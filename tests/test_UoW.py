@@ -1,14 +1,26 @@
 import pytest
 from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from app.api.db.UoW import UserUnitOfWork
+from app.api.db.models import User
+from app.api.db.UoW import (
+    IUserUnitOfWork,
+    ReadOnlyUserUnitOfWork,
+    UserUnitOfWork,
+)
+
+
+@pytest.fixture
+def database_url(all_backends_database_url):
+    return all_backends_database_url
 
 
 @pytest.fixture
 def mocked_session(mocker: MockerFixture):
     mock_session = mocker.AsyncMock()
     mocker.patch(
-        "app.api.db.UoW.async_session_maker", return_value=mock_session
+        "app.api.db.UoW.get_session_maker",
+        return_value=mocker.Mock(return_value=mock_session),
     )
     return mock_session
 
@@ -25,7 +37,7 @@ async def test_uow_enter_sets_user_repo(mocked_session):
 async def test_uow_exit_calls_commit_on_success(mocked_session):
     uow = UserUnitOfWork()
     async with uow:
-        pass
+        assert uow.user_repo.session == mocked_session
     mocked_session.commit.assert_awaited_once()
     mocked_session.close.assert_awaited_once()
     mocked_session.rollback.assert_not_awaited()
@@ -36,6 +48,7 @@ async def test_uow_exit_calls_rollback_on_exception(mocked_session):
     uow = UserUnitOfWork()
     with pytest.raises(ValueError):
         async with uow:
+            assert uow.user_repo.session == mocked_session
             raise ValueError("Some error")
     mocked_session.rollback.assert_awaited_once()
     mocked_session.close.assert_awaited_once()
@@ -46,6 +59,7 @@ async def test_uow_exit_calls_rollback_on_exception(mocked_session):
 async def test_uow_commit_delegates_to_session(mocked_session):
     uow = UserUnitOfWork()
     async with uow:
+        assert uow.user_repo.session == mocked_session
         await uow.commit()
     mocked_session.commit.assert_awaited()
 
@@ -54,5 +68,109 @@ async def test_uow_commit_delegates_to_session(mocked_session):
 async def test_uow_rollback_delegates_to_session(mocked_session):
     uow = UserUnitOfWork()
     async with uow:
+        assert uow.user_repo.session == mocked_session
         await uow.rollback()
     mocked_session.rollback.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_uow_session_is_lazy(mocker: MockerFixture):
+    session_maker = mocker.Mock()
+    mocker.patch(
+        "app.api.db.UoW.get_session_maker", return_value=session_maker
+    )
+    uow = UserUnitOfWork()
+    async with uow:
+        pass
+    session_maker.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_uow_repositories_share_session(mocked_session):
+    uow = UserUnitOfWork()
+    async with uow:
+        assert uow.user_repo.session is uow.refresh_token_repo.session
+
+
+@pytest.mark.asyncio
+async def test_read_only_uow_skips_commit(mocked_session):
+    uow = ReadOnlyUserUnitOfWork()
+    async with uow:
+        assert isinstance(uow, IUserUnitOfWork)
+        assert uow.user_repo.session == mocked_session
+        await uow.commit()
+    mocked_session.commit.assert_not_awaited()
+    mocked_session.rollback.assert_not_awaited()
+    mocked_session.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_read_only_uow_routes_to_replica(mocker, mocked_session):
+    replica_session = mocker.AsyncMock()
+    replica = mocker.Mock(return_value=replica_session)
+    router = mocker.Mock()
+    mocker.patch("app.api.db.UoW.get_replica_router", return_value=router)
+    router.session_maker_for_read.return_value = replica
+    uow = ReadOnlyUserUnitOfWork()
+    uow.route_key = "alex"
+    async with uow:
+        assert uow.user_repo.session is replica_session
+    router.session_maker_for_read.assert_called_once_with("alex")
+    router.eject.assert_not_called()
+    assert uow.route_key is None
+
+
+@pytest.mark.asyncio
+async def test_read_only_uow_ejects_failed_replica(mocker, mocked_session):
+    replica = mocker.Mock(return_value=mocker.AsyncMock())
+    router = mocker.Mock()
+    mocker.patch("app.api.db.UoW.get_replica_router", return_value=router)
+    router.session_maker_for_read.return_value = replica
+    uow = ReadOnlyUserUnitOfWork()
+    with pytest.raises(ConnectionRefusedError):
+        async with uow:
+            assert uow.user_repo.session
+            raise ConnectionRefusedError()
+    router.eject.assert_called_once_with(replica)
+
+
+@pytest.mark.asyncio
+async def test_uow_marks_route_key_written(mocker, mocked_session):
+    router = mocker.Mock()
+    mocker.patch("app.api.db.UoW.get_replica_router", return_value=router)
+    uow = UserUnitOfWork()
+    uow.route_key = "alex"
+    async with uow:
+        assert uow.user_repo.session == mocked_session
+    router.mark_written.assert_called_once_with("alex")
+    assert uow.route_key is None
+
+
+@pytest.mark.asyncio
+async def test_uow_with_database(mocker: MockerFixture, async_engine):
+    session_maker = async_sessionmaker(async_engine, expire_on_commit=False)
+    mocker.patch(
+        "app.api.db.UoW.get_session_maker", return_value=session_maker
+    )
+    uow, read_uow = UserUnitOfWork(), ReadOnlyUserUnitOfWork()
+    async with uow:
+        await uow.user_repo.add_one(
+            User(
+                username="saved",
+                email="saved@example.com",
+                hashed_password="h",
+            )
+        )
+    with pytest.raises(ValueError):
+        async with uow:
+            await uow.user_repo.add_one(
+                User(
+                    username="lost",
+                    email="lost@example.com",
+                    hashed_password="h",
+                )
+            )
+            raise ValueError("Some error")
+    async with read_uow:
+        assert await read_uow.user_repo.get_by_username("saved") is not None
+        assert await read_uow.user_repo.get_by_username("lost") is None
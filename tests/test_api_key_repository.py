@@ -0,0 +1,89 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.api.db.models import ApiKey, User
+from app.api.repositories.api_key_repository import (
+    AlchemyApiKeyRepository,
+    ApiKeyCredentials,
+    CachedApiKeyRepository,
+)
+from app.api.utils.cache import TTLCache
+
+
+@pytest.fixture
+def database_url(all_backends_database_url):
+    return all_backends_database_url
+
+
+@pytest_asyncio.fixture
+async def api_key_repository(async_session):
+    return AlchemyApiKeyRepository(async_session)
+
+
+@pytest_asyncio.fixture
+async def existing_user(setup_test_db, async_session):
+    res = await async_session.execute(
+        select(User).where(User.username == "existing_user")
+    )
+    return res.scalar_one()
+
+
+def make_api_key(user_id, prefix, name="service"):
+    return ApiKey(prefix=prefix, key_hash="a" * 64, name=name, user_id=user_id)
+
+
+@pytest.mark.asyncio
+async def test_add_one_and_get_credentials(api_key_repository, existing_user):
+    api_key = await api_key_repository.add_one(
+        make_api_key(existing_user.id, "0123456789ab")
+    )
+    assert api_key.created_at is not None
+    assert api_key.revoked is False
+    assert await api_key_repository.get_credentials(
+        "0123456789ab"
+    ) == ApiKeyCredentials("a" * 64, "existing_user")
+    assert await api_key_repository.get_credentials("ba9876543210") is None
+
+
+@pytest.mark.asyncio
+async def test_list_and_revoke(api_key_repository, existing_user):
+    for prefix in ("0123456789ab", "ba9876543210"):
+        await api_key_repository.add_one(
+            make_api_key(existing_user.id, prefix)
+        )
+    keys = await api_key_repository.list_for_user(existing_user.id)
+    assert [item.prefix for item in keys] == ["0123456789ab", "ba9876543210"]
+
+    # ключ другого пользователя не отзывается
+    assert not await api_key_repository.revoke(
+        existing_user.id + 1, "0123456789ab"
+    )
+    assert await api_key_repository.revoke(existing_user.id, "0123456789ab")
+    assert not await api_key_repository.revoke(
+        existing_user.id, "0123456789ab"
+    )
+    assert await api_key_repository.get_credentials("0123456789ab") is None
+    assert await api_key_repository.get_credentials("ba9876543210")
+
+
+@pytest.mark.asyncio
+async def test_cached_repository(async_session, existing_user, mocker):
+    cache = TTLCache(maxsize=10, ttl=60)
+    repo = CachedApiKeyRepository(async_session, cache)
+    await repo.add_one(make_api_key(existing_user.id, "0123456789ab"))
+    spy = mocker.spy(async_session, "execute")
+    first = await repo.get_credentials("0123456789ab")
+    second = await repo.get_credentials("0123456789ab")
+    assert first == second
+    assert spy.await_count == 1
+
+    # негативный кеш
+    assert await repo.get_credentials("ba9876543210") is None
+    assert await repo.get_credentials("ba9876543210") is None
+    assert spy.await_count == 2
+
+    # отзыв сбрасывает запись
+    await repo.revoke(existing_user.id, "0123456789ab")
+    assert "0123456789ab" not in cache
+    assert await repo.get_credentials("0123456789ab") is None
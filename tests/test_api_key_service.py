@@ -0,0 +1,123 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api.errors.exceptions import (
+    ApiKeyNotFoundException,
+    InvalidTokenException,
+    UserUnauthorisedException,
+)
+from app.api.repositories.api_key_repository import ApiKeyCredentials
+from app.api.repositories.user_repository import UserCredentials
+from app.api.schemas.users import ApiKeyCreate
+from app.api.services.api_key_service import (
+    ApiKeyService,
+    get_current_username,
+)
+from app.core.security import create_api_key, hash_api_key
+
+
+def make_uow(credentials=None):
+    uow = MagicMock()
+    uow.__aenter__.return_value = uow
+    uow.api_key_repo.get_credentials = AsyncMock(return_value=credentials)
+    return uow
+
+
+@pytest.mark.asyncio
+async def test_create_key():
+    uow = make_uow()
+    uow.user_repo.get_credentials = AsyncMock(
+        return_value=UserCredentials(1, "service", "hashed")
+    )
+
+    async def add_one(api_key):
+        # значения по умолчанию модель получает при flush
+        api_key.created_at = datetime.datetime.now(datetime.UTC)
+        api_key.revoked = False
+        return api_key
+
+    uow.api_key_repo.add_one = AsyncMock(side_effect=add_one)
+    service = ApiKeyService(uow)  # type: ignore
+    created = await service.create_key("service", ApiKeyCreate(name="etl"))
+    api_key = uow.api_key_repo.add_one.call_args.args[0]
+    assert api_key.user_id == 1
+    assert api_key.prefix == created.prefix
+    assert api_key.key_hash == hash_api_key(created.key)
+    assert created.name == "etl"
+
+
+@pytest.mark.asyncio
+async def test_create_key_user_not_found():
+    uow = make_uow()
+    uow.user_repo.get_credentials = AsyncMock(return_value=None)
+    service = ApiKeyService(uow)  # type: ignore
+    with pytest.raises(UserUnauthorisedException):
+        await service.create_key("unknown", ApiKeyCreate(name="etl"))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("revoked", [True, False])
+async def test_revoke_key(revoked):
+    uow = make_uow()
+    uow.user_repo.get_credentials = AsyncMock(
+        return_value=UserCredentials(1, "service", "hashed")
+    )
+    uow.api_key_repo.revoke = AsyncMock(return_value=revoked)
+    service = ApiKeyService(uow)  # type: ignore
+    if revoked:
+        await service.revoke_key("service", "0123456789ab")
+    else:
+        # неизвестный, чужой или уже отозванный ключ
+        with pytest.raises(ApiKeyNotFoundException):
+            await service.revoke_key("service", "0123456789ab")
+    uow.api_key_repo.revoke.assert_awaited_once_with(1, "0123456789ab")
+
+
+@pytest.mark.asyncio
+async def test_authenticate(mocker):
+    key, prefix, key_hash = create_api_key()
+    uow = make_uow(ApiKeyCredentials(key_hash, "service"))
+    verify_password = mocker.patch(
+        "app.api.services.user_service.verify_password"
+    )
+    service = ApiKeyService(uow)  # type: ignore
+    assert await service.authenticate(key) == "service"
+    uow.api_key_repo.get_credentials.assert_awaited_once_with(prefix)
+    verify_password.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "make_key, credentials_found",
+    [
+        (lambda key: key[:-1] + ("A" if key[-1] != "A" else "B"), True),
+        (lambda key: key, False),
+        (lambda key: "not_a_key", True),
+    ],
+    ids=["Wrong secret", "Unknown or revoked", "Malformed"],
+)
+async def test_authenticate_invalid(make_key, credentials_found):
+    key, _, key_hash = create_api_key()
+    credentials = ApiKeyCredentials(key_hash, "service")
+    uow = make_uow(credentials if credentials_found else None)
+    service = ApiKeyService(uow)  # type: ignore
+    with pytest.raises(InvalidTokenException) as exc_info:
+        await service.authenticate(make_key(key))
+    assert exc_info.value.detail == "API-ключ недействителен"
+
+
+@pytest.mark.asyncio
+async def test_get_current_username(mocker):
+    service = MagicMock()
+    service.authenticate = AsyncMock(return_value="service")
+    # API-ключ имеет приоритет над токеном
+    assert await get_current_username("token", "key", service) == "service"
+    mocker.patch(
+        "app.api.services.api_key_service.get_username_from_token",
+        return_value="user",
+    )
+    assert await get_current_username("token", None, service) == "user"
+    with pytest.raises(InvalidTokenException):
+        await get_current_username(None, None, service)
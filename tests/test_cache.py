@@ -0,0 +1,94 @@
+import pytest
+
+from app.api.utils.cache import MISSING, TTLCache
+
+
+@pytest.fixture
+def clock(mocker):
+    now = [1000.0]
+    mocker.patch(
+        "app.api.utils.cache.time.monotonic", side_effect=lambda: now[0]
+    )
+    return now
+
+
+def test_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", MISSING) is MISSING
+    assert "a" in cache
+    assert len(cache) == 1
+
+
+def test_none_value_is_cached():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", None)
+    assert cache.get("a", MISSING) is None
+    assert "a" in cache
+
+
+def test_expiration(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=1)
+    clock[0] += 5
+    assert cache.get("a") == 1
+    assert "b" not in cache
+    clock[0] += 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_delete_and_clear():
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a")
+    cache.delete("missing")
+    assert list(cache) == ["b"]
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_remaining_ttl(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    assert cache.remaining_ttl("a") == 10
+    clock[0] += 4
+    assert cache.remaining_ttl("a") == 6
+    clock[0] += 6
+    assert cache.remaining_ttl("a") is None
+    assert cache.remaining_ttl("b") is None
+
+
+def test_version_and_snapshot(clock):
+    cache = TTLCache(maxsize=2, ttl=10)
+    assert cache.version == 0
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    assert cache.version == 2
+    assert cache.snapshot() == [("a", 1, 1010.0), ("b", 2, 1020.0)]
+    clock[0] += 10
+    # просроченные записи в снимок не попадают
+    assert cache.snapshot() == [("b", 2, 1020.0)]
+    cache.get("b")
+    assert cache.version == 2
+    cache.get("a")
+    cache.delete("missing")
+    assert cache.version == 3
+    cache.delete("b")
+    cache.clear()
+    assert cache.version == 5
@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+from app.api.utils.checkpoint import (
+    CHECKPOINT_VERSION,
+    CheckpointEntry,
+    CheckpointFormatError,
+    atomic_write,
+    read_checkpoint,
+    write_checkpoint,
+)
+
+
+RATES = [
+    CheckpointEntry(("USD", "EUR"), 0.8, 1000.0, 1060.0),
+    CheckpointEntry(("USD", "RUB"), 80.0, 1010.0, 1070.0),
+]
+CURRENCIES = CheckpointEntry("currencies", {"USD": "Доллар"}, 900.0, 4500.0)
+
+
+def test_checkpoint_roundtrip(tmp_path):
+    path = tmp_path / "cache.json"
+    write_checkpoint(path, RATES, CURRENCIES)
+    checkpoint = read_checkpoint(path)
+    assert checkpoint.rates == RATES
+    assert checkpoint.currencies == CURRENCIES
+    assert json.loads(path.read_text())["version"] == CHECKPOINT_VERSION
+
+
+def test_checkpoint_without_currencies(tmp_path):
+    path = tmp_path / "cache.json"
+    write_checkpoint(path, [])
+    checkpoint = read_checkpoint(path)
+    assert checkpoint.rates == []
+    assert checkpoint.currencies is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "{not json",
+        "[]",
+        json.dumps({"version": CHECKPOINT_VERSION + 1, "rates": []}),
+        json.dumps({"version": CHECKPOINT_VERSION, "rates": [{}]}),
+        json.dumps(
+            {
+                "version": CHECKPOINT_VERSION,
+                "created_at": 0,
+                "rates": [],
+                "currencies": {"currencies": []},
+            }
+        ),
+    ],
+    ids=["not json", "not object", "version", "rate", "currencies"],
+)
+def test_checkpoint_invalid(tmp_path, content):
+    path = tmp_path / "cache.json"
+    path.write_text(content)
+    with pytest.raises(CheckpointFormatError):
+        read_checkpoint(path)
+
+
+def test_checkpoint_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        read_checkpoint(tmp_path / "cache.json")
+
+
+def test_atomic_write_failure_keeps_file(tmp_path, mocker):
+    path = tmp_path / "cache.json"
+    atomic_write(path, b"old")
+    mocker.patch("os.replace", side_effect=OSError("disk full"))
+    with pytest.raises(OSError):
+        atomic_write(path, b"new")
+    assert path.read_bytes() == b"old"
+    # временный файл удален
+    assert os.listdir(tmp_path) == ["cache.json"]
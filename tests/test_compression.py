@@ -0,0 +1,103 @@
+import gzip
+import sys
+
+import brotli
+import pytest
+from fastapi import Request
+
+from app.api.utils.compression import (
+    choose_encoding,
+    compress_payload,
+    etag_matches,
+    parse_accept_encoding,
+    precompressed_response,
+)
+
+
+BODY = b'{"currencies": {"USD": "United States Dollar"}}' * 50
+
+
+def make_request(**headers) -> Request:
+    raw = [
+        (name.replace("_", "-").lower().encode(), value.encode())
+        for name, value in headers.items()
+    ]
+    return Request(scope={"type": "http", "headers": raw})
+
+
+@pytest.fixture
+def payload():
+    return compress_payload(BODY, "application/json")
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br;q=0.5, *;q=0") == {
+        "gzip": 1.0,
+        "br": 0.5,
+        "*": 0.0,
+    }
+    assert parse_accept_encoding("") == {}
+    assert parse_accept_encoding("gzip;q=abc") == {"gzip": 0.0}
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("*", "br"),
+        ("br;q=0, *", "gzip"),
+        ("deflate", "identity"),
+        ("", "identity"),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding, ("identity", "gzip", "br")) == (
+        expected
+    )
+
+
+def test_compress_payload(payload):
+    assert payload.variants["identity"] == BODY
+    assert gzip.decompress(payload.variants["gzip"]) == BODY
+    assert brotli.decompress(payload.variants["br"]) == BODY
+    assert len(payload.variants["br"]) < len(BODY)
+    # ETag зависит только от содержимого
+    assert compress_payload(BODY, "application/json").digest == payload.digest
+    assert payload.etag("identity") != payload.etag("gzip")
+
+
+def test_compress_payload_without_brotli(monkeypatch):
+    monkeypatch.setitem(sys.modules, "brotli", None)
+    payload = compress_payload(BODY, "application/json")
+    assert set(payload.variants) == {"identity", "gzip"}
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', ['"b"'])
+    assert etag_matches("*", ['"b"'])
+    assert not etag_matches('"a"', ['"b"'])
+    assert etag_matches('"a"', ['W/"a"'])
+
+
+def test_precompressed_response(payload):
+    request = make_request(accept_encoding="gzip, br")
+    response = precompressed_response(request, payload, "no-cache")
+    assert response.status_code == 200
+    assert response.body == payload.variants["br"]
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["ETag"] == payload.etag("br")
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def test_precompressed_response_not_modified(payload):
+    # у клиента закешировано gzip-представление
+    request = make_request(
+        accept_encoding="br", if_none_match=payload.etag("gzip")
+    )
+    response = precompressed_response(request, payload, "no-cache")
+    assert response.status_code == 304
+    assert response.body == b""
+    assert "Content-Encoding" not in response.headers
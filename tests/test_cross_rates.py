@@ -0,0 +1,104 @@
+import pytest
+
+from app.api.utils import cross_rates
+from app.api.utils.cache import TTLCache
+from app.api.utils.cross_rates import CrossRateTable
+from app.api.utils.external_api import make_rate_quote
+
+
+@pytest.fixture
+def clock(mocker):
+    now = [1000.0]
+    mocker.patch(
+        "app.api.utils.cache.time.monotonic", side_effect=lambda: now[0]
+    )
+    return now
+
+
+@pytest.fixture
+def rates():
+    return TTLCache(maxsize=10, ttl=60)
+
+
+def add_rate(rates, first, second, rate, ttl=None):
+    pair = (first, second)
+    rates.set(pair, make_rate_quote(pair, rate), ttl)
+
+
+def test_direct_and_inverse(rates, clock):
+    add_rate(rates, "USD", "EUR", 0.8)
+    table = CrossRateTable(rates, max_hops=2)
+    direct = table.get("USD", "EUR")
+    assert direct.rate == 0.8
+    assert direct.path == ("USD", "EUR")
+    assert direct.expires_at == 1060
+    assert direct.fetched_at == 1000
+    inverse = table.get("EUR", "USD")
+    assert inverse.rate == pytest.approx(1.25)
+    assert inverse.path == ("EUR", "USD")
+    assert inverse.version != direct.version
+    assert table.get("USD", "RUB") is None
+
+
+def test_directly_known_pair_beats_inverse(rates, clock):
+    add_rate(rates, "USD", "EUR", 0.8)
+    add_rate(rates, "EUR", "USD", 1.3)
+    table = CrossRateTable(rates, max_hops=2)
+    assert table.get("EUR", "USD").rate == 1.3
+
+
+def test_triangulation(rates, clock):
+    add_rate(rates, "USD", "EUR", 0.8)
+    clock[0] += 10
+    add_rate(rates, "USD", "RUB", 80)
+    table = CrossRateTable(rates, max_hops=2)
+    cross = table.get("EUR", "RUB")
+    assert cross.rate == pytest.approx(100)
+    assert cross.path == ("EUR", "USD", "RUB")
+    # возраст и истечение - по самому старому курсу пути
+    assert cross.fetched_at == 1000
+    assert cross.expires_at == 1060
+    assert CrossRateTable(rates, max_hops=1).get("EUR", "RUB") is None
+
+
+def test_fewest_hops_then_freshest(rates, clock):
+    add_rate(rates, "AAA", "BBB", 2)
+    add_rate(rates, "BBB", "DDD", 3)
+    clock[0] += 5
+    add_rate(rates, "AAA", "CCC", 4)
+    add_rate(rates, "CCC", "DDD", 1.5)
+    add_rate(rates, "DDD", "EEE", 10)
+    table = CrossRateTable(rates, max_hops=3)
+    assert table.get("AAA", "DDD").path == ("AAA", "CCC", "DDD")
+    assert table.get("AAA", "DDD").rate == pytest.approx(6)
+    assert len(table.get("AAA", "EEE").path) == 4
+
+
+def test_table_follows_snapshot(rates, clock):
+    table = CrossRateTable(rates, max_hops=2)
+    assert table.get("USD", "EUR") is None
+    add_rate(rates, "USD", "EUR", 0.8)
+    version = table.get("USD", "EUR").version
+    add_rate(rates, "USD", "EUR", 0.9)
+    assert table.get("USD", "EUR").rate == 0.9
+    assert table.get("USD", "EUR").version != version
+    add_rate(rates, "USD", "RUB", 80, ttl=5)
+    assert table.get("EUR", "RUB") is not None
+    # истекший курс исключается без обращения к кешу курсов
+    clock[0] += 5
+    assert table.get("EUR", "RUB") is None
+    assert table.get("USD", "EUR") is not None
+
+
+def test_search_is_lazy_per_source(mocker, rates, clock):
+    search = mocker.spy(cross_rates, "search")
+    add_rate(rates, "USD", "EUR", 0.8)
+    add_rate(rates, "USD", "RUB", 80)
+    table = CrossRateTable(rates, max_hops=2)
+    assert table.get("EUR", "RUB") is not None
+    assert table.get("EUR", "USD") is not None
+    # поиск только из запрошенной валюты и один раз до изменения кеша
+    assert [call.args[1] for call in search.call_args_list] == ["EUR"]
+    add_rate(rates, "USD", "JPY", 150)
+    assert table.get("EUR", "JPY").rate == pytest.approx(187.5)
+    assert search.call_count == 2
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+import pytest
+from pytest_mock import MockerFixture
+
+from app.api.schemas.currency import ExactBatchRequest, ExactCurrencyRequest
+from app.api.services.currency_service import (
+    CurrencyService,
+    get_currency_service,
+)
+from app.api.utils.external_api import make_rate_quote
+from app.core.config import settings
+
+
+@pytest.fixture
+def mock_rate(mocker: MockerFixture):
+    def patch(rate):
+        return mocker.patch(
+            "app.api.services.currency_service.ext_api_get_rate",
+            new_callable=mocker.AsyncMock,
+            return_value=make_rate_quote(("USD", "EUR"), rate),
+        )
+
+    return patch
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "rounding, expected",
+    [
+        ("ROUND_HALF_EVEN", "0.92"),
+        ("ROUND_HALF_UP", "0.93"),
+        ("ROUND_DOWN", "0.92"),
+        ("ROUND_UP", "0.93"),
+    ],
+)
+async def test_convert_exact(mock_rate, rounding, expected):
+    mock_rate(0.925)
+    service = CurrencyService(rounding=rounding, rate_digits=10)
+    result = await service.convert_exact(
+        ExactCurrencyRequest(currency_1="USD", currency_2="EUR")
+    )
+    assert result.amount == 1
+    assert result.rate == Decimal("0.925")
+    assert str(result.result) == expected
+
+
+@pytest.mark.asyncio
+async def test_convert_exact_batch_minor_units(mock_rate):
+    # JPY без разменной единицы, KWD - три знака
+    rate = mock_rate(0.00203)
+    service = CurrencyService(rounding="ROUND_HALF_EVEN", rate_digits=10)
+    result = await service.convert_exact_batch(
+        ExactBatchRequest(
+            currency_1="JPY", currency_2="KWD", amounts=["1", "1000", "250"]
+        )
+    )
+    rate.assert_awaited_once_with("JPY", "KWD")
+    assert [str(value) for value in result.results] == [
+        "0.002",
+        "2.030",
+        "0.508",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_convert_exact_rate_digits(mock_rate):
+    mock_rate(1.23456789)
+    service = CurrencyService(rounding="ROUND_HALF_EVEN", rate_digits=4)
+    result = await service.convert_exact(
+        ExactCurrencyRequest(currency_1="USD", currency_2="EUR", amount=100)
+    )
+    assert result.rate == Decimal("1.2346")
+    assert result.result == Decimal("123.46")
+
+
+def test_get_currency_service(monkeypatch):
+    monkeypatch.setattr(settings.CURRENCY, "EXACT_ROUNDING", "ROUND_UP")
+    service = get_currency_service()
+    assert service.rounding == "ROUND_UP"
+    assert service.rate_digits == settings.CURRENCY.EXACT_RATE_DIGITS
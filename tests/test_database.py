@@ -0,0 +1,93 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.api.db.database import (
+    ReplicaRouter,
+    dispose_engines,
+    get_engine,
+    get_replica_router,
+)
+from app.core.config import get_settings
+
+
+@pytest.fixture
+def clock(mocker):
+    now = [1000.0]
+    mocker.patch(
+        "app.api.db.database.time.monotonic", side_effect=lambda: now[0]
+    )
+    mocker.patch(
+        "app.api.utils.cache.time.monotonic", side_effect=lambda: now[0]
+    )
+    return now
+
+
+def make_router(replicas_count=2):
+    replicas = [MagicMock(name=f"replica_{i}") for i in range(replicas_count)]
+    return ReplicaRouter(replicas, eject_seconds=30, sticky_seconds=10)
+
+
+def test_no_replicas_reads_from_primary():
+    router = make_router(0)
+    assert router.session_maker_for_read() is None
+
+
+def test_round_robin():
+    router = make_router(2)
+    picked = [router.session_maker_for_read() for _ in range(4)]
+    assert picked == router.replicas * 2
+
+
+def test_eject_and_readmit(clock):
+    router = make_router(2)
+    router.eject(router.replicas[0])
+    picked = {router.session_maker_for_read() for _ in range(4)}
+    assert picked == {router.replicas[1]}
+
+    router.eject(router.replicas[1])
+    assert router.session_maker_for_read() is None
+
+    clock[0] += 31
+    picked = {router.session_maker_for_read() for _ in range(4)}
+    assert picked == set(router.replicas)
+
+
+def test_eject_unknown_session_maker_is_ignored():
+    router = make_router(1)
+    router.eject(MagicMock())
+    assert router.session_maker_for_read() is router.replicas[0]
+
+
+def test_read_your_writes(clock):
+    router = make_router(2)
+    router.mark_written("alex")
+    assert router.session_maker_for_read("alex") is None
+    assert router.session_maker_for_read("bob") is not None
+    clock[0] += 11
+    assert router.session_maker_for_read("alex") is not None
+
+
+@pytest.mark.asyncio
+async def test_dispose_engines(mocker):
+    for provider in (get_engine, get_replica_router):
+        provider.cache_clear()
+    primary, replica = mocker.AsyncMock(), mocker.AsyncMock()
+    mocker.patch(
+        "app.api.db.database.create_engine_from_url",
+        side_effect=[primary, replica],
+    )
+    mocker.patch.object(
+        get_settings().DATABASE, "REPLICA_URLS", ["sqlite+aiosqlite://"]
+    )
+    # неиспользованные движки не создаются ради закрытия
+    await dispose_engines()
+    primary.dispose.assert_not_awaited()
+
+    get_engine()
+    get_replica_router()
+    await dispose_engines()
+    primary.dispose.assert_awaited_once()
+    replica.dispose.assert_awaited_once()
+    for provider in (get_engine, get_replica_router):
+        provider.cache_clear()
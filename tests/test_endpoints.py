@@ -1,19 +1,36 @@
+import ipaddress
+
 import jwt
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from pytest_mock import MockerFixture
 
-from app.api.errors.exceptions import ExternalAPIHTTPError
+from app.api.errors.exceptions import (
+    ExternalAPIHTTPError,
+    InvalidTokenException,
+)
+from app.api.middleware import in_flight
+from app.api.services.api_key_service import get_current_username
+from app.api.utils.revocation import get_revocation_list
 from app.core.config import settings
-from app.core.security import get_username_from_token
+from app.core.health import health_monitor
+from app.core.lifespan import readiness
+from app.core.metrics import metrics
+from app.core.security import (
+    create_jwt_token,
+    decode_jwt_token,
+    get_pwd_context,
+    get_username_from_token,
+)
 from main import app
 
 
 @pytest_asyncio.fixture
 async def async_client(mocker, async_session):
     mocker.patch(
-        "app.api.db.UoW.async_session_maker", return_value=async_session
+        "app.api.db.UoW.get_session_maker",
+        return_value=mocker.Mock(return_value=async_session),
     )
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -24,6 +41,7 @@ async def async_client(mocker, async_session):
 @pytest.fixture(scope="class")
 def token_check():
     app.dependency_overrides[get_username_from_token] = lambda: "valid_user"
+    app.dependency_overrides[get_current_username] = lambda: "valid_user"
     yield
     app.dependency_overrides = {}
 
@@ -120,6 +138,7 @@ class TestUsers:
         )
         assert response.status_code == expected_status
         if "access_token" in response.json():
+            assert response.json()["refresh_token"]
             token = response.json()["access_token"]
             payload = jwt.decode(
                 token,
@@ -130,6 +149,58 @@ class TestUsers:
         else:
             assert response.json()["message"] == expected_message_or_username
 
+    @pytest.mark.asyncio
+    async def test_refresh_and_logout(self, async_client):
+        response = await async_client.post(
+            "/auth/login/",
+            data={"username": "existing_user", "password": "Password1!"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        first_refresh = response.json()["refresh_token"]
+
+        response = await async_client.post(
+            "/auth/refresh/", json={"refresh_token": first_refresh}
+        )
+        assert response.status_code == 200
+        second_refresh = response.json()["refresh_token"]
+        assert second_refresh != first_refresh
+        payload = jwt.decode(
+            response.json()["access_token"],
+            settings.JWT.SECRET_KEY,
+            algorithms=[settings.JWT.ALGORITHM],
+        )
+        assert payload.get("sub") == "existing_user"
+
+        # повторное использование отозванного токена
+        response = await async_client.post(
+            "/auth/refresh/", json={"refresh_token": first_refresh}
+        )
+        assert response.status_code == 401
+        assert response.json()["message"] == "Refresh-токен недействителен"
+
+        # после повторного использования отозваны все токены пользователя
+        response = await async_client.post(
+            "/auth/refresh/", json={"refresh_token": second_refresh}
+        )
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_logout(self, async_client):
+        response = await async_client.post(
+            "/auth/login/",
+            data={"username": "existing_user", "password": "Password1!"},
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        refresh_token = response.json()["refresh_token"]
+        response = await async_client.post(
+            "/auth/logout/", json={"refresh_token": refresh_token}
+        )
+        assert response.status_code == 200
+        response = await async_client.post(
+            "/auth/refresh/", json={"refresh_token": refresh_token}
+        )
+        assert response.status_code == 401
+
 
 # набор тестов маршрутов обмена валюты и списка валют
 @pytest.mark.usefixtures("token_check")
@@ -280,3 +351,605 @@ class TestCurrency:
         response = await async_client.get("/currency/list/")
         assert response.status_code == expected_status
         assert response.json() == expected_data
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "ready, expected_status, expected_data",
+    [
+        (False, 503, {"status": "warming_up"}),
+        (True, 200, {"status": "ready"}),
+    ],
+    ids=["Warming up", "Ready"],
+)
+async def test_health_ready(
+    monkeypatch, async_client, ready, expected_status, expected_data
+):
+    monkeypatch.setattr(readiness, "ready", ready)
+    response = await async_client.get("/health/ready")
+    assert response.status_code == expected_status
+    assert response.json()["status"] == expected_data["status"]
+
+
+@pytest.mark.asyncio
+async def test_health_live(mocker: MockerFixture, async_client):
+    get_engine = mocker.patch("app.core.health.get_engine")
+    response = await async_client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+    get_engine.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_health_ready_checks(
+    mocker: MockerFixture, monkeypatch, async_client
+):
+    monkeypatch.setattr(readiness, "ready", True)
+    check_database = mocker.patch(
+        "app.core.health.HealthMonitor.check_database"
+    )
+    monkeypatch.setattr(health_monitor, "report", {"caches": {"rates": 3}})
+    for _ in range(3):
+        response = await async_client.get("/health/ready")
+    assert response.json() == {
+        "status": "ready",
+        "checks": {"caches": {"rates": 3}},
+    }
+    # проверки выполняются в фоне, а не при каждом запросе
+    check_database.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_health_ready_database_error(monkeypatch, async_client):
+    monkeypatch.setattr(readiness, "ready", True)
+    report = {"database": {"status": "error", "error": "TimeoutError: "}}
+    monkeypatch.setattr(health_monitor, "report", report)
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "unhealthy", "checks": report}
+    report["database"] = {"status": "ok", "latency_ms": 1.0}
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_draining_rejects_requests(monkeypatch, async_client):
+    monkeypatch.setattr(in_flight, "draining", True)
+    response = await async_client.get("/currency/list/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    health = await async_client.get("/health/ready")
+    assert health.status_code == 503
+    assert health.json()["status"] == "draining"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "accept_encoding, expected_encoding",
+    [("gzip, deflate, br", "br"), ("gzip", "gzip"), ("", None)],
+    ids=["Brotli", "Gzip", "Identity"],
+)
+async def test_index(async_client, accept_encoding, expected_encoding):
+    response = await async_client.get(
+        "/", headers={"Accept-Encoding": accept_encoding}
+    )
+    assert response.status_code == 200
+    assert response.headers.get("Content-Encoding") == expected_encoding
+    assert response.headers["Cache-Control"] == "no-cache"
+    with open("./index.html", encoding="utf-8") as file:
+        assert response.text == file.read()
+
+    not_modified = await async_client.get(
+        "/", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert not_modified.status_code == 304
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("token_check")
+async def test_currency_list_cache_headers(
+    mocker: MockerFixture, async_client
+):
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        return_value={"currencies": {"USD": "US dollar", "EUR": "euro"}},
+    )
+    response = await async_client.get("/currency/list/")
+    assert response.headers["Content-Encoding"] == "br"
+    cache_control, max_age = response.headers["Cache-Control"].split("=")
+    assert cache_control == "private, max-age"
+    assert 0 < int(max_age) <= settings.CURRENCY.LIST_TTL
+    not_modified = await async_client.get(
+        "/currency/list/", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert not_modified.status_code == 304
+    mock_ext_api.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_dynamic_response_compressed(async_client):
+    response = await async_client.get(
+        "/openapi.json", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json()["openapi"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("token_check")
+@pytest.mark.parametrize("scope", ["private", "public"])
+async def test_currency_exchange_cache_headers(
+    mocker: MockerFixture, monkeypatch, async_client, scope
+):
+    monkeypatch.setattr(settings.CURRENCY, "EXCHANGE_CACHE_SCOPE", scope)
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        return_value={"result": 93},
+    )
+    url = "/currency/exchange/?from=USD&to=EUR&amount=100"
+    response = await async_client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"') and etag.endswith('-100.0"')
+    cache_control, max_age = response.headers["Cache-Control"].split("=")
+    assert cache_control == f"{scope}, max-age"
+    assert 0 < int(max_age) <= settings.CURRENCY.RATES_TTL
+
+    not_modified = await async_client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    # другая сумма - другой ответ
+    other_amount = await async_client.get(
+        "/currency/exchange/?from=USD&to=EUR&amount=10",
+        headers={"If-None-Match": etag},
+    )
+    assert other_amount.status_code == 200
+    assert other_amount.json()["result"] == pytest.approx(9.3)
+    mock_ext_api.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("token_check")
+async def test_currency_exchange_exact(mocker: MockerFixture, async_client):
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        return_value={"result": 0.925},
+    )
+    response = await async_client.get(
+        "/currency/exchange/exact/?from=USD&to=JPY&amount=0.10"
+    )
+    assert response.status_code == 200
+    # суммы и курс - строки, результат в минимальных единицах JPY
+    assert response.json() == {
+        "from": "USD",
+        "to": "JPY",
+        "amount": "0.10",
+        "rate": "0.9250000000",
+        "result": "0",
+    }
+
+    response = await async_client.post(
+        "/currency/exchange/exact/batch/",
+        json={"from": "USD", "to": "JPY", "amounts": ["100", "2.70", 3]},
+    )
+    assert response.status_code == 200
+    assert response.json()["results"] == ["92", "2", "3"]
+    mock_ext_api.assert_awaited_once()
+
+    response = await async_client.get(
+        "/currency/exchange/exact/?from=USD&to=JPY&amount=0.001"
+    )
+    assert response.status_code == 422
+    # огромный порядок отклоняется валидацией, а не считается или падает
+    for amount in ("1E+100000", "1E+1000000"):
+        response = await async_client.post(
+            "/currency/exchange/exact/batch/",
+            json={"from": "USD", "to": "JPY", "amounts": ["1", amount]},
+        )
+        assert response.status_code == 422
+    response = await async_client.get(
+        "/currency/exchange/exact/?from=USD&to=JPY&amount=1E%2B1000000"
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("token_check")
+async def test_currency_exchange_cross_rate(
+    mocker: MockerFixture, async_client
+):
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        side_effect=[{"result": 0.8}, {"result": 80}],
+    )
+    response = await async_client.get("/currency/exchange/?from=USD&to=EUR")
+    assert response.headers["X-Rate-Path"] == "USD>EUR"
+    assert response.headers["X-Rate-Age"] == "0"
+    await async_client.get("/currency/exchange/?from=USD&to=RUB")
+
+    response = await async_client.get(
+        "/currency/exchange/?from=EUR&to=RUB&amount=2"
+    )
+    assert response.status_code == 200
+    assert response.json()["result"] == pytest.approx(200)
+    assert response.headers["X-Rate-Path"] == "EUR>USD>RUB"
+    assert mock_ext_api.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_metrics(monkeypatch, async_client):
+    monkeypatch.setattr(in_flight, "draining", True)
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "upstream_hedge_rate 0" in response.text
+    assert "upstream_hedge_win_rate 0" in response.text
+
+
+@pytest.fixture
+def admin_token():
+    app.dependency_overrides[get_username_from_token] = lambda: "admin"
+    app.dependency_overrides[get_current_username] = lambda: "admin"
+    yield
+    app.dependency_overrides = {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("token_check")
+async def test_admin_forbidden(async_client):
+    response = await async_client.get("/admin/cache/")
+    assert response.status_code == 403
+    assert response.json() == {
+        "message": "Недостаточно прав для выполнения запроса."
+    }
+
+
+@pytest.mark.asyncio
+async def test_admin_unauthorized(async_client):
+    response = await async_client.get("/admin/cache/")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("admin_token")
+async def test_admin_cache(mocker: MockerFixture, async_client):
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        side_effect=[{"result": 0.8}, {"result": 80}, {"result": 0.9}],
+    )
+    await async_client.get("/currency/exchange/?from=USD&to=EUR")
+    await async_client.get("/currency/exchange/?from=USD&to=EUR")
+    await async_client.get("/currency/exchange/?from=EUR&to=RUB")
+
+    response = await async_client.get("/admin/cache/")
+    assert response.status_code == 200
+    rates = response.json()[0]
+    assert rates["name"] == "rates"
+    assert rates["entries"] == 2
+    assert rates["bytes"] > 0
+    assert (rates["l1_hits"], rates["misses"]) == (1, 2)
+    assert rates["age"]["max"] < 5
+    assert rates["shared_entries"] is None
+
+    response = await async_client.get("/admin/cache/rates/")
+    assert [(item["from"], item["to"]) for item in response.json()] == [
+        ("EUR", "RUB"),
+        ("USD", "EUR"),
+    ]
+
+    # принудительное обновление идет к внешнему API
+    response = await async_client.post(
+        "/admin/cache/rates/refresh/?from=USD&to=EUR"
+    )
+    assert response.status_code == 200
+    assert response.json()["rate"] == 0.9
+    assert mock_ext_api.await_count == 3
+
+    response = await async_client.delete("/admin/cache/rates/?base=USD")
+    assert response.json() == {"deleted": 1}
+    response = await async_client.delete("/admin/cache/rates/")
+    assert response.json() == {"deleted": 1}
+    response = await async_client.get("/admin/cache/rates/")
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("admin_token")
+@pytest.mark.parametrize(
+    "query", ["from=USD", "from=USD&to=EUR&base=RUB", "base=US"]
+)
+async def test_admin_invalidate_validation(async_client, query):
+    response = await async_client.delete(f"/admin/cache/rates/?{query}")
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("admin_token")
+async def test_admin_invalidate_currencies(
+    mocker: MockerFixture, async_client
+):
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        return_value={"currencies": {"USD": "United States Dollar"}},
+    )
+    await async_client.get("/currency/list/")
+    response = await async_client.delete("/admin/cache/currencies/")
+    assert response.json() == {"deleted": 1}
+    response = await async_client.delete("/admin/cache/currencies/")
+    assert response.json() == {"deleted": 0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("token_check")
+async def test_currency_rate_limit(
+    monkeypatch, mocker: MockerFixture, async_client
+):
+    monkeypatch.setattr(
+        settings.RATE_LIMIT,
+        "ROUTES",
+        {"/currency/": "2/minute", "/currency/exchange/": "1/minute"},
+    )
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        return_value={"currencies": {"USD": "US dollar", "EUR": "euro"}},
+    )
+    response = await async_client.get("/currency/list/")
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Limit"] == "2"
+    assert response.headers["RateLimit-Remaining"] == "1"
+    assert response.headers["RateLimit-Policy"] == "2;w=60"
+    # ответ из кеша эндпоинт возвращает сам - заголовки тоже есть
+    response = await async_client.get("/currency/list/")
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Remaining"] == "0"
+    response = await async_client.get("/currency/list/")
+    assert response.status_code == 429
+    assert response.json() == {
+        "message": "Слишком много запросов, повторите позже."
+    }
+    assert response.headers["Retry-After"] == "30"
+    assert response.headers.get_list("RateLimit-Remaining") == ["0"]
+    assert "rate_limited_requests_total 1" in metrics.render()
+
+
+@pytest.mark.asyncio
+async def test_auth_rate_limit_by_ip(monkeypatch, async_client):
+    monkeypatch.setattr(settings.RATE_LIMIT, "ROUTES", {"/auth/": "1/hour"})
+    # лимит проверяется до разбора тела запроса
+    response = await async_client.post("/auth/register/", json={})
+    assert response.status_code == 422
+    assert response.headers["RateLimit-Remaining"] == "0"
+    response = await async_client.post("/auth/login/", data={})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3600"
+    # маршруты без лимита не получают заголовков
+    response = await async_client.get("/health/ready")
+    assert "RateLimit-Limit" not in response.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("setup_test_db")
+async def test_auth_rate_limit_scope(monkeypatch, async_client):
+    monkeypatch.setattr(
+        settings.RATE_LIMIT,
+        "ROUTES",
+        {"/auth/login/": "1/hour", "/auth/": "2/hour"},
+    )
+    response = await async_client.post(
+        "/auth/login/",
+        data={"username": "existing_user", "password": "Password1!"},
+    )
+    tokens = response.json()
+    # по IP ограничен только вход: refresh считается по refresh-токену,
+    # маршруты с токеном доступа - по пользователю
+    response = await async_client.post(
+        "/auth/refresh/", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    assert response.headers["RateLimit-Remaining"] == "1"
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    for remaining in ("1", "0"):
+        response = await async_client.get("/auth/api-keys/", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Remaining"] == remaining
+    response = await async_client.get("/auth/api-keys/", headers=headers)
+    assert response.status_code == 429
+    response = await async_client.post(
+        "/auth/login/",
+        data={"username": "existing_user", "password": "Password1!"},
+    )
+    assert response.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_auth_rate_limit_forwarded_for(monkeypatch, async_client):
+    monkeypatch.setattr(
+        settings.RATE_LIMIT, "ROUTES", {"/auth/login/": "1/hour"}
+    )
+    monkeypatch.setattr(
+        settings.RATE_LIMIT,
+        "TRUSTED_PROXIES",
+        [ipaddress.ip_network("127.0.0.0/8")],
+    )
+    # тестовый клиент подключается с 127.0.0.1 - как доверенный прокси
+    for client in ("203.0.113.1", "203.0.113.2"):
+        response = await async_client.post(
+            "/auth/login/", data={}, headers={"X-Forwarded-For": client}
+        )
+        assert response.status_code == 422
+    response = await async_client.post(
+        "/auth/login/",
+        data={},
+        headers={"X-Forwarded-For": "198.51.100.7, 203.0.113.1"},
+    )
+    assert response.status_code == 429
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("setup_test_db")
+async def test_api_key_flow(mocker: MockerFixture, async_client):
+    response = await async_client.post(
+        "/auth/login/",
+        data={"username": "existing_user", "password": "Password1!"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await async_client.post(
+        "/auth/api-keys/", json={"name": "etl"}, headers=auth
+    )
+    assert response.status_code == 201
+    created = response.json()
+    assert created["name"] == "etl"
+    assert created["key"].startswith(f"cx_{created['prefix']}_")
+
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=mocker.AsyncMock,
+        return_value={"currencies": {"USD": "US dollar", "EUR": "euro"}},
+    )
+    verify_password = mocker.spy(get_pwd_context(), "verify")
+    response = await async_client.get(
+        "/currency/list/", headers={"X-API-Key": created["key"]}
+    )
+    assert response.status_code == 200
+    # ключ проверяется без хеширования пароля
+    verify_password.assert_not_called()
+
+    response = await async_client.get("/auth/api-keys/", headers=auth)
+    assert [item["prefix"] for item in response.json()] == [created["prefix"]]
+    assert "key" not in response.json()[0]
+
+    response = await async_client.delete(
+        f"/auth/api-keys/{created['prefix']}/", headers=auth
+    )
+    assert response.status_code == 200
+    response = await async_client.get(
+        "/currency/list/", headers={"X-API-Key": created["key"]}
+    )
+    assert response.status_code == 401
+    assert response.json() == {"message": "API-ключ недействителен"}
+    response = await async_client.delete(
+        f"/auth/api-keys/{created['prefix']}/", headers=auth
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_currency_requires_credentials(async_client):
+    response = await async_client.get("/currency/list/")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+async def login(async_client) -> dict:
+    response = await async_client.post(
+        "/auth/login/",
+        data={"username": "existing_user", "password": "Password1!"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    return response.json()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("setup_test_db")
+async def test_logout_revokes_access_token(async_client):
+    tokens = await login(async_client)
+    auth = {"Authorization": f"Bearer {tokens['access_token']}"}
+    response = await async_client.post(
+        "/auth/logout/",
+        json={"refresh_token": tokens["refresh_token"]},
+        headers=auth,
+    )
+    assert response.status_code == 200
+    response = await async_client.get("/auth/api-keys/", headers=auth)
+    assert response.status_code == 401
+    assert response.json() == {"message": "Токен отозван"}
+    # повторный выход с отозванным токеном доступа
+    tokens = await login(async_client)
+    response = await async_client.post(
+        "/auth/logout/",
+        json={"refresh_token": tokens["refresh_token"]},
+        headers=auth,
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("setup_test_db")
+@pytest.mark.parametrize("access_token", ["expired", "invalid"])
+async def test_logout_with_bad_access_token(
+    async_client, monkeypatch, access_token
+):
+    tokens = await login(async_client)
+    if access_token == "expired":
+        monkeypatch.setattr(settings.JWT, "EXPIRES_MINUTES", -1)
+        access_token = create_jwt_token({"sub": "existing_user"})
+    response = await async_client.post(
+        "/auth/logout/",
+        json={"refresh_token": tokens["refresh_token"]},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert response.status_code == 200
+    # refresh-токен отозван, истекший токен доступа не записан в отзывы
+    response = await async_client.post(
+        "/auth/refresh/", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    assert len(get_revocation_list()) == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("setup_test_db")
+async def test_revoke_all_tokens(async_client):
+    first, second = await login(async_client), await login(async_client)
+    response = await async_client.post(
+        "/auth/revoke-all/",
+        headers={"Authorization": f"Bearer {first['access_token']}"},
+    )
+    assert response.status_code == 200
+    for tokens in (first, second):
+        response = await async_client.get(
+            "/auth/api-keys/",
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        )
+        assert response.status_code == 401
+        response = await async_client.post(
+            "/auth/refresh/", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 401
+    # токены, выданные после отзыва, действуют
+    tokens = await login(async_client)
+    response = await async_client.get(
+        "/auth/api-keys/",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("setup_test_db", "admin_token")
+async def test_admin_revoke_user_tokens(async_client):
+    tokens = await login(async_client)
+    response = await async_client.delete("/admin/users/existing_user/tokens/")
+    assert response.status_code == 200
+    with pytest.raises(InvalidTokenException):
+        decode_jwt_token(tokens["access_token"])
+    response = await async_client.post(
+        "/auth/refresh/", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("setup_test_db", "admin_token")
+async def test_admin_revoke_unknown_user_tokens(async_client):
+    response = await async_client.delete("/admin/users/unknown/tokens/")
+    assert response.status_code == 404
+    assert response.json() == {"message": "Пользователь 'unknown' не найден."}
@@ -1,12 +1,18 @@
 import pytest
 
 from app.api.errors.exceptions import (
+    ApiKeyNotFoundException,
     AuthorizationException,
     CustomException,
     ExternalAPIDataError,
     ExternalAPIHTTPError,
+    ForbiddenException,
     InvalidTokenException,
+    RateLimitExceededException,
+    ShuttingDownException,
     UniqueFieldException,
+    UnknownCurrencyException,
+    UserNotFoundException,
     UserUnauthorisedException,
 )
 
@@ -77,3 +83,41 @@ def test_external_api_data_error():
     exc = ExternalAPIDataError(detail, ext_api_data)
     assert exc.detail == detail
     assert exc.ext_api_data == ext_api_data
+
+
+def test_shutting_down_exception():
+    exc = ShuttingDownException()
+    assert exc.detail == "Сервис останавливается, повторите запрос позже."
+    assert exc.headers == {"Connection": "close", "Retry-After": "1"}
+
+
+def test_unknown_currency_exception():
+    exc = UnknownCurrencyException("AAA")
+    assert exc.currency == "AAA"
+    assert exc.detail == "Код валюты 'AAA' не найден."
+
+
+def test_api_key_not_found_exception():
+    exc = ApiKeyNotFoundException("0123456789ab")
+    assert exc.prefix == "0123456789ab"
+    assert exc.detail == "API-ключ '0123456789ab' не найден."
+
+
+def test_user_not_found_exception():
+    exc = UserNotFoundException("user")
+    assert exc.username == "user"
+    assert exc.detail == "Пользователь 'user' не найден."
+
+
+def test_forbidden_exception():
+    exc = ForbiddenException("user")
+    assert exc.username == "user"
+    assert exc.detail == "Недостаточно прав для выполнения запроса."
+
+
+def test_rate_limit_exceeded_exception():
+    exc = RateLimitExceededException("user:a", 1.5, {"Retry-After": "2"})
+    assert exc.identity == "user:a"
+    assert exc.retry_after == 1.5
+    assert exc.headers == {"Retry-After": "2"}
+    assert exc.detail == "Слишком много запросов, повторите позже."
@@ -1,4 +1,6 @@
+import asyncio
 import json
+import time
 from contextlib import nullcontext as does_not_raise
 from unittest.mock import AsyncMock, Mock
 
@@ -9,6 +11,7 @@ from pytest_mock import MockerFixture
 from app.api.errors.exceptions import (
     ExternalAPIDataError,
     ExternalAPIHTTPError,
+    UnknownCurrencyException,
 )
 from app.api.schemas.currency import (
     CurrencyAll,
@@ -16,12 +19,28 @@ from app.api.schemas.currency import (
     CurrencyResponse,
 )
 from app.api.utils.external_api import (
+    export_rate_snapshot,
     ext_api_get_currencies,
+    ext_api_get_currencies_payload,
     ext_api_get_data,
     ext_api_get_exchange,
+    ext_api_get_rate,
     ext_api_request,
+    get_cross_rates,
+    get_currencies_cache,
+    get_quotes_tiers,
+    get_rate_provider,
+    get_rates_cache,
+    get_shared_cache,
+    invalidate_rates,
+    load_cache_checkpoint,
+    make_rate_quote,
+    save_cache_checkpoint,
 )
+from app.api.utils.hedging import HedgePolicy
+from app.api.utils.rate_snapshot import RateSnapshot
 from app.core.config import settings
+from app.core.metrics import metrics
 
 
 @pytest.mark.asyncio
@@ -190,3 +209,418 @@ async def test_ext_api_get_exchange_error_cases(
     with pytest.raises(ExternalAPIDataError) as exc_info:
         await ext_api_get_exchange(currency_req)
     assert str(exc_info.value) == detail
+
+
+@pytest.mark.asyncio
+async def test_ext_api_get_currencies_cached(mocker: MockerFixture):
+    mock_data = {"currencies": {"USD": "United States Dollar"}}
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value=mock_data,
+    )
+    first = await ext_api_get_currencies()
+    second = await ext_api_get_currencies()
+    assert first == second == CurrencyAll(**mock_data)
+    mock_ext_api.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_currencies_payload_follows_list(mocker: MockerFixture):
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value={"currencies": {"USD": "United States Dollar"}},
+    )
+    first = await ext_api_get_currencies_payload()
+    assert await ext_api_get_currencies_payload() is first
+    currencies_cache = get_currencies_cache()
+    assert currencies_cache.remaining_ttl("payload") == pytest.approx(
+        currencies_cache.remaining_ttl("currencies"), abs=0.1
+    )
+    # список заменен (например, загружен из сохраненного кеша или L2) -
+    # сжатый ответ строится заново и истекает вместе с новым списком
+    currencies_cache.set(
+        "currencies", CurrencyAll(currencies={"EUR": "Euro"}), ttl=5
+    )
+    second = await ext_api_get_currencies_payload()
+    assert json.loads(second.variants["identity"]) == {
+        "currencies": {"EUR": "Euro"}
+    }
+    assert currencies_cache.remaining_ttl("payload") == pytest.approx(
+        5, abs=0.1
+    )
+
+
+@pytest.mark.asyncio
+async def test_ext_api_get_exchange_uses_cached_rate(mocker: MockerFixture):
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value={"result": 93},
+    )
+    await ext_api_get_exchange(
+        CurrencyRequest(currency_1="USD", currency_2="EUR", amount=100)
+    )
+    result = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="USD", currency_2="EUR", amount=10)
+    )
+    assert result.result == pytest.approx(9.3)
+    mock_ext_api.assert_awaited_once()
+    # обратная пара выводится из известного курса
+    inverse = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="EUR", currency_2="USD", amount=9.3)
+    )
+    assert inverse.result == pytest.approx(10)
+    mock_ext_api.assert_awaited_once()
+    # курс с неизвестной валютой требует нового запроса
+    await ext_api_get_exchange(
+        CurrencyRequest(currency_1="EUR", currency_2="RUB", amount=10)
+    )
+    assert mock_ext_api.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_ext_api_request_cancelled_by_caller(mocker: MockerFixture):
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    mocker.patch("httpx.AsyncClient.get", side_effect=slow_get)
+    request = asyncio.create_task(ext_api_request("url"))
+    await asyncio.sleep(0.01)
+    request.cancel()
+    # отмена обработчика не подменяется ShuttingDownException
+    with pytest.raises(asyncio.CancelledError):
+        await request
+
+
+def test_make_rate_quote():
+    quote = make_rate_quote(("USD", "EUR"), 0.93)
+    assert quote.rate == 0.93
+    # версия не меняется, если курс остался прежним
+    assert make_rate_quote(("USD", "EUR"), 0.93).version == quote.version
+    assert make_rate_quote(("USD", "EUR"), 0.94).version != quote.version
+    assert make_rate_quote(("EUR", "USD"), 0.93).version != quote.version
+
+
+@pytest.mark.asyncio
+async def test_ext_api_get_rate(mocker: MockerFixture):
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value={"result": 0.93},
+    )
+    quote = await ext_api_get_rate("USD", "EUR")
+    assert quote == make_rate_quote(("USD", "EUR"), 0.93)
+    # курс сохранен в кеш общим с конвертацией во float
+    assert await ext_api_get_rate("USD", "EUR") == quote
+    mock_ext_api.assert_awaited_once()
+    assert mock_ext_api.await_args.kwargs["amount"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ext_api_request_hedged(mocker: MockerFixture):
+    responses = [10, 0]
+
+    async def get(*args, **kwargs):
+        delay = responses.pop(0)
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"delay": delay})
+
+    mock_get = mocker.patch("httpx.AsyncClient.get", side_effect=get)
+    mocker.patch(
+        "app.api.utils.external_api.get_hedge_policy",
+        return_value=HedgePolicy(
+            percentile=95, initial_delay=0.01, max_ratio=1
+        ),
+    )
+    assert await ext_api_request("url") == {"delay": 0}
+    assert mock_get.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_ext_api_quotes_mode(mocker: MockerFixture, monkeypatch):
+    monkeypatch.setattr(settings.CURRENCY, "FETCH_MODE", "quotes")
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value={"quotes": {"USDEUR": 0.8, "USDRUB": 80}},
+    )
+    result = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="USD", currency_2="EUR", amount=10)
+    )
+    assert result.result == 8
+    mock_ext_api.assert_awaited_once_with(
+        settings.CURRENCY.URL_LIVE, base="USD"
+    )
+    # курсы всех валют к USD загружены одним запросом
+    result = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="RUB", currency_2="EUR", amount=100)
+    )
+    assert result.result == pytest.approx(1)
+    with pytest.raises(UnknownCurrencyException):
+        await ext_api_get_exchange(
+            CurrencyRequest(currency_1="USD", currency_2="AAA")
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fetch_mode", ["quotes", "convert"])
+async def test_ext_api_same_currency(
+    mocker: MockerFixture, monkeypatch, fetch_mode
+):
+    monkeypatch.setattr(settings.CURRENCY, "FETCH_MODE", fetch_mode)
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value={"quotes": {"USDEUR": 0.8}},
+    )
+    result = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="USD", currency_2="USD", amount=10)
+    )
+    assert result.result == 10
+    mock_ext_api.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ext_api_quotes_validation(mocker: MockerFixture, monkeypatch):
+    monkeypatch.setattr(settings.CURRENCY, "FETCH_MODE", "quotes")
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value={"quotes": {"USDEUR": -1}},
+    )
+    with pytest.raises(ExternalAPIDataError):
+        await ext_api_get_exchange(
+            CurrencyRequest(currency_1="USD", currency_2="EUR")
+        )
+
+
+@pytest.mark.asyncio
+async def test_file_provider_offline(tmp_path, monkeypatch, mocker):
+    path = tmp_path / "rates.csv"
+    path.write_text("Date, USD\n16 October 2026, 1.25\n", encoding="utf-8")
+    monkeypatch.setattr(settings.CURRENCY, "PROVIDERS", ["file"])
+    monkeypatch.setattr(settings.CURRENCY, "FILE_PATH", str(path))
+    mock_ext_api = mocker.patch("app.api.utils.external_api.ext_api_request")
+    assert [p.name for p in get_rate_provider().providers] == ["file"]
+    result = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="USD", currency_2="EUR", amount=5)
+    )
+    assert result.result == pytest.approx(4)
+    currencies = await ext_api_get_currencies()
+    assert currencies.currencies == {
+        "EUR": "Euro",
+        "USD": "United States Dollar",
+    }
+    mock_ext_api.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ext_api_request_not_json(mocker: MockerFixture):
+    mocker.patch(
+        "httpx.AsyncClient.get",
+        return_value=httpx.Response(200, text="<html>"),
+    )
+    with pytest.raises(ExternalAPIDataError) as exc_info:
+        await ext_api_request("url")
+    assert exc_info.value.ext_api_data == "<html>"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_fallback(tmp_path, monkeypatch, mocker):
+    path = tmp_path / "rates.snapshot"
+    rates_cache = get_rates_cache()
+    rates_cache.set(("USD", "EUR"), make_rate_quote(("USD", "EUR"), 0.8))
+    rates_cache.set(("USD", "RUB"), make_rate_quote(("USD", "RUB"), 80), 10)
+    get_currencies_cache().set(
+        "currencies", CurrencyAll(currencies={"USD": "United States Dollar"})
+    )
+    assert export_rate_snapshot(str(path)) == 2
+    with RateSnapshot(path) as snapshot:
+        assert snapshot.get("USD", "EUR").rate == 0.8
+        assert snapshot.names == {"USD": "United States Dollar"}
+        # время получения курса - по оставшемуся времени жизни записи
+        fetched_at = snapshot.get("USD", "RUB").fetched_at
+        assert fetched_at == pytest.approx(
+            snapshot.created_at - (rates_cache.ttl - 10), abs=1
+        )
+    rates_cache.clear()
+    monkeypatch.setattr(
+        settings.CURRENCY, "PROVIDERS", ["apilayer", "snapshot"]
+    )
+    monkeypatch.setattr(settings.CURRENCY, "SNAPSHOT_PATH", str(path))
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        side_effect=ExternalAPIHTTPError("network"),
+    )
+    # внешний API недоступен: курс из снимка
+    result = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="USD", currency_2="EUR", amount=5)
+    )
+    assert result.result == 4
+    mock_ext_api.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_not_used_while_apilayer_healthy(
+    tmp_path, monkeypatch, mocker
+):
+    path = tmp_path / "rates.snapshot"
+    get_rates_cache().set(("USD", "EUR"), make_rate_quote(("USD", "EUR"), 0.8))
+    export_rate_snapshot(str(path))
+    get_rates_cache().clear()
+    monkeypatch.setattr(
+        settings.CURRENCY, "PROVIDERS", ["apilayer", "snapshot"]
+    )
+    monkeypatch.setattr(settings.CURRENCY, "SNAPSHOT_PATH", str(path))
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        return_value={"result": 0.9},
+    )
+    snapshot_convert = mocker.spy(get_rate_provider().providers[1], "convert")
+    for _ in range(10):
+        get_rates_cache().clear()
+        result = await ext_api_get_exchange(
+            CurrencyRequest(currency_1="USD", currency_2="EUR")
+        )
+        assert result.result == pytest.approx(0.9)
+    assert mock_ext_api.await_count == 10
+    snapshot_convert.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_cache_checkpoint(tmp_path, mocker):
+    path = str(tmp_path / "cache.json")
+    rates_cache = get_rates_cache()
+    rates_cache.set(("USD", "EUR"), make_rate_quote(("USD", "EUR"), 0.8))
+    rates_cache.set(("USD", "RUB"), make_rate_quote(("USD", "RUB"), 80), 10)
+    get_currencies_cache().set(
+        "currencies", CurrencyAll(currencies={"USD": "Доллар"})
+    )
+    assert save_cache_checkpoint(path) == 2
+    rates_cache.clear()
+    get_currencies_cache().clear()
+
+    assert load_cache_checkpoint(path) == 2
+    assert rates_cache.get(("USD", "EUR")) == make_rate_quote(
+        ("USD", "EUR"), 0.8
+    )
+    # записи живут столько, сколько им оставалось
+    assert rates_cache.remaining_ttl(("USD", "RUB")) == pytest.approx(
+        10, abs=1
+    )
+    assert rates_cache.remaining_ttl(("USD", "EUR")) == pytest.approx(
+        rates_cache.ttl, abs=1
+    )
+    mock_ext_api = mocker.patch("app.api.utils.external_api.ext_api_request")
+    currencies = await ext_api_get_currencies()
+    assert currencies.currencies == {"USD": "Доллар"}
+    mock_ext_api.assert_not_called()
+
+
+def test_cache_checkpoint_expired(tmp_path, mocker):
+    path = str(tmp_path / "cache.json")
+    rates_cache = get_rates_cache()
+    rates_cache.set(("USD", "EUR"), make_rate_quote(("USD", "EUR"), 0.8), 10)
+    rates_cache.set(("USD", "RUB"), make_rate_quote(("USD", "RUB"), 80))
+    save_cache_checkpoint(path)
+    rates_cache.clear()
+    # после перезапуска прошло 30 секунд
+    mocker.patch("time.time", return_value=time.time() + 30)
+    assert load_cache_checkpoint(path) == 1
+    assert ("USD", "EUR") not in rates_cache
+    assert rates_cache.remaining_ttl(("USD", "RUB")) == pytest.approx(
+        rates_cache.ttl - 30, abs=1
+    )
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_between_workers(tmp_path, monkeypatch, mocker):
+    monkeypatch.setattr(
+        settings.CURRENCY, "SHARED_CACHE_PATH", str(tmp_path / "shared.db")
+    )
+    mock_ext_api = mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        side_effect=[{"result": 8}, {"currencies": {"USD": "Доллар"}}],
+    )
+    request = CurrencyRequest(currency_1="USD", currency_2="EUR", amount=10)
+    assert (await ext_api_get_exchange(request)).result == 8
+    assert (await ext_api_get_currencies()).currencies == {"USD": "Доллар"}
+    # другой процесс хоста: свой пустой L1, общий L2
+    get_rates_cache().clear()
+    get_currencies_cache().clear()
+    request = CurrencyRequest(currency_1="USD", currency_2="EUR", amount=5)
+    assert (await ext_api_get_exchange(request)).result == 4
+    assert (await ext_api_get_currencies()).currencies == {"USD": "Доллар"}
+    assert mock_ext_api.await_count == 2
+    assert metrics.value("rates_cache_l2_hits_total") == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shared", [True, False])
+async def test_quotes_mode_single_flight(tmp_path, monkeypatch, shared):
+    monkeypatch.setattr(settings.CURRENCY, "FETCH_MODE", "quotes")
+    if shared:
+        monkeypatch.setattr(
+            settings.CURRENCY,
+            "SHARED_CACHE_PATH",
+            str(tmp_path / "shared.db"),
+        )
+    calls = 0
+
+    async def get_quotes(base):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"EUR": 0.8, "RUB": 80}
+
+    monkeypatch.setattr(get_rate_provider(), "get_quotes", get_quotes)
+    request = CurrencyRequest(currency_1="USD", currency_2="EUR", amount=10)
+    results = await asyncio.gather(
+        *(ext_api_get_exchange(request) for _ in range(20))
+    )
+    assert [result.result for result in results] == [8] * 20
+    assert calls == 1
+    assert get_rates_cache().get(("USD", "RUB")).rate == 80
+    # в кеше уже есть загрузка к USD: неизвестная валюта не запрашивается
+    with pytest.raises(UnknownCurrencyException):
+        await ext_api_get_exchange(
+            CurrencyRequest(currency_1="USD", currency_2="AAA")
+        )
+    assert calls == 1
+    if shared:
+        # другой процесс хоста: свой пустой L1, курсы пар - из общего L2
+        get_rates_cache().clear()
+        get_quotes_tiers().l1.clear()
+        request = CurrencyRequest(currency_1="USD", currency_2="RUB")
+        assert (await ext_api_get_exchange(request)).result == 80
+        assert calls == 1
+        assert get_shared_cache().get("rate:USD/EUR")[0] == "0.8"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_rates_by_base(tmp_path, monkeypatch, mocker):
+    monkeypatch.setattr(
+        settings.CURRENCY, "SHARED_CACHE_PATH", str(tmp_path / "shared.db")
+    )
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        new_callable=AsyncMock,
+        side_effect=[{"result": 0.8}, {"result": 100}, {"result": 1.3}],
+    )
+    for pair in ("USD/EUR", "EUR/RUB", "GBP/USD"):
+        first, second = pair.split("/")
+        await ext_api_get_exchange(
+            CurrencyRequest(currency_1=first, currency_2=second)
+        )
+    assert get_cross_rates().get("USD", "RUB").rate == pytest.approx(80)
+
+    # пары с EUR в любой позиции, в обоих уровнях
+    assert await invalidate_rates("EUR") == 2
+    assert set(get_rates_cache()) == {("GBP", "USD")}
+    assert get_shared_cache().count() == 1
+    assert get_cross_rates().get("USD", "RUB") is None
@@ -0,0 +1,135 @@
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.api.errors.exceptions import (
+    ExternalAPIDataError,
+    ExternalAPIHTTPError,
+)
+from app.api.schemas.currency import CurrencyRequest
+from app.api.utils.external_api import (
+    close_http_client,
+    ext_api_get_currencies,
+    ext_api_get_exchange,
+    ext_api_request,
+    use_http_client,
+)
+from app.core.config import settings
+from benchmarks.bench_upstream import format_report, run
+from benchmarks.fake_upstream import FakeUpstreamConfig, create_fake_upstream
+
+
+def make_client(app):
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://fake"
+    )
+
+
+@pytest_asyncio.fixture
+async def fake_upstream():
+    """Фейковый API вместо внешнего: create(**config) -> app."""
+
+    def create(**config):
+        app = create_fake_upstream(FakeUpstreamConfig(seed=1, **config))
+        use_http_client(make_client(app))
+        return app
+
+    yield create
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_fake_upstream_endpoints():
+    async with make_client(create_fake_upstream()) as client:
+        response = await client.get(settings.CURRENCY.URL_LIST)
+        assert response.json()["currencies"]["EUR"] == "Euro"
+        url = settings.CURRENCY.URL_EXCHANGE.format(
+            currency_1="USD", currency_2="EUR", amount=10
+        )
+        response = await client.get(url)
+        assert response.json()["result"] == pytest.approx(9.2)
+        url = settings.CURRENCY.URL_EXCHANGE.format(
+            currency_1="USD", currency_2="AAA", amount=10
+        )
+        assert (await client.get(url)).status_code == 402
+        response = await client.get(
+            settings.CURRENCY.URL_LIVE.format(base="EUR")
+        )
+        assert response.json()["quotes"]["EURUSD"] == pytest.approx(1 / 0.92)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "config, status_code",
+    [
+        ({"error_rate": 1}, 500),
+        ({"payment_required_rate": 1}, 402),
+        ({"rate_limit_rate": 1}, 429),
+        ({"api_key": "secret"}, 401),
+    ],
+)
+async def test_fake_upstream_faults(config, status_code):
+    app = create_fake_upstream(FakeUpstreamConfig(**config))
+    async with make_client(app) as client:
+        response = await client.get(settings.CURRENCY.URL_LIST)
+    assert response.status_code == status_code
+    assert sum(app.state.upstream.outcomes.values()) == 1
+
+
+def test_fake_upstream_latency():
+    upstream = create_fake_upstream(
+        FakeUpstreamConfig(latency_ms=20, tail_rate=0.5, tail_latency_ms=900)
+    ).state.upstream
+    latencies = {upstream.latency() for _ in range(100)}
+    assert latencies == {0.02, 0.9}
+    upstream = create_fake_upstream(
+        FakeUpstreamConfig(latency_ms=20, latency_sigma=0.5, seed=1)
+    ).state.upstream
+    latencies = sorted(upstream.latency() for _ in range(1001))
+    assert latencies[0] < latencies[500] < latencies[-1]
+    assert latencies[500] == pytest.approx(0.02, rel=0.2)
+
+
+@pytest.mark.asyncio
+async def test_exchange_via_fake_upstream(fake_upstream, mocker):
+    # запросы к внешнему API передают API-ключ из настроек
+    app = fake_upstream(api_key="secret")
+    mocker.patch.object(settings.CURRENCY, "API_KEY", "secret")
+    result = await ext_api_get_exchange(
+        CurrencyRequest(currency_1="USD", currency_2="JPY", amount=2)
+    )
+    assert result.result == pytest.approx(300.5)
+    currencies = await ext_api_get_currencies()
+    assert "KWD" in currencies.currencies
+    assert sum(app.state.upstream.requests.values()) == 2
+
+
+@pytest.mark.asyncio
+async def test_malformed_payloads(fake_upstream):
+    fake_upstream(malformed_rate=1)
+    for _ in range(5):
+        with pytest.raises(ExternalAPIDataError):
+            await ext_api_get_exchange(
+                CurrencyRequest(currency_1="USD", currency_2="EUR")
+            )
+
+
+@pytest.mark.asyncio
+async def test_rate_limited(fake_upstream):
+    fake_upstream(rate_limit_rate=1)
+    with pytest.raises(ExternalAPIHTTPError) as exc_info:
+        await ext_api_request(settings.CURRENCY.URL_LIST)
+    assert exc_info.value.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_bench_upstream():
+    report = await run(
+        FakeUpstreamConfig(latency_ms=1, error_rate=0.2, seed=1),
+        requests=50,
+        concurrency=10,
+    )
+    assert len(report.latencies) + sum(report.errors.values()) == 50
+    assert report.errors["ExternalAPIHTTPError"] > 0
+    assert report.upstream_requests >= 50
+    assert "p99" in format_report(report)
@@ -0,0 +1,110 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.api.utils.fixed_point import (
+    convert_minor_batch,
+    divide_rounded,
+    from_minor,
+    minor_units,
+    rate_to_fixed,
+    to_minor,
+)
+from benchmarks.bench_exact_conversion import format_report, run
+
+
+@pytest.mark.parametrize(
+    "currency, expected",
+    [("USD", 2), ("JPY", 0), ("KWD", 3), ("CLF", 4), ("ZZZ", 2)],
+)
+def test_minor_units(currency, expected):
+    assert minor_units(currency) == expected
+
+
+def test_to_minor_and_back():
+    assert to_minor(Decimal("12.34"), 2) == 1234
+    assert to_minor(Decimal("12.3"), 2) == 1230
+    assert to_minor(Decimal("1E+2"), 0) == 100
+    assert from_minor(1234, 2) == Decimal("12.34")
+    assert str(from_minor(1230, 2)) == "12.30"
+    assert str(from_minor(5, 3)) == "0.005"
+
+
+def test_to_minor_rejects_extra_digits():
+    with pytest.raises(ValueError):
+        to_minor(Decimal("1.005"), 2)
+    with pytest.raises(ValueError):
+        to_minor(Decimal("1.5"), 0)
+    # вне диапазона Decimal - ValueError, а не decimal.Overflow
+    with pytest.raises(ValueError):
+        to_minor(Decimal("1E+1000000"), 2)
+
+
+def test_rate_to_fixed():
+    # через repr, а не двоичное значение float
+    assert rate_to_fixed(0.1, 10) == 1_000_000_000
+    assert rate_to_fixed(Decimal("1.23456789015"), 10) == 12_345_678_902
+    assert rate_to_fixed(150.25, 0) == 150
+
+
+@pytest.mark.parametrize(
+    "rounding, expected",
+    [
+        ("ROUND_HALF_EVEN", [2, 2, 4, 3]),
+        ("ROUND_HALF_UP", [3, 2, 5, 3]),
+        ("ROUND_DOWN", [2, 2, 4, 2]),
+        ("ROUND_UP", [3, 3, 5, 3]),
+    ],
+)
+def test_divide_rounded(rounding, expected):
+    # 2.5, 2.25, 4.5, 2.75
+    cases = [(5, 2), (9, 4), (9, 2), (11, 4)]
+    assert [divide_rounded(n, d, rounding) for n, d in cases] == expected
+
+
+@pytest.mark.parametrize(
+    "rounding",
+    ["ROUND_HALF_EVEN", "ROUND_HALF_UP", "ROUND_DOWN", "ROUND_UP"],
+)
+@pytest.mark.parametrize(
+    "from_exponent, to_exponent", [(2, 2), (2, 0), (0, 3), (3, 2)]
+)
+def test_convert_minor_batch_matches_decimal(
+    rounding, from_exponent, to_exponent
+):
+    rng = random.Random(rounding)
+    rate_digits = 10
+    rate = rng.randint(1, 10**13)
+    amounts = [rng.randint(1, 10**12) for _ in range(200)]
+    exact_rate = from_minor(rate, rate_digits)
+    quantum = Decimal(1).scaleb(-to_exponent)
+    expected = [
+        to_minor(
+            (from_minor(amount, from_exponent) * exact_rate).quantize(
+                quantum, rounding=rounding
+            ),
+            to_exponent,
+        )
+        for amount in amounts
+    ]
+    result = convert_minor_batch(
+        amounts, rate, rate_digits, from_exponent, to_exponent, rounding
+    )
+    assert result == expected
+
+
+def test_convert_minor_batch_integer_rate():
+    # делитель сокращается до 1 - только умножение
+    assert convert_minor_batch([1, 250], 2 * 10**4, 4, 2, 2) == [2, 500]
+
+
+def test_benchmark_report():
+    results = run(size=100, repeat=1)
+    assert [result.name for result in results] == [
+        "float",
+        "Decimal",
+        "fixed-point",
+    ]
+    assert all(result.per_second > 0 for result in results)
+    assert "fixed-point" in format_report(results)
@@ -6,19 +6,31 @@ from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, ValidationError
 
 from app.api.errors.exceptions import (
+    ApiKeyNotFoundException,
     ExternalAPIDataError,
     ExternalAPIHTTPError,
+    ForbiddenException,
     InvalidTokenException,
+    RateLimitExceededException,
+    ShuttingDownException,
     UniqueFieldException,
+    UnknownCurrencyException,
+    UserNotFoundException,
     UserUnauthorisedException,
 )
 from app.api.errors.handlers import (
+    api_key_not_found_exception_handler,
     authorization_exception_handler,
     external_api_data_error_handler,
     external_api_http_error_handler,
+    forbidden_exception_handler,
     global_exception_handler,
+    rate_limit_exceeded_exception_handler,
     request_validation_error_handler,
+    shutting_down_exception_handler,
     unique_field_exception_handler,
+    unknown_currency_exception_handler,
+    user_not_found_exception_handler,
     validation_error_handler,
 )
 
@@ -202,3 +214,109 @@ def test_authorization_exception_handler(caplog, exc_type, detail, cause):
         assert detail in caplog.text
     else:
         assert "Неверные учетные данные!" in caplog.text
+
+
+def test_shutting_down_exception_handler(caplog):
+    request = Request(
+        scope={
+            "type": "http",
+            "path": "/currency/list/",
+            "headers": [],
+            "query_string": b"",
+            "server": ("test", 80),
+            "scheme": "http",
+        }
+    )
+    exc = ShuttingDownException()
+    with caplog.at_level("WARNING"):
+        response = shutting_down_exception_handler(request, exc)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.headers["Connection"] == "close"
+    assert json.loads(response.body) == {"message": exc.detail}
+    assert "/currency/list/" in caplog.text
+
+
+def test_rate_limit_exceeded_exception_handler(caplog):
+    request = Request(
+        scope={
+            "type": "http",
+            "path": "/auth/login/",
+            "headers": [],
+            "query_string": b"",
+            "server": ("test", 80),
+            "scheme": "http",
+        }
+    )
+    exc = RateLimitExceededException(
+        "ip:127.0.0.1", 5, {"Retry-After": "5", "RateLimit-Remaining": "0"}
+    )
+    with caplog.at_level("WARNING"):
+        response = rate_limit_exceeded_exception_handler(request, exc)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "5"
+    assert response.headers["RateLimit-Remaining"] == "0"
+    assert json.loads(response.body) == {"message": exc.detail}
+    assert "ip:127.0.0.1" in caplog.text
+
+
+def test_unknown_currency_exception_handler(caplog):
+    request = Request(scope={"type": "http"})
+    with caplog.at_level("ERROR"):
+        response = unknown_currency_exception_handler(
+            request, UnknownCurrencyException("AAA")
+        )
+    assert response.status_code == 400
+    assert json.loads(response.body)["message"].startswith(
+        "Код валюты не найден."
+    )
+    assert "'AAA'" in caplog.text
+
+
+def test_forbidden_exception_handler(caplog):
+    request = Request(
+        scope={
+            "type": "http",
+            "path": "/admin/cache/",
+            "headers": [],
+            "query_string": b"",
+            "server": ("test", 80),
+            "scheme": "http",
+        }
+    )
+    with caplog.at_level("WARNING"):
+        response = forbidden_exception_handler(
+            request, ForbiddenException("user")
+        )
+    assert response.status_code == 403
+    assert json.loads(response.body) == {
+        "message": "Недостаточно прав для выполнения запроса."
+    }
+    assert "'user'" in caplog.text
+    assert "/admin/cache/" in caplog.text
+
+
+def test_api_key_not_found_exception_handler(caplog):
+    request = Request(scope={"type": "http"})
+    with caplog.at_level("ERROR"):
+        response = api_key_not_found_exception_handler(
+            request, ApiKeyNotFoundException("0123456789ab")
+        )
+    assert response.status_code == 404
+    assert json.loads(response.body) == {
+        "message": "API-ключ '0123456789ab' не найден."
+    }
+    assert "ApiKeyNotFoundException" in caplog.text
+
+
+def test_user_not_found_exception_handler(caplog):
+    request = Request(scope={"type": "http"})
+    with caplog.at_level("ERROR"):
+        response = user_not_found_exception_handler(
+            request, UserNotFoundException("user")
+        )
+    assert response.status_code == 404
+    assert json.loads(response.body) == {
+        "message": "Пользователь 'user' не найден."
+    }
+    assert "UserNotFoundException" in caplog.text
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.utils.external_api import get_rate_provider, get_rates_cache
+from app.core.health import HealthMonitor, pool_status
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/health.db")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_check_database(mocker: MockerFixture, engine):
+    mocker.patch("app.core.health.get_engine", return_value=engine)
+    status = await HealthMonitor().check_database(timeout=1)
+    assert status["status"] == "ok"
+    assert status["latency_ms"] >= 0
+    # соединение вернулось в пул
+    assert status["pool"]["checkedout"] == 0
+    assert pool_status(engine)["checkedin"] == 1
+
+
+@pytest.mark.asyncio
+async def test_check_database_error(mocker: MockerFixture, tmp_path):
+    # каталога базы нет - соединение не открывается
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/missing/health.db"
+    )
+    mocker.patch("app.core.health.get_engine", return_value=engine)
+    status = await HealthMonitor().check_database(timeout=1)
+    assert status["status"] == "error"
+    assert status["error"].startswith("OperationalError")
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_check_upstream_and_caches(mocker: MockerFixture, engine):
+    mocker.patch("app.core.health.get_engine", return_value=engine)
+    monitor = HealthMonitor()
+    report = await monitor.check(timeout=1)
+    assert report["upstream"]["last_success_age"] is None
+    assert report["caches"] == {"rates": 0, "currencies": 0}
+
+    provider = get_rate_provider()
+    provider.last_success = time.monotonic() - 30
+    provider.last_success_provider = "apilayer"
+    get_rates_cache().set(("USD", "EUR"), 1.0)
+    report = await monitor.check(timeout=1)
+    assert report["upstream"]["provider"] == "apilayer"
+    assert report["upstream"]["last_success_age"] == pytest.approx(30, abs=1)
+    assert report["caches"]["rates"] == 1
+    assert monitor.report is report
+    # просроченные записи не считаются
+    get_rates_cache().set(("USD", "GBP"), 1.0, ttl=-1)
+    report = await monitor.check(timeout=1)
+    assert report["caches"]["rates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_loop_lag(mocker: MockerFixture, engine):
+    mocker.patch("app.core.health.get_engine", return_value=engine)
+    monitor = HealthMonitor()
+    task = asyncio.create_task(monitor.measure_loop_lag(0.01))
+    await asyncio.sleep(0.02)
+    # блокирующий вызов задерживает цикл событий
+    time.sleep(0.2)
+    await asyncio.sleep(0.02)
+    task.cancel()
+    report = await monitor.check(timeout=1)
+    assert report["event_loop_lag_ms"] >= 150
+    # задержка сбрасывается после каждой проверки
+    report = await monitor.check(timeout=1)
+    assert report["event_loop_lag_ms"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run(mocker: MockerFixture):
+    check = mocker.patch.object(HealthMonitor, "check")
+    task = asyncio.create_task(
+        HealthMonitor().run(interval=0.01, timeout=1, loop_lag_interval=0.01)
+    )
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # первая проверка - сразу при старте
+    assert check.call_count >= 2
+    check.assert_called_with(1)
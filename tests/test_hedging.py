@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.api.utils.hedging import HedgePolicy, hedged
+from app.core.metrics import metrics
+
+
+def make_policy(**kwargs):
+    options = {
+        "percentile": 95,
+        "initial_delay": 0.05,
+        "max_ratio": 1,
+        "min_samples": 3,
+    }
+    return HedgePolicy(**(options | kwargs))
+
+
+def make_send(*delays, error=None):
+    """send(), i-й вызов которого отвечает через delays[i] секунд."""
+
+    calls = []
+
+    async def send():
+        index = len(calls)
+        calls.append(index)
+        try:
+            await asyncio.sleep(delays[index])
+        except asyncio.CancelledError:
+            calls[index] = "cancelled"
+            raise
+        if error is not None and index == 0:
+            raise error
+        return index
+
+    return send, calls
+
+
+def test_policy_delay_percentile():
+    policy = make_policy(percentile=90)
+    assert policy.delay() == 0.05
+    for seconds in range(1, 11):
+        policy.observe(seconds / 10)
+    assert policy.delay() == pytest.approx(0.9)
+    policy.percentile = 50
+    assert policy.delay() == pytest.approx(0.5)
+
+
+def test_policy_budget():
+    policy = make_policy(max_ratio=0.5, burst=1)
+    policy.on_request()
+    assert not policy.try_acquire()
+    policy.on_request()
+    assert policy.try_acquire()
+    assert not policy.try_acquire()
+    # запас жетонов ограничен burst
+    for _ in range(10):
+        policy.on_request()
+    assert policy.tokens == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    send, calls = make_send(0)
+    policy = make_policy()
+    assert await hedged(send, policy) == 0
+    assert calls == [0]
+    assert len(policy.latencies) == 1
+    assert metrics.value("upstream_hedges_total") == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged():
+    send, calls = make_send(10, 0)
+    tracked = []
+    assert await hedged(send, make_policy(), tracked.append) == 1
+    await asyncio.sleep(0)
+    # проигравший запрос отменен
+    assert calls == ["cancelled", 1]
+    assert len(tracked) == 2
+    assert metrics.value("upstream_hedges_total") == 1
+    assert metrics.value("upstream_hedge_wins_total") == 1
+    assert metrics.value("upstream_hedge_rate") == 1
+    assert metrics.value("upstream_hedge_win_rate") == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_attempt_is_observed():
+    policy = make_policy()
+    assert await hedged(make_send(10, 0)[0], policy) == 1
+    await asyncio.sleep(0)
+    # время отмененного основного запроса тоже в окне замеров: не меньше
+    # задержки, после которой отправлен хеджирующий
+    assert len(policy.latencies) == 2
+    assert max(policy.latencies) >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_primary_wins_after_hedge():
+    send, calls = make_send(0.1, 10)
+    assert await hedged(send, make_policy()) == 0
+    await asyncio.sleep(0)
+    assert calls == [0, "cancelled"]
+    assert metrics.value("upstream_hedge_win_rate") == 0
+
+
+@pytest.mark.asyncio
+async def test_hedge_covers_failed_primary():
+    send, _ = make_send(0.1, 0.2, error=ValueError("upstream"))
+    assert await hedged(send, make_policy()) == 1
+
+
+@pytest.mark.asyncio
+async def test_budget_exhausted():
+    send, calls = make_send(0.1)
+    with pytest.raises(ValueError):
+        await hedged(
+            make_send(0, error=ValueError("upstream"))[0],
+            make_policy(max_ratio=0),
+        )
+    assert await hedged(send, make_policy(max_ratio=0)) == 0
+    assert calls == [0]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_requests():
+    send, calls = make_send(10, 10)
+    tracked = []
+    request = asyncio.create_task(hedged(send, make_policy(), tracked.append))
+    await asyncio.sleep(0.1)
+    for task in tracked:
+        task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+    assert calls == ["cancelled", "cancelled"]
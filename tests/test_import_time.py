@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.import_time import (
+    PROJECT_ROOT,
+    measure_import,
+    parse_importtime,
+    total_us,
+)
+
+
+# импорт main занимает около 650-750 мс; двойного запаса хватает на
+# нагруженную машину и все еще ловит заметные регрессии, на медленных
+# CI-машинах бюджет переопределяется переменной окружения
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 1500))
+
+# импортируются при первом использовании, а не при импорте main
+DEFERRED_MODULES = [
+    "uvicorn",
+    "httpx",
+    "passlib.context",
+    "aiosqlite",
+    "asyncpg",
+    "brotli",
+]
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |     _io\n"
+        "import time:       250 |        350 |   app.core\n"
+        "import time:      1000 |       1350 | main\n"
+    )
+    records = parse_importtime(output)
+    assert [(r.module, r.depth) for r in records] == [
+        ("_io", 2),
+        ("app.core", 1),
+        ("main", 0),
+    ]
+    assert total_us(records, "main") == 1350
+
+
+def test_import_main_is_lazy():
+    # без переменных окружения: настройки не должны читаться при импорте
+    env = {"PATH": os.environ.get("PATH", "")}
+    code = (
+        "import sys, main\n"
+        "from app.core.config import get_settings\n"
+        f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])\n"
+        "print(get_settings.cache_info().currsize)\n"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert process.stdout.splitlines() == ["[]", "0"]
+
+
+def test_import_main_within_budget():
+    records = measure_import("main", repeat=5)
+    assert total_us(records, "main") / 1000 < IMPORT_BUDGET_MS
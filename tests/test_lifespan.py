@@ -0,0 +1,220 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.api.errors.exceptions import (
+    ExternalAPIHTTPError,
+    ShuttingDownException,
+)
+from app.api.middleware import in_flight
+from app.api.utils.external_api import (
+    ext_api_request,
+    get_currencies_cache,
+    get_rates_cache,
+    make_rate_quote,
+)
+from app.core.config import settings
+from app.core.lifespan import (
+    drain,
+    load_checkpoint,
+    readiness,
+    save_checkpoint_periodically,
+    shutdown,
+    start_draining,
+    sync_token_revocations_periodically,
+    warm_up,
+    warm_up_engine,
+)
+
+
+@pytest.fixture
+def not_ready(monkeypatch):
+    monkeypatch.setattr(readiness, "ready", False)
+
+
+@pytest.fixture
+def warm_up_mocks(mocker: MockerFixture):
+    return {
+        "database": mocker.patch(
+            "app.core.lifespan.warm_up_database", new_callable=AsyncMock
+        ),
+        "hash": mocker.patch("app.core.lifespan.get_password_hash"),
+        "revocations": mocker.patch(
+            "app.core.lifespan.sync_token_revocations", new_callable=AsyncMock
+        ),
+    }
+
+
+@pytest.mark.asyncio
+async def test_warm_up_engine_opens_connections(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/warm.db")
+    await warm_up_engine(engine, 3)
+    assert engine.pool.checkedin() == 3
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("not_ready")
+async def test_warm_up_prefetches_upstream(
+    mocker: MockerFixture, monkeypatch, warm_up_mocks
+):
+    monkeypatch.setattr(
+        settings.CURRENCY, "WARMUP_PAIRS", ["USD/EUR", "eur/rub"]
+    )
+
+    async def fake_request(url, **kwargs):
+        if url == settings.CURRENCY.URL_LIST:
+            return {"currencies": {"USD": "US dollar"}}
+        return {"result": 2}
+
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request", side_effect=fake_request
+    )
+    await warm_up()
+    assert readiness.ready
+    assert "currencies" in get_currencies_cache()
+    assert "payload" in get_currencies_cache()
+    assert get_rates_cache().get(("USD", "EUR")).rate == 2
+    assert get_rates_cache().get(("EUR", "RUB")).rate == 2
+    warm_up_mocks["database"].assert_awaited_once()
+    warm_up_mocks["hash"].assert_called_once()
+    warm_up_mocks["revocations"].assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("not_ready", "warm_up_mocks")
+async def test_warm_up_failure_still_ready(mocker: MockerFixture):
+    mocker.patch(
+        "app.api.utils.external_api.ext_api_request",
+        side_effect=ExternalAPIHTTPError(detail="Uh-oh", status_code=500),
+    )
+    mock_logger = mocker.patch("app.core.lifespan.logger")
+    await warm_up()
+    assert readiness.ready
+    assert "upstream" in mock_logger.warning.call_args.args[0]
+
+
+@pytest.fixture
+def draining_state(monkeypatch):
+    monkeypatch.setattr(in_flight, "count", 0)
+    monkeypatch.setattr(in_flight, "draining", False)
+    monkeypatch.setattr(readiness, "ready", True)
+    monkeypatch.setattr("app.core.lifespan._drain_task", None)
+    monkeypatch.setattr("app.core.lifespan.UPSTREAM_CANCEL_GRACE", 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("draining_state")
+async def test_drain_cancels_upstream_requests(mocker: MockerFixture):
+    async def slow_get(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    mocker.patch("httpx.AsyncClient.get", side_effect=slow_get)
+
+    async def handle_request():
+        in_flight.count += 1
+        try:
+            return await ext_api_request("url")
+        finally:
+            in_flight.count -= 1
+
+    request = asyncio.create_task(handle_request())
+    await asyncio.sleep(0.01)
+    await drain(0.1)
+    with pytest.raises(ShuttingDownException):
+        await request
+    assert in_flight.count == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("draining_state")
+async def test_drain_waits_for_requests(mocker: MockerFixture):
+    cancel = mocker.patch("app.core.lifespan.cancel_upstream_requests")
+    in_flight.count = 1
+    asyncio.get_running_loop().call_later(0.1, setattr, in_flight, "count", 0)
+    await drain(1)
+    cancel.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("draining_state")
+async def test_shutdown(mocker: MockerFixture):
+    close_client = mocker.patch(
+        "app.core.lifespan.close_http_client", new_callable=AsyncMock
+    )
+    dispose = mocker.patch(
+        "app.core.lifespan.dispose_engines", new_callable=AsyncMock
+    )
+    start_draining()
+    assert in_flight.draining
+    assert not readiness.ready
+    await shutdown()
+    close_client.assert_awaited_once()
+    dispose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("draining_state")
+async def test_checkpoint_survives_restart(
+    mocker: MockerFixture, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(
+        settings.CURRENCY, "CHECKPOINT_PATH", str(tmp_path / "cache.json")
+    )
+    mocker.patch("app.core.lifespan.close_http_client", new_callable=AsyncMock)
+    mocker.patch("app.core.lifespan.dispose_engines", new_callable=AsyncMock)
+    quote = make_rate_quote(("USD", "EUR"), 0.8)
+    get_rates_cache().set(("USD", "EUR"), quote)
+    await shutdown()
+    # перезапуск: кеш пуст, сохраненные курсы загружаются при старте
+    get_rates_cache().clear()
+    load_checkpoint()
+    assert get_rates_cache().get(("USD", "EUR")) == quote
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_saved_when_changed(mocker: MockerFixture):
+    save = mocker.patch("app.core.lifespan.save_checkpoint")
+    task = asyncio.create_task(save_checkpoint_periodically(0.01))
+    await asyncio.sleep(0.05)
+    assert save.call_count == 1
+    get_rates_cache().set(("USD", "EUR"), make_rate_quote(("USD", "EUR"), 1))
+    await asyncio.sleep(0.05)
+    assert save.call_count == 2
+    task.cancel()
+
+
+def test_load_checkpoint_broken_file(
+    mocker: MockerFixture, monkeypatch, tmp_path
+):
+    path = tmp_path / "cache.json"
+    path.write_text("{broken")
+    monkeypatch.setattr(settings.CURRENCY, "CHECKPOINT_PATH", str(path))
+    mock_logger = mocker.patch("app.core.lifespan.logger")
+    load_checkpoint()
+    mock_logger.warning.assert_called_once()
+    assert len(get_rates_cache()) == 0
+
+
+@pytest.mark.asyncio
+async def test_token_revocations_synced_periodically(mocker: MockerFixture):
+    async def failing_once():
+        if sync.await_count == 1:
+            raise OSError("db is down")
+        return 0
+
+    sync = mocker.patch(
+        "app.core.lifespan.sync_token_revocations",
+        new_callable=AsyncMock,
+        side_effect=failing_once,
+    )
+    mock_logger = mocker.patch("app.core.lifespan.logger")
+    task = asyncio.create_task(sync_token_revocations_periodically(0.01))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    # ошибка загрузки не останавливает синхронизацию
+    assert sync.await_count >= 2
+    assert "db is down" in mock_logger.warning.call_args.args[0]
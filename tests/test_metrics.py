@@ -0,0 +1,36 @@
+import pytest
+
+from app.core.metrics import Metrics
+
+
+def test_metrics_render():
+    metrics = Metrics()
+    metrics.counter("requests_total", "Запросы.")
+    metrics.gauge(
+        "half",
+        "Половина запросов.",
+        lambda: metrics.value("requests_total") / 2,
+    )
+    metrics.inc("requests_total")
+    metrics.inc("requests_total", 2)
+    assert metrics.value("half") == 1.5
+    assert metrics.render() == (
+        "# HELP requests_total Запросы.\n"
+        "# TYPE requests_total counter\n"
+        "requests_total 3\n"
+        "# HELP half Половина запросов.\n"
+        "# TYPE half gauge\n"
+        "half 1.5\n"
+    )
+    metrics.reset()
+    assert metrics.value("requests_total") == 0
+    # большие счетчики и дробные значения - без округления
+    metrics.inc("requests_total", 1234567)
+    metrics.counter("seconds_total", "Секунды.")
+    metrics.inc("seconds_total", 1234567.125)
+    rendered = metrics.render()
+    assert "requests_total 1234567\n" in rendered
+    assert "half 617283.5\n" in rendered
+    assert "seconds_total 1234567.125\n" in rendered
+    with pytest.raises(KeyError):
+        metrics.inc("unknown_total")
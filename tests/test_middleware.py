@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.middleware import InFlightMiddleware, InFlightTracker
+
+
+@pytest.fixture
+def tracker():
+    return InFlightTracker()
+
+
+@pytest.fixture
+def test_app(tracker):
+    app = FastAPI()
+    app.add_middleware(InFlightMiddleware, tracker=tracker)
+    release = asyncio.Event()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/health/ready")
+    async def health():
+        return {"status": "ready"}
+
+    app.state.release = release
+    return app
+
+
+@pytest.mark.asyncio
+async def test_counts_requests_in_flight(test_app, tracker):
+    async with AsyncClient(
+        transport=ASGITransport(app=test_app), base_url="http://test"
+    ) as client:
+        request = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.05)
+        assert tracker.count == 1
+        assert not await tracker.wait_idle(0.1)
+        test_app.state.release.set()
+        assert await tracker.wait_idle(1)
+        response = await request
+    assert response.status_code == 200
+    assert tracker.count == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_new_requests_while_draining(test_app, tracker):
+    tracker.draining = True
+    async with AsyncClient(
+        transport=ASGITransport(app=test_app), base_url="http://test"
+    ) as client:
+        response = await client.get("/slow")
+        health = await client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.headers["Connection"] == "close"
+    assert health.status_code == 200
+    assert tracker.count == 0
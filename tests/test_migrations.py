@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect, make_url, text
+
+from alembic import command
+from alembic.config import Config
+
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def sync_database_url(request, tmp_path):
+    if request.param == "sqlite":
+        return f"sqlite:///{tmp_path / 'migrations.db'}"
+    pytest.importorskip("psycopg2")
+    url = make_url(request.getfixturevalue("postgres_url"))
+    return url.set(drivername="postgresql+psycopg2").render_as_string(
+        hide_password=False
+    )
+
+
+def make_config(url: str) -> Config:
+    # без ini-файла, чтобы env.py не перенастраивал логирование
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.attributes["sqlalchemy.url"] = url
+    return config
+
+
+def get_index_names(conn, table_name: str) -> set[str]:
+    # inspect().get_indexes() в SQLite пропускает индексы по выражениям
+    if conn.dialect.name == "sqlite":
+        query = "SELECT name FROM sqlite_master WHERE tbl_name = :table"
+    else:
+        query = "SELECT indexname FROM pg_indexes WHERE tablename = :table"
+    return set(conn.execute(text(query), {"table": table_name}).scalars())
+
+
+def test_upgrade_and_downgrade(sync_database_url):
+    config = make_config(sync_database_url)
+    engine = create_engine(sync_database_url)
+    command.downgrade(config, "base")
+    try:
+        command.upgrade(config, "head")
+        tables = set(inspect(engine).get_table_names())
+        assert {
+            "users",
+            "refresh_tokens",
+            "api_keys",
+            "revoked_tokens",
+        } <= tables
+        with engine.begin() as conn:
+            # после сидирования admin c id=1 новые id выдаются без конфликта
+            conn.execute(
+                text(
+                    "INSERT INTO users (username, email, hashed_password) "
+                    "VALUES ('new_user', 'new@example.com', 'hashed')"
+                )
+            )
+            new_id = conn.execute(
+                text("SELECT id FROM users WHERE username = 'new_user'")
+            ).scalar_one()
+        assert new_id == 2
+    finally:
+        command.downgrade(config, "base")
+        tables = set(inspect(engine).get_table_names())
+        engine.dispose()
+    assert not {"users", "refresh_tokens"} & tables
+
+
+def test_case_insensitive_indexes_backfill(sync_database_url):
+    config = make_config(sync_database_url)
+    engine = create_engine(sync_database_url)
+    command.downgrade(config, "base")
+    try:
+        command.upgrade(config, "b4e81f2d6c07")
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO users (username, email, hashed_password) "
+                    "VALUES (:username, :email, 'hashed')"
+                ),
+                [
+                    {"username": "Legacy_Юзер", "email": "Legacy@Example.com"},
+                    {"username": "lower", "email": "lower@example.com"},
+                    {"username": "UPPER", "email": "UPPER@EXAMPLE.COM"},
+                ],
+            )
+        command.upgrade(config, "head")
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("SELECT username, email FROM users WHERE id > 1")
+            ).all()
+            indexes = get_index_names(conn, "users")
+    finally:
+        command.downgrade(config, "base")
+        engine.dispose()
+    assert sorted(tuple(row) for row in rows) == [
+        ("legacy_юзер", "legacy@example.com"),
+        ("lower", "lower@example.com"),
+        ("upper", "upper@example.com"),
+    ]
+    assert {"ix_users_username_lower", "ix_users_email_lower"} <= indexes
+    assert "ix_users_id" not in indexes
@@ -0,0 +1,240 @@
+import os
+
+import pytest
+
+from app.api.errors.exceptions import (
+    ExternalAPIDataError,
+    ExternalAPIHTTPError,
+    UnknownCurrencyException,
+)
+from app.api.utils.providers import (
+    LocalFileProvider,
+    ProviderAggregator,
+    SnapshotProvider,
+    is_provider_failure,
+    parse_ecb_csv,
+    parse_ecb_xml,
+)
+from app.api.utils.rate_snapshot import write_snapshot
+from app.core.metrics import metrics
+
+
+ECB_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<gesmes:Envelope xmlns:gesmes="http://www.gesmes.org/xml/2002-08-01"
+    xmlns="http://www.ecb.int/vocabulary/2002-08-01/eurofxref">
+  <gesmes:subject>Reference rates</gesmes:subject>
+  <Cube>
+    <Cube time="2026-10-16">
+      <Cube currency="USD" rate="1.25"/>
+      <Cube currency="JPY" rate="150"/>
+    </Cube>
+    <Cube time="2026-10-15">
+      <Cube currency="USD" rate="1.2"/>
+    </Cube>
+  </Cube>
+</gesmes:Envelope>
+"""
+
+ECB_CSV = "Date, USD, JPY, RUB, \n16 October 2026, 1.25, 150, N/A, \n"
+
+
+class FakeProvider:
+    def __init__(self, name, result=None, error=None, fallback=False):
+        self.name = name
+        self.fallback = fallback
+        self.result = result
+        self.error = error
+        self.calls = 0
+
+    async def convert(self, currency_1, currency_2, amount):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_parse_ecb_xml():
+    # из исторического файла - самый свежий день
+    assert parse_ecb_xml(ECB_XML) == {"USD": 1.25, "JPY": 150}
+
+
+def test_parse_ecb_csv():
+    assert parse_ecb_csv(ECB_CSV) == {"USD": 1.25, "JPY": 150}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filename, content", [("rates.xml", ECB_XML), ("rates.csv", ECB_CSV)]
+)
+async def test_local_file_provider(tmp_path, filename, content):
+    path = tmp_path / filename
+    path.write_text(content, encoding="utf-8")
+    provider = LocalFileProvider(path)
+    assert await provider.get_currencies() == {
+        "EUR": "Euro",
+        "USD": "United States Dollar",
+        "JPY": "Japanese Yen",
+    }
+    quotes = await provider.get_quotes("USD")
+    assert quotes == {"EUR": pytest.approx(0.8), "JPY": pytest.approx(120)}
+    assert await provider.convert("JPY", "USD", 300) == pytest.approx(2.5)
+    with pytest.raises(UnknownCurrencyException):
+        await provider.convert("USD", "AAA", 1)
+    with pytest.raises(UnknownCurrencyException):
+        await provider.get_quotes("AAA")
+
+
+@pytest.mark.asyncio
+async def test_local_file_provider_reloads(tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text(ECB_CSV, encoding="utf-8")
+    provider = LocalFileProvider(path)
+    assert (await provider.get_quotes("EUR"))["USD"] == 1.25
+    path.write_text("Date, USD\n17 October 2026, 1.5\n", encoding="utf-8")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+    assert await provider.get_quotes("EUR") == {"USD": 1.5}
+
+
+@pytest.mark.asyncio
+async def test_local_file_provider_errors(tmp_path):
+    with pytest.raises(ExternalAPIHTTPError) as exc_info:
+        await LocalFileProvider(tmp_path / "missing.xml").get_currencies()
+    assert exc_info.value.status_code is None
+    path = tmp_path / "broken.xml"
+    path.write_text("<Cube currency='USD'", encoding="utf-8")
+    with pytest.raises(ExternalAPIDataError):
+        await LocalFileProvider(path).get_currencies()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_provider(tmp_path):
+    path = tmp_path / "rates.snapshot"
+    write_snapshot(
+        path,
+        [(("USD", "EUR"), 0.8, 0), (("EUR", "RUB"), 100, 0)],
+        names={"USD": "United States Dollar", "EUR": "Euro"},
+    )
+    provider = SnapshotProvider(path)
+    # названия из снимка, без названия - код
+    assert await provider.get_currencies() == {
+        "EUR": "Euro",
+        "RUB": "RUB",
+        "USD": "United States Dollar",
+    }
+    assert await provider.convert("USD", "EUR", 10) == 8
+    # обратный курс пары из снимка
+    assert await provider.convert("EUR", "USD", 8) == pytest.approx(10)
+    assert await provider.get_quotes("EUR") == {
+        "RUB": 100,
+        "USD": pytest.approx(1.25),
+    }
+    with pytest.raises(UnknownCurrencyException):
+        await provider.convert("USD", "RUB", 1)
+    with pytest.raises(UnknownCurrencyException):
+        await provider.get_quotes("AAA")
+    # замененный файл открывается заново
+    write_snapshot(path, [(("USD", "EUR"), 0.9, 0)])
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+    assert await provider.convert("USD", "EUR", 10) == 9
+
+
+@pytest.mark.asyncio
+async def test_snapshot_provider_errors(tmp_path):
+    with pytest.raises(ExternalAPIHTTPError) as exc_info:
+        await SnapshotProvider(tmp_path / "missing").convert("USD", "EUR", 1)
+    assert exc_info.value.status_code is None
+    path = tmp_path / "broken.snapshot"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ExternalAPIDataError):
+        await SnapshotProvider(path).get_currencies()
+
+
+@pytest.mark.parametrize(
+    "exc, expected",
+    [
+        (ExternalAPIHTTPError("network"), True),
+        (ExternalAPIHTTPError("server", status_code=503), True),
+        (ExternalAPIHTTPError("rate limit", status_code=429), True),
+        (ExternalAPIHTTPError("bad code", status_code=402), False),
+        (ExternalAPIDataError("bad data", ext_api_data={}), True),
+        (UnknownCurrencyException("AAA"), False),
+    ],
+)
+def test_is_provider_failure(exc, expected):
+    assert is_provider_failure(exc) is expected
+
+
+@pytest.mark.asyncio
+async def test_aggregator_prefers_fastest():
+    slow, fast = FakeProvider("slow", 1), FakeProvider("fast", 2)
+    aggregator = ProviderAggregator([slow, fast], eject_seconds=30)
+    # еще не опрошенные - в порядке настроек
+    assert aggregator.ordered() == [slow, fast]
+    aggregator.observe(slow, 1.0)
+    aggregator.observe(fast, 0.1)
+    assert await aggregator.convert("USD", "EUR", 1) == 2
+    assert slow.calls == 0
+    previous = aggregator.latencies["fast"]
+    aggregator.observe(fast, 10.0)
+    assert aggregator.latencies["fast"] == pytest.approx(
+        previous + 0.2 * (10.0 - previous)
+    )
+    # медленнее другого - опрашивается вторым
+    assert aggregator.ordered() == [slow, fast]
+
+
+@pytest.mark.asyncio
+async def test_aggregator_unprobed_last():
+    first, second = FakeProvider("first", 1), FakeProvider("second", 2)
+    aggregator = ProviderAggregator([first, second], eject_seconds=30)
+    for _ in range(10):
+        assert await aggregator.convert("USD", "EUR", 1) == 1
+    # еще не опрошенный поставщик не считается самым быстрым
+    assert first.calls == 10
+    assert second.calls == 0
+    assert aggregator.ordered() == [first, second]
+
+
+@pytest.mark.asyncio
+async def test_aggregator_failover():
+    broken = FakeProvider("broken", error=ExternalAPIHTTPError("network"))
+    backup = FakeProvider("backup", 2)
+    aggregator = ProviderAggregator([broken, backup], eject_seconds=30)
+    assert aggregator.last_success is None
+    assert await aggregator.convert("USD", "EUR", 1) == 2
+    assert metrics.value("upstream_provider_failovers_total") == 1
+    assert aggregator.last_success_provider == "backup"
+    assert aggregator.last_success is not None
+    # неисправный поставщик опрашивается последним
+    assert aggregator.ordered() == [backup, broken]
+    assert await aggregator.convert("USD", "EUR", 1) == 2
+    assert broken.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_aggregator_fallback_tier():
+    snapshot = FakeProvider("snapshot", 1, fallback=True)
+    live = FakeProvider("live", 2)
+    # запасной поставщик первым в настройках и быстрее внешнего
+    aggregator = ProviderAggregator([snapshot, live], eject_seconds=30)
+    aggregator.observe(snapshot, 0.001)
+    aggregator.observe(live, 1.0)
+    for _ in range(10):
+        assert await aggregator.convert("USD", "EUR", 1) == 2
+    assert snapshot.calls == 0
+    # внешний поставщик неисправен - отвечает запасной, внешний исключен
+    live.error = ExternalAPIHTTPError("network")
+    assert await aggregator.convert("USD", "EUR", 1) == 1
+    assert aggregator.ordered() == [snapshot, live]
+    assert aggregator.last_success_provider == "snapshot"
+
+
+@pytest.mark.asyncio
+async def test_aggregator_all_failed():
+    first = FakeProvider("first", error=UnknownCurrencyException("AAA"))
+    second = FakeProvider("second", error=ExternalAPIHTTPError("network"))
+    aggregator = ProviderAggregator([first, second], eject_seconds=30)
+    with pytest.raises(UnknownCurrencyException):
+        await aggregator.convert("USD", "AAA", 1)
+    # неизвестная валюта - не неисправность поставщика
+    assert aggregator.ordered() == [first, second]
@@ -0,0 +1,169 @@
+import ipaddress
+
+import pytest
+from starlette.requests import Request
+
+from app.api.utils import rate_limit
+from app.api.utils.rate_limit import (
+    MemoryRateLimitBackend,
+    Rate,
+    RateLimiter,
+    SQLiteRateLimitBackend,
+    take_token,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake)
+    monkeypatch.setattr(rate_limit.time, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    backend = SQLiteRateLimitBackend(tmp_path / "rate_limit.db")
+    yield backend
+    backend.close()
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [("60/minute", Rate(60, 60)), ("5/second", Rate(5, 1))],
+)
+def test_rate_parse(text, expected):
+    assert Rate.parse(text) == expected
+
+
+def test_take_token():
+    rate = Rate(2, 10)
+    tokens, decision = take_token(2, 0, rate)
+    assert decision.allowed and decision.remaining == 1
+    assert decision.reset == pytest.approx(5)
+    tokens, decision = take_token(tokens, 0, rate)
+    assert decision.allowed and decision.remaining == 0
+    tokens, decision = take_token(tokens, 2, rate)
+    assert not decision.allowed
+    # до следующего жетона осталось 5 - 2 секунды
+    assert decision.retry_after == pytest.approx(3)
+    assert decision.headers() == {
+        "RateLimit-Limit": "2",
+        "RateLimit-Remaining": "0",
+        "RateLimit-Reset": "8",
+        "RateLimit-Policy": "2;w=10",
+        "Retry-After": "3",
+    }
+    # ведро не пополняется больше limit
+    _, decision = take_token(tokens, 1000, rate)
+    assert decision.remaining == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_backend(clock):
+    backend = MemoryRateLimitBackend(maxsize=10)
+    rate = Rate(3, 3)
+    results = [(await backend.hit("a", rate)).allowed for _ in range(4)]
+    assert results == [True, True, True, False]
+    # у другого клиента свое ведро
+    assert (await backend.hit("b", rate)).allowed
+    clock.now += 1
+    assert (await backend.hit("a", rate)).allowed
+    assert not (await backend.hit("a", rate)).allowed
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_maxsize(clock):
+    backend = MemoryRateLimitBackend(maxsize=2)
+    rate = Rate(1, 60)
+    for key in "abc":
+        await backend.hit(key, rate)
+    # вытеснено ведро, не использованное дольше других
+    assert list(backend._buckets) == ["b", "c"]
+    assert (await backend.hit("a", rate)).allowed
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_shared(clock, sqlite_backend):
+    # другое соединение с тем же файлом - как другой процесс
+    other = SQLiteRateLimitBackend(sqlite_backend.path)
+    rate = Rate(2, 60)
+    assert (await sqlite_backend.hit("a", rate)).allowed
+    assert (await other.hit("a", rate)).allowed
+    decision = await sqlite_backend.hit("a", rate)
+    assert not decision.allowed
+    assert decision.retry_after == pytest.approx(30)
+    clock.now += 30
+    assert (await other.hit("a", rate)).allowed
+    other.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_prune(clock, tmp_path):
+    backend = SQLiteRateLimitBackend(tmp_path / "prune.db", prune_every=2)
+    rate = Rate(1, 60)
+    await backend.hit("old", rate)
+    clock.now += 2 * 86400
+    await backend.hit("new", rate)
+    rows = backend._connect().execute("SELECT key FROM buckets").fetchall()
+    assert rows == [("new",)]
+    backend.close()
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_routes(clock):
+    limiter = RateLimiter(
+        {"/currency/": "5/minute", "/currency/exchange/": "1/minute"},
+        MemoryRateLimitBackend(maxsize=10),
+    )
+    assert limiter.match("/currency/exchange/exact/") == (
+        "/currency/exchange/",
+        Rate(1, 60),
+    )
+    assert limiter.match("/currency/list/") == ("/currency/", Rate(5, 60))
+    assert await limiter.check("/health/", "user:a") is None
+    assert (await limiter.check("/currency/exchange/", "user:a")).allowed
+    assert not (await limiter.check("/currency/exchange/", "user:a")).allowed
+    # у маршрута со своим лимитом отдельное ведро
+    decision = await limiter.check("/currency/list/", "user:a")
+    assert decision.allowed and decision.remaining == 4
+
+
+@pytest.mark.parametrize(
+    "client, forwarded_for, expected",
+    [
+        # заголовок от недоверенного клиента не учитывается
+        ("203.0.113.9", ["198.51.100.1"], "203.0.113.9"),
+        ("10.0.0.2", [], "10.0.0.2"),
+        ("10.0.0.2", ["198.51.100.1"], "198.51.100.1"),
+        # левее первого недоверенного адреса - значения клиента
+        ("10.0.0.2", ["1.1.1.1, 198.51.100.1, 10.0.0.3"], "198.51.100.1"),
+        ("10.0.0.2", ["1.1.1.1", "198.51.100.1"], "198.51.100.1"),
+        ("10.0.0.2", ["10.0.0.4,, 10.0.0.3"], "10.0.0.4"),
+        ("::1", ["2001:db8::5"], "2001:db8::5"),
+    ],
+)
+def test_client_ip(client, forwarded_for, expected):
+    limiter = RateLimiter(
+        {},
+        MemoryRateLimitBackend(maxsize=10),
+        [ipaddress.ip_network("10.0.0.0/8"), ipaddress.ip_network("::1")],
+    )
+    request = Request(
+        {
+            "type": "http",
+            "client": (client, 1234),
+            "headers": [
+                (b"x-forwarded-for", value.encode()) for value in forwarded_for
+            ],
+        }
+    )
+    assert limiter.client_ip(request) == expected
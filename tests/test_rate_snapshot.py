@@ -0,0 +1,160 @@
+import os
+
+import pytest
+
+from app.api.errors.logger import logger
+from app.api.utils.rate_snapshot import (
+    HEADER,
+    MAGIC,
+    RECORD,
+    RateSnapshot,
+    SnapshotFormatError,
+    SnapshotRate,
+    write_snapshot,
+)
+from app.core.config import settings
+from app.core.snapshot import export, format_info, main
+
+
+RATES = [
+    (("USD", "RUB"), 80.0, 1000.0),
+    (("EUR", "USD"), 1.25, 1001.0),
+    (("USD", "EUR"), 0.8, 1002.0),
+    (("JPY", "USD"), 0.0066, 1003.0),
+]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / "rates.snapshot"
+    assert write_snapshot(path, RATES, created_at=999.0) == len(RATES)
+    return path
+
+
+def test_snapshot_format(snapshot_path):
+    # заголовок, записи фиксированной длины и названия валют (JSON)
+    assert os.path.getsize(snapshot_path) == (
+        HEADER.size + RECORD.size * 4 + len(b"{}")
+    )
+    with RateSnapshot(snapshot_path) as snapshot:
+        assert len(snapshot) == 4
+        assert snapshot.created_at == 999.0
+        # записи отсортированы по паре
+        assert [pair[:2] for pair in snapshot] == [
+            ("EUR", "USD"),
+            ("JPY", "USD"),
+            ("USD", "EUR"),
+            ("USD", "RUB"),
+        ]
+
+
+def test_snapshot_get(snapshot_path):
+    with RateSnapshot(snapshot_path) as snapshot:
+        assert snapshot.get("USD", "EUR") == SnapshotRate(0.8, 1002.0)
+        assert snapshot.get("EUR", "USD") == SnapshotRate(1.25, 1001.0)
+        assert snapshot.get("RUB", "USD") is None
+        assert snapshot.get("USD", "AAA") is None
+        assert snapshot.get("US", "D") is None
+        assert snapshot.get("ДОЛ", "USD") is None
+
+
+def test_snapshot_quotes(snapshot_path):
+    with RateSnapshot(snapshot_path) as snapshot:
+        assert snapshot.quotes("USD") == {
+            "EUR": SnapshotRate(0.8, 1002.0),
+            "RUB": SnapshotRate(80.0, 1000.0),
+        }
+        assert snapshot.quotes("GBP") == {}
+
+
+def test_snapshot_empty(tmp_path):
+    path = tmp_path / "empty.snapshot"
+    write_snapshot(path, [])
+    with RateSnapshot(path) as snapshot:
+        assert len(snapshot) == 0
+        assert snapshot.get("USD", "EUR") is None
+
+
+def test_snapshot_replace_keeps_open_readers(snapshot_path):
+    # файл заменяется переименованием: открытый снимок читает старые данные
+    with RateSnapshot(snapshot_path) as old:
+        write_snapshot(snapshot_path, [(("USD", "EUR"), 0.9, 2000.0)])
+        assert old.get("USD", "EUR").rate == 0.8
+        with RateSnapshot(snapshot_path) as new:
+            assert new.get("USD", "EUR").rate == 0.9
+    # временных файлов не остается
+    assert os.listdir(snapshot_path.parent) == [snapshot_path.name]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"CXRS", b"XXXX" + bytes(HEADER.size), None],
+    ids=["empty", "short", "magic", "truncated"],
+)
+def test_snapshot_invalid(snapshot_path, content):
+    if content is None:
+        # обрезана последняя запись
+        content = snapshot_path.read_bytes()[
+            : HEADER.size + RECORD.size * 4 - 1
+        ]
+    snapshot_path.write_bytes(content)
+    with pytest.raises(SnapshotFormatError):
+        RateSnapshot(snapshot_path)
+
+
+def test_write_snapshot_invalid_pair(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(tmp_path / "rates.snapshot", [(("US", "EUR"), 1, 0)])
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_export_command(tmp_path, monkeypatch):
+    source = tmp_path / "rates.csv"
+    source.write_text("Date, USD, RUB\n16 October 2026, 1.25, 100\n")
+    monkeypatch.setattr(settings.CURRENCY, "PROVIDERS", ["file"])
+    monkeypatch.setattr(settings.CURRENCY, "FILE_PATH", str(source))
+    path = tmp_path / "rates.snapshot"
+    # курсы всех валют к каждой из базовых
+    assert await export(["EUR", "USD"], str(path)) == 4
+    with RateSnapshot(path) as snapshot:
+        assert snapshot.get("USD", "RUB").rate == pytest.approx(80)
+        # названия валют сохранены вместе с курсами
+        assert snapshot.names["USD"] == "United States Dollar"
+        info = format_info(snapshot)
+    assert "Курсов: 4" in info
+    assert "EUR/USD: 1.25 (" in info
+
+
+def test_info_command(snapshot_path, monkeypatch, capsys):
+    monkeypatch.setattr(logger, "handlers", [])
+    monkeypatch.setattr(
+        "sys.argv", ["snapshot", "info", "--path", str(snapshot_path)]
+    )
+    main()
+    assert "Курсов: 4" in capsys.readouterr().out
+    # без lifespan логирование настраивает сама команда
+    assert logger.handlers
+
+
+def test_snapshot_names(tmp_path):
+    path = tmp_path / "rates.snapshot"
+    write_snapshot(path, RATES, names={"RUB": "Российский рубль"})
+    with RateSnapshot(path) as snapshot:
+        assert snapshot.names == {"RUB": "Российский рубль"}
+        assert len(snapshot) == len(RATES)
+    # снимок версии 1 - без названий
+    record = RECORD.pack(b"USD", b"EUR", 0.8, 1000.0)
+    path.write_bytes(HEADER.pack(MAGIC, 1, RECORD.size, 1, 999.0) + record)
+    with RateSnapshot(path) as snapshot:
+        assert snapshot.get("USD", "EUR").rate == 0.8
+        assert snapshot.names == {}
+    path.write_bytes(HEADER.pack(MAGIC, 2, RECORD.size, 1, 999.0) + record)
+    with RateSnapshot(path) as snapshot:
+        assert snapshot.names == {}
+    path.write_bytes(
+        HEADER.pack(MAGIC, 2, RECORD.size, 1, 999.0) + record + b"{bad"
+    )
+    with RateSnapshot(path) as snapshot:
+        with pytest.raises(SnapshotFormatError):
+            snapshot.names
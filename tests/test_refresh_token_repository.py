@@ -0,0 +1,120 @@
+import asyncio
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.db.models import RefreshToken, User
+from app.api.db.UoW import UserUnitOfWork
+from app.api.repositories.refresh_token_repository import (
+    AlchemyRefreshTokenRepository,
+)
+from app.api.services.user_service import UserService
+
+
+@pytest.fixture
+def database_url(all_backends_database_url):
+    return all_backends_database_url
+
+
+@pytest_asyncio.fixture
+async def token_repository(async_session):
+    return AlchemyRefreshTokenRepository(async_session)
+
+
+@pytest_asyncio.fixture
+async def existing_user(setup_test_db, async_session):
+    res = await async_session.execute(
+        select(User).where(User.username == "existing_user")
+    )
+    return res.scalar_one()
+
+
+def make_token(user_id, token_hash, days=1):
+    return RefreshToken(
+        token_hash=token_hash,
+        user_id=user_id,
+        expires_at=datetime.datetime.now(datetime.UTC)
+        + datetime.timedelta(days=days),
+    )
+
+
+@pytest.mark.asyncio
+async def test_add_one_and_get_by_hash(token_repository, existing_user):
+    await token_repository.add_one(make_token(existing_user.id, "a" * 64))
+    found = await token_repository.get_by_hash("a" * 64)
+    assert found is not None
+    assert found.revoked is False
+    assert found.user.username == "existing_user"
+    assert not found.is_expired
+
+    not_found = await token_repository.get_by_hash("b" * 64)
+    assert not_found is None
+
+
+@pytest.mark.asyncio
+async def test_expired_token(token_repository, existing_user):
+    await token_repository.add_one(
+        make_token(existing_user.id, "c" * 64, days=-1)
+    )
+    found = await token_repository.get_by_hash("c" * 64)
+    assert found.is_expired
+
+
+@pytest.mark.asyncio
+async def test_revoke_all_for_user(
+    token_repository, existing_user, async_session
+):
+    await token_repository.add_one(make_token(existing_user.id, "d" * 64))
+    await token_repository.add_one(make_token(existing_user.id, "e" * 64))
+    await token_repository.revoke_all_for_user(existing_user.id)
+    async_session.expire_all()
+    for token_hash in ("d" * 64, "e" * 64):
+        found = await token_repository.get_by_hash(token_hash)
+        assert found.revoked is True
+
+
+@pytest.mark.asyncio
+async def test_revoke_once(async_engine, existing_user, async_session):
+    await AlchemyRefreshTokenRepository(async_session).add_one(
+        make_token(existing_user.id, "f" * 64)
+    )
+    await async_session.commit()
+    session_maker = async_sessionmaker(async_engine, expire_on_commit=False)
+    async with session_maker() as first, session_maker() as second:
+        first_repo = AlchemyRefreshTokenRepository(first)
+        second_repo = AlchemyRefreshTokenRepository(second)
+        # оба запроса прочитали еще не отозванный токен
+        first_token = await first_repo.get_by_hash("f" * 64)
+        second_token = await second_repo.get_by_hash("f" * 64)
+        assert not first_token.revoked and not second_token.revoked
+        assert await first_repo.revoke(first_token.id)
+        await first.commit()
+        assert not await second_repo.revoke(second_token.id)
+        await second.commit()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rotation(
+    mocker, async_engine, existing_user, async_session
+):
+    mocker.patch(
+        "app.api.db.UoW.get_session_maker",
+        return_value=async_sessionmaker(async_engine, expire_on_commit=False),
+    )
+    token = await UserService(UserUnitOfWork()).issue_refresh_token(
+        "existing_user"
+    )
+    results = await asyncio.gather(
+        UserService(UserUnitOfWork()).rotate_refresh_token(token),
+        UserService(UserUnitOfWork()).rotate_refresh_token(token),
+        return_exceptions=True,
+    )
+    # новую пару получает только один запрос, второй считается повтором
+    assert sum(isinstance(result, tuple) for result in results) == 1
+    assert sum(isinstance(result, Exception) for result in results) == 1
+    async_session.expire_all()
+    res = await async_session.execute(select(RefreshToken))
+    assert all(stored.revoked for stored in res.scalars())
@@ -0,0 +1,100 @@
+import math
+import time
+
+import pytest
+
+from app.api.utils.revocation import (
+    BloomFilter,
+    RevocationEntry,
+    RevocationList,
+)
+from app.core.metrics import metrics
+
+
+def make_entry(id_, jti=None, username="user", revoked_at=0, ttl=60):
+    return RevocationEntry(id_, jti, username, revoked_at, time.time() + ttl)
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"key{index}" for index in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert len(bloom) == 1000
+    # ложноотрицательных ответов нет
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other{index}" in bloom for index in range(10000))
+    assert false_positives / 10000 < 0.03
+
+
+def test_revocation_list_jti():
+    revocations = RevocationList(capacity=100, error_rate=0.01)
+    assert not revocations.is_revoked("a" * 32, "user", 100)
+    assert revocations.add(make_entry(3, jti="a" * 32))
+    # повторная загрузка записи ничего не меняет
+    assert not revocations.add(make_entry(3, jti="a" * 32))
+    assert len(revocations._bloom) == 1
+    # свои отзывы процесса не сдвигают отметку загрузки из БД
+    assert revocations.synced_until is None
+    assert revocations.is_revoked("a" * 32, "user", 100)
+    assert not revocations.is_revoked("b" * 32, "user", 100)
+    # токены без jti (выданные до появления отзыва) проверяются по
+    # пользователю
+    assert not revocations.is_revoked(None, "user", 100)
+
+
+def test_revocation_list_user():
+    revocations = RevocationList(capacity=100, error_rate=0.01)
+    revocations.add(make_entry(1, revoked_at=100))
+    assert revocations.is_revoked("a" * 32, "user", 99.5)
+    assert revocations.is_revoked(None, "user", 100)
+    # токены, выданные после отзыва, действуют
+    assert not revocations.is_revoked("a" * 32, "user", 100.5)
+    assert not revocations.is_revoked("a" * 32, "other", 50)
+    # более ранний отзыв не отменяет более поздний
+    assert not revocations.add(make_entry(2, revoked_at=50, ttl=-1))
+    assert revocations.is_revoked(None, "user", 80)
+    assert revocations.add(make_entry(3, revoked_at=200))
+    assert revocations.is_revoked(None, "user", 150)
+    assert len(revocations._bloom) == 1
+
+
+def test_revocation_list_false_positive_is_checked():
+    revocations = RevocationList(capacity=100, error_rate=0.01)
+    revocations.add(make_entry(1, jti="a" * 32))
+    # фильтр "видит" все ключи - решает точное множество
+    revocations._bloom.bits[:] = b"\xff" * len(revocations._bloom.bits)
+    assert not revocations.is_revoked("b" * 32, "other", 0)
+    assert metrics.value("token_revocation_false_positives_total") == 2
+
+
+def test_revocation_list_grows():
+    revocations = RevocationList(capacity=2, error_rate=0.01)
+    for index in range(5):
+        revocations.add(make_entry(index + 1, jti=f"{index:032}"))
+    assert revocations.capacity == 8
+    assert len(revocations) == 5
+    assert all(
+        revocations.is_revoked(f"{index:032}", "user", 0) for index in range(5)
+    )
+
+
+def test_revocation_list_prune():
+    revocations = RevocationList(capacity=100, error_rate=0.01)
+    revocations.add(make_entry(1, jti="a" * 32, ttl=-1))
+    revocations.add(make_entry(2, username="old", revoked_at=100, ttl=-1))
+    revocations.add(make_entry(3, jti="b" * 32))
+    assert revocations.prune(time.time()) == 2
+    assert len(revocations) == 1
+    assert not revocations.is_revoked("a" * 32, "old", 50)
+    assert revocations.is_revoked("b" * 32, "user", 0)
+
+
+@pytest.mark.parametrize("error_rate", [0.1, 0.001])
+def test_bloom_filter_size(error_rate):
+    bloom = BloomFilter(capacity=10000, error_rate=error_rate)
+    # ~1.44 * log2(1 / p) бит на ключ
+    bits_per_key = bloom.size / 10000
+    assert bits_per_key == pytest.approx(
+        -1.44 * math.log2(error_rate), rel=0.01
+    )
@@ -0,0 +1,74 @@
+import datetime
+
+import pytest
+import pytest_asyncio
+
+from app.api.db.models import RevokedToken
+from app.api.repositories.revoked_token_repository import (
+    AlchemyRevokedTokenRepository,
+)
+
+
+@pytest.fixture
+def database_url(all_backends_database_url):
+    return all_backends_database_url
+
+
+@pytest_asyncio.fixture
+async def revoked_token_repository(async_session):
+    return AlchemyRevokedTokenRepository(async_session)
+
+
+def make_revoked_token(jti=None, minutes=30, revoked_at=None):
+    now = datetime.datetime.now(datetime.UTC)
+    return RevokedToken(
+        jti=jti,
+        username="existing_user",
+        revoked_at=revoked_at or now,
+        expires_at=now + datetime.timedelta(minutes=minutes),
+    )
+
+
+@pytest.mark.asyncio
+async def test_list_since(revoked_token_repository):
+    now = datetime.datetime.now(datetime.UTC)
+    earlier = now - datetime.timedelta(minutes=1)
+    # id больше, но отзыв раньше (транзакции фиксируются не по порядку)
+    first = await revoked_token_repository.add_one(
+        make_revoked_token("a" * 32)
+    )
+    second = await revoked_token_repository.add_one(
+        make_revoked_token(revoked_at=earlier)
+    )
+    await revoked_token_repository.add_one(
+        make_revoked_token("b" * 32, minutes=-1)
+    )
+    # истекшие отзывы не загружаются
+    tokens = await revoked_token_repository.list_since(None)
+    assert [token.id for token in tokens] == [first.id, second.id]
+    tokens = await revoked_token_repository.list_since(earlier)
+    assert [token.id for token in tokens] == [first.id, second.id]
+    tokens = await revoked_token_repository.list_since(
+        now - datetime.timedelta(seconds=1)
+    )
+    assert [token.jti for token in tokens] == ["a" * 32]
+
+
+@pytest.mark.asyncio
+async def test_delete_expired(revoked_token_repository):
+    await revoked_token_repository.add_one(make_revoked_token("a" * 32))
+    await revoked_token_repository.add_one(
+        make_revoked_token("b" * 32, minutes=-1)
+    )
+    assert await revoked_token_repository.delete_expired() == 1
+    tokens = await revoked_token_repository.list_since(None)
+    assert [token.jti for token in tokens] == ["a" * 32]
+
+
+@pytest.mark.asyncio
+async def test_get_by_jti(revoked_token_repository):
+    token = await revoked_token_repository.add_one(
+        make_revoked_token("a" * 32)
+    )
+    assert (await revoked_token_repository.get_by_jti("a" * 32)).id == token.id
+    assert await revoked_token_repository.get_by_jti("b" * 32) is None
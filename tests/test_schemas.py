@@ -1,4 +1,5 @@
 from contextlib import nullcontext as does_not_raise
+from decimal import Decimal
 
 import pytest
 from pydantic import ValidationError
@@ -7,6 +8,8 @@ from app.api.schemas.currency import (
     CurrencyAll,
     CurrencyRequest,
     CurrencyResponse,
+    ExactBatchRequest,
+    ExactCurrencyRequest,
 )
 from app.api.schemas.users import (
     Token,
@@ -348,6 +351,58 @@ class TestCurrencySchemas:
         else:
             assert currency_obj.result == data["result"]
 
+    @pytest.mark.parametrize(
+        "currency, amount, expectation",
+        [
+            ("USD", "12.34", does_not_raise()),
+            ("USD", "12.345", pytest.raises(ValidationError)),
+            ("JPY", "1500", does_not_raise()),
+            ("JPY", "1500.5", pytest.raises(ValidationError)),
+            ("KWD", "0.125", does_not_raise()),
+            ("USD", "0", pytest.raises(ValidationError)),
+            ("USD", "NaN", pytest.raises(ValidationError)),
+            ("USD", "1E+15", does_not_raise()),
+            ("USD", "1000000000000000.01", pytest.raises(ValidationError)),
+            ("USD", "1E+100000", pytest.raises(ValidationError)),
+            ("USD", "1E+1000000", pytest.raises(ValidationError)),
+        ],
+        ids=[
+            "USD cents",
+            "Error: USD fractions of cent",
+            "JPY integer",
+            "Error: JPY fraction",
+            "KWD three digits",
+            "Error: amount = 0",
+            "Error: amount NaN",
+            "Max amount",
+            "Error: amount above max",
+            "Error: huge exponent",
+            "Error: exponent above Decimal range",
+        ],
+    )
+    def test_exact_currency_request(self, currency, amount, expectation):
+        with expectation:
+            currency_obj = ExactCurrencyRequest(
+                currency_1=currency, currency_2="EUR", amount=amount
+            )
+            assert currency_obj.amount == Decimal(amount)
+
+    def test_exact_batch_request(self):
+        request = ExactBatchRequest.model_validate(
+            {"from": "USD", "to": "EUR", "amounts": ["1.10", 2, "3"]}
+        )
+        assert request.amounts == [Decimal("1.1"), 2, 3]
+        with pytest.raises(ValidationError):
+            ExactBatchRequest(currency_1="USD", currency_2="EUR", amounts=[])
+        with pytest.raises(ValidationError):
+            ExactBatchRequest(
+                currency_1="USD", currency_2="EUR", amounts=["1", "0.001"]
+            )
+        with pytest.raises(ValidationError):
+            ExactBatchRequest(
+                currency_1="USD", currency_2="EUR", amounts=["1E+100000"]
+            )
+
     @pytest.mark.parametrize(
         "data, expectation",
         [
@@ -1,15 +1,31 @@
 import datetime
+import time
 from contextlib import nullcontext as does_not_raise
 
 import jwt
 import pytest
 
-from app.api.errors.exceptions import InvalidTokenException
-from app.core.config import settings
+from app.api.errors.exceptions import (
+    ForbiddenException,
+    InvalidTokenException,
+)
+from app.api.utils.revocation import RevocationEntry, get_revocation_list
+from app.core.config import PasswordSettings, settings
 from app.core.security import (
+    create_api_key,
     create_jwt_token,
+    create_refresh_token,
+    decode_jwt_token,
+    get_admin_username,
+    get_api_key_prefix,
     get_password_hash,
+    get_refresh_token_expiry,
     get_username_from_token,
+    hash_api_key,
+    hash_refresh_token,
+    make_pwd_context,
+    password_needs_rehash,
+    read_jwt_token,
     verify_password,
 )
 
@@ -31,6 +47,54 @@ def test_password_hash_and_verify():
     assert not verify_password("wrong_password", hashed)
 
 
+def test_password_needs_rehash():
+    assert not password_needs_rehash(get_password_hash("valid_password"))
+
+
+@pytest.mark.parametrize(
+    "old_settings, new_settings, needs_update",
+    [
+        (
+            PasswordSettings(BCRYPT_ROUNDS=4),
+            PasswordSettings(BCRYPT_ROUNDS=4),
+            False,
+        ),
+        (
+            PasswordSettings(BCRYPT_ROUNDS=4),
+            PasswordSettings(BCRYPT_ROUNDS=5),
+            True,
+        ),
+        (
+            PasswordSettings(BCRYPT_ROUNDS=5),
+            PasswordSettings(BCRYPT_ROUNDS=4),
+            True,
+        ),
+        (
+            PasswordSettings(BCRYPT_ROUNDS=4),
+            PasswordSettings(
+                SCHEMES=["argon2", "bcrypt"],
+                BCRYPT_ROUNDS=4,
+                ARGON2_TIME_COST=1,
+                ARGON2_MEMORY_COST=1024,
+                ARGON2_PARALLELISM=1,
+            ),
+            True,
+        ),
+    ],
+    ids=[
+        "Same policy",
+        "More bcrypt rounds",
+        "Less bcrypt rounds",
+        "Scheme changed to argon2",
+    ],
+)
+def test_make_pwd_context(old_settings, new_settings, needs_update):
+    hashed = make_pwd_context(old_settings).hash("valid_password")
+    new_context = make_pwd_context(new_settings)
+    assert new_context.verify("valid_password", hashed)
+    assert new_context.needs_update(hashed) is needs_update
+
+
 def test_create_jwt_token():
     data = {"sub": "test_username"}
     token = create_jwt_token(data)
@@ -43,6 +107,51 @@ def test_create_jwt_token():
     exp_timestamp = decoded["exp"]
     now_timestamp = datetime.datetime.now(datetime.UTC).timestamp()
     assert exp_timestamp > now_timestamp
+    assert decoded["iat"] <= now_timestamp
+    assert len(decoded["jti"]) == 32
+    assert (
+        decoded["jti"]
+        != jwt.decode(
+            create_jwt_token(data),
+            settings.JWT.SECRET_KEY,
+            algorithms=[settings.JWT.ALGORITHM],
+        )["jti"]
+    )
+
+
+def test_create_refresh_token():
+    token, token_hash = create_refresh_token()
+    other_token, _ = create_refresh_token()
+    assert token != other_token
+    assert token_hash == hash_refresh_token(token)
+    assert len(token_hash) == 64
+    assert token not in token_hash
+
+
+def test_create_api_key(monkeypatch):
+    key, prefix, key_hash = create_api_key()
+    assert key.startswith(f"cx_{prefix}_")
+    assert get_api_key_prefix(key) == prefix
+    assert key_hash == hash_api_key(key)
+    assert len(key_hash) == 64
+    # хеш зависит от секрета HMAC
+    monkeypatch.setattr(settings.JWT, "API_KEY_SECRET", "other_secret")
+    assert hash_api_key(key) != key_hash
+
+
+@pytest.mark.parametrize(
+    "key", ["", "token", "cx_short_secret", "xx_0123456789ab_secret"]
+)
+def test_get_api_key_prefix_invalid(key):
+    assert get_api_key_prefix(key) is None
+
+
+def test_get_refresh_token_expiry():
+    expiry = get_refresh_token_expiry()
+    expected = datetime.datetime.now(datetime.UTC) + datetime.timedelta(
+        days=settings.JWT.REFRESH_EXPIRES_DAYS
+    )
+    assert abs(expected - expiry) < datetime.timedelta(seconds=5)
 
 
 @pytest.mark.parametrize(
@@ -91,3 +200,45 @@ def test_get_username_from_token(payload, secret, expectation, error_detail):
         assert result == payload["sub"]
         if exc_info is not None:
             assert str(exc_info.value) == error_detail
+
+
+def test_decode_revoked_token():
+    token = create_jwt_token({"sub": "user"})
+    payload = decode_jwt_token(token)
+    revocations = get_revocation_list()
+    revocations.add(
+        RevocationEntry(1, payload["jti"], "user", 0, payload["exp"])
+    )
+    with pytest.raises(InvalidTokenException) as exc_info:
+        get_username_from_token(token)
+    assert exc_info.value.detail == "Токен отозван"
+    # отзыв всех токенов пользователя
+    other = create_jwt_token({"sub": "other"})
+    revocations.add(
+        RevocationEntry(
+            2, None, "other", payload["iat"] + 60, payload["exp"] + 60
+        )
+    )
+    with pytest.raises(InvalidTokenException):
+        get_username_from_token(other)
+
+
+def test_read_jwt_token(monkeypatch):
+    monkeypatch.setattr(settings.JWT, "EXPIRES_MINUTES", -1)
+    token = create_jwt_token({"sub": "user"})
+    payload = read_jwt_token(token)
+    assert payload["sub"] == "user"
+    # истекший и отозванный токен читается
+    get_revocation_list().add(
+        RevocationEntry(1, payload["jti"], "user", 0, time.time() + 60)
+    )
+    assert read_jwt_token(token)["jti"] == payload["jti"]
+    assert read_jwt_token("invalid") is None
+    assert read_jwt_token(make_token({"sub": "user"}, "other" * 8)) is None
+
+
+def test_get_admin_username(monkeypatch):
+    monkeypatch.setattr(settings.APP, "ADMIN_USERNAMES", ["admin", "ops"])
+    assert get_admin_username("ops") == "ops"
+    with pytest.raises(ForbiddenException):
+        get_admin_username("valid_user")
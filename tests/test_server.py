@@ -0,0 +1,33 @@
+import asyncio
+import signal
+
+import pytest
+import uvicorn
+from pytest_mock import MockerFixture
+
+from app.core.server import GracefulServer, run
+
+
+@pytest.mark.asyncio
+async def test_handle_exit_starts_draining(mocker: MockerFixture):
+    start_draining = mocker.patch("app.core.server.start_draining")
+    server = GracefulServer(uvicorn.Config("main:app"))
+    server._loop = asyncio.get_running_loop()
+    server.handle_exit(signal.SIGTERM, None)
+    await asyncio.sleep(0)
+    start_draining.assert_called_once()
+    assert server.should_exit
+
+
+def test_run_sets_graceful_shutdown_timeout(mocker: MockerFixture):
+    server_run = mocker.patch.object(GracefulServer, "run")
+    setup_logger = mocker.patch("app.core.server.setup_logger")
+    config = mocker.patch("app.core.server.uvicorn.Config")
+    app_settings = mocker.patch("app.core.server.get_settings")().APP
+    app_settings.configure_mock(
+        HOST="127.0.0.1", PORT=8000, SHUTDOWN_TIMEOUT=20
+    )
+    run()
+    assert config.call_args.kwargs["timeout_graceful_shutdown"] == 22
+    server_run.assert_called_once()
+    setup_logger.assert_called_once()
@@ -0,0 +1,217 @@
+import asyncio
+import time
+
+import pytest
+
+from app.api.utils.cache import TTLCache
+from app.api.utils.tiered_cache import SQLiteCache, TwoTierCache
+from app.core.metrics import metrics
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    cache = SQLiteCache(tmp_path / "shared.db", maxsize=3)
+    yield cache
+    cache.close()
+
+
+def make_tiers(l2, ttl=60, lease_seconds=1):
+    return TwoTierCache(
+        "test",
+        TTLCache(maxsize=10, ttl=ttl),
+        l2,
+        encode_key=str,
+        dump=str,
+        load=lambda key, text: int(text),
+        lease_seconds=lease_seconds,
+        poll_interval=0.01,
+    )
+
+
+def test_sqlite_cache(sqlite_cache):
+    assert sqlite_cache.get("a") is None
+    expires_at = time.time() + 60
+    sqlite_cache.set("a", "1", expires_at)
+    assert sqlite_cache.get("a") == ("1", expires_at)
+    sqlite_cache.set("b", "2", time.time() - 1)
+    assert sqlite_cache.get("b") is None
+    journal_mode = sqlite_cache._connect().execute("PRAGMA journal_mode")
+    assert journal_mode.fetchone()[0] == "wal"
+
+
+def test_sqlite_cache_shared(sqlite_cache):
+    # другое соединение с тем же файлом - как другой процесс
+    other = SQLiteCache(sqlite_cache.path, maxsize=3)
+    sqlite_cache.set("a", "1", time.time() + 60)
+    assert other.get("a")[0] == "1"
+    other.close()
+
+
+def test_sqlite_cache_maxsize(sqlite_cache):
+    now = time.time()
+    for index, key in enumerate("abcd"):
+        sqlite_cache.set(key, key, now + 60 + index)
+    # вытеснена запись, истекающая раньше других
+    assert sqlite_cache.get("a") is None
+    assert [sqlite_cache.get(key)[0] for key in "bcd"] == ["b", "c", "d"]
+
+
+def test_sqlite_cache_lease(sqlite_cache):
+    assert sqlite_cache.acquire("a", "first", 60)
+    assert not sqlite_cache.acquire("a", "second", 60)
+    # владелец может продлить аренду
+    assert sqlite_cache.acquire("a", "first", 60)
+    sqlite_cache.release("a", "second")
+    assert not sqlite_cache.acquire("a", "second", 60)
+    sqlite_cache.release("a", "first")
+    assert sqlite_cache.acquire("a", "second", 0)
+    # истекшая аренда достается другому
+    assert sqlite_cache.acquire("a", "first", 60)
+
+
+@pytest.mark.asyncio
+async def test_two_tier_hits(sqlite_cache):
+    first, second = make_tiers(sqlite_cache), make_tiers(sqlite_cache)
+    assert await first.get("a") is None
+    await first.set("a", 1, 30)
+    assert await first.get("a") == 1
+    # в другом процессе - из L2, затем из его L1 с тем же временем жизни
+    assert await second.get("a") == 1
+    assert second.l1.remaining_ttl("a") == pytest.approx(30, abs=1)
+    assert await second.get("a") == 1
+    assert metrics.value("test_cache_l1_hits_total") == 2
+    assert metrics.value("test_cache_l2_hits_total") == 1
+    assert metrics.value("test_cache_misses_total") == 1
+    assert metrics.value("test_cache_l1_hit_ratio") == 0.5
+    assert metrics.value("test_cache_l2_hit_ratio") == 0.5
+    assert "test_cache_l2_hit_ratio 0.5" in metrics.render()
+
+
+@pytest.mark.asyncio
+async def test_two_tier_set_many(sqlite_cache):
+    first, second = make_tiers(sqlite_cache), make_tiers(sqlite_cache)
+    await first.set_many({"a": 1, "b": 2}, ttl=30)
+    assert first.l1.get("b") == 2
+    assert await second.get("a") == 1
+    assert second.l1.remaining_ttl("a") == pytest.approx(30, abs=1)
+    assert sqlite_cache.count() == 2
+
+
+@pytest.mark.asyncio
+async def test_two_tier_without_l2():
+    tiers = make_tiers(None)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return 5
+
+    assert await tiers.refresh("a", fetch) == 5
+    assert await tiers.get("a") == 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_two_tier_single_writer(sqlite_cache):
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return 7
+
+    workers = [make_tiers(sqlite_cache) for _ in range(3)]
+    results = await asyncio.gather(
+        *(worker.refresh("a", fetch) for worker in workers)
+    )
+    assert results == [7, 7, 7]
+    # внешний API запрошен одним "процессом", остальные получили L2
+    assert calls == 1
+    assert all(worker.l1.get("a") == 7 for worker in workers)
+
+
+@pytest.mark.parametrize("shared", [True, False])
+@pytest.mark.asyncio
+async def test_two_tier_single_flight(sqlite_cache, shared):
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return 7
+
+    tiers = make_tiers(sqlite_cache if shared else None)
+    first = asyncio.create_task(tiers.refresh("a", fetch))
+    others = [asyncio.create_task(tiers.refresh("a", fetch)) for _ in range(4)]
+    await asyncio.sleep(0)
+    # отмена одного вызова не отменяет обновление для остальных
+    first.cancel()
+    assert await asyncio.gather(*others) == [7, 7, 7, 7]
+    assert calls == 1
+    assert not tiers._refreshing
+
+
+@pytest.mark.asyncio
+async def test_two_tier_wait_deadline(sqlite_cache):
+    # аренду держит "процесс", который не пишет значение
+    assert sqlite_cache.acquire("a", "stuck", 60)
+    tiers = make_tiers(sqlite_cache, lease_seconds=0.1)
+
+    async def fetch():
+        return 4
+
+    start = time.monotonic()
+    assert await tiers.refresh("a", fetch) == 4
+    assert time.monotonic() - start < 1
+    assert sqlite_cache.get("a")[0] == "4"
+
+
+@pytest.mark.asyncio
+async def test_two_tier_lease_released_on_error(sqlite_cache):
+    first, second = make_tiers(sqlite_cache), make_tiers(sqlite_cache)
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream")
+
+    async def fetch():
+        return 3
+
+    results = await asyncio.gather(
+        first.refresh("a", failing),
+        second.refresh("a", fetch),
+        return_exceptions=True,
+    )
+    assert isinstance(results[0], RuntimeError)
+    # после ошибки владельца аренду взял следующий
+    assert results[1] == 3
+
+
+@pytest.mark.asyncio
+async def test_two_tier_delete(sqlite_cache):
+    first, second = make_tiers(sqlite_cache), make_tiers(sqlite_cache)
+    for key, value in (("a1", 1), ("a2", 2), ("b1", 3)):
+        await first.set(key, value)
+    await second.get("a1")
+    assert sqlite_cache.count() == 3
+    assert await first.delete_prefix("a") == 2
+    assert await first.get("a2") is None
+    assert await first.get("b1") == 3
+    # удалено и из L2: другие процессы не получат запись из него
+    assert sqlite_cache.get("a1") is None
+    assert await first.delete_suffix("1") == 1
+    assert await first.get("b1") is None
+    assert sqlite_cache.count() == 0
+    await first.set("b1", 3)
+    assert await first.delete("b1")
+    assert not await first.delete("b1")
+    assert sqlite_cache.count() == 0
+    # удаляется только сам ключ, а не ключи с ним в начале
+    await first.set("a", 1)
+    await first.set("ab", 2)
+    assert await first.delete("a")
+    assert await first.get("ab") == 2
+    assert sqlite_cache.get("ab")[0] == "2"
@@ -1,10 +1,21 @@
 import pytest
 import pytest_asyncio
 from pydantic import EmailStr, TypeAdapter
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 
 from app.api.db.models import User
-from app.api.repositories.user_repository import AlchemyUserRepository
+from app.api.repositories.user_repository import (
+    AlchemyUserRepository,
+    CachedUserRepository,
+    UserCredentials,
+)
+from app.api.utils.cache import TTLCache
+
+
+@pytest.fixture
+def database_url(all_backends_database_url):
+    return all_backends_database_url
 
 
 @pytest_asyncio.fixture
@@ -66,3 +77,119 @@ async def test_get_by_email(user_repository):
     email_2 = TypeAdapter(EmailStr).validate_python("not_existing@example.com")
     not_found = await user_repository.get_by_email(email_2)
     assert not_found is None
+
+
+@pytest.mark.usefixtures("setup_test_db")
+@pytest.mark.asyncio
+async def test_update_password(user_repository, async_session):
+    user = await user_repository.get_by_username("existing_user")
+    await user_repository.update_password(user.id, "existing_user", "new_hash")
+    async_session.expire_all()
+    user = await user_repository.get_by_username("existing_user")
+    assert user.hashed_password == "new_hash"
+
+
+@pytest.mark.usefixtures("setup_test_db")
+@pytest.mark.asyncio
+async def test_get_credentials(user_repository):
+    found = await user_repository.get_credentials("existing_user")
+    assert isinstance(found, UserCredentials)
+    assert found.username == "existing_user"
+    assert found.hashed_password.startswith("$2b$")
+
+    not_found = await user_repository.get_credentials("not_existing")
+    assert not_found is None
+
+
+@pytest.mark.usefixtures("setup_test_db")
+@pytest.mark.asyncio
+async def test_cached_repository_skips_db_on_hit(async_session, mocker):
+    cache = TTLCache(maxsize=10, ttl=60)
+    repo = CachedUserRepository(async_session, cache)
+    spy = mocker.spy(async_session, "execute")
+    first = await repo.get_credentials("existing_user")
+    second = await repo.get_credentials("existing_user")
+    assert first == second
+    assert spy.await_count == 1
+
+    # негативный кеш
+    assert await repo.get_credentials("not_existing") is None
+    assert await repo.get_credentials("not_existing") is None
+    assert spy.await_count == 2
+
+
+@pytest.mark.usefixtures("setup_test_db")
+@pytest.mark.asyncio
+async def test_cached_repository_invalidation(async_session):
+    cache = TTLCache(maxsize=10, ttl=60)
+    repo = CachedUserRepository(async_session, cache)
+
+    # регистрация сбрасывает негативную запись
+    assert await repo.get_credentials("new_user") is None
+    await repo.add_one(
+        User(username="new_user", email="new@example.com", hashed_password="h")
+    )
+    assert "new_user" not in cache
+    assert (await repo.get_credentials("new_user")).hashed_password == "h"
+
+    # смена пароля сбрасывает запись пользователя
+    credentials = await repo.get_credentials("existing_user")
+    # записи других пользователей не перебираются и не переупорядочиваются
+    order = list(cache)
+    await repo.update_password(credentials.id, "existing_user", "new_hash")
+    assert "existing_user" not in cache
+    assert list(cache) == [key for key in order if key != "existing_user"]
+    assert "new_user" in cache
+    async_session.expire_all()
+    credentials = await repo.get_credentials("existing_user")
+    assert credentials.hashed_password == "new_hash"
+
+
+@pytest.mark.usefixtures("setup_test_db")
+@pytest.mark.asyncio
+async def test_lookups_are_case_insensitive(user_repository):
+    assert await user_repository.get_by_username("Existing_User")
+    assert await user_repository.get_credentials("EXISTING_USER")
+    email = TypeAdapter(EmailStr).validate_python("Existing@Example.com")
+    assert await user_repository.get_by_email(email)
+
+
+async def explain(session, statement, parameters) -> str:
+    conn = await session.connection()
+    if conn.dialect.name == "sqlite":
+        query = f"EXPLAIN QUERY PLAN {statement}"
+    else:
+        # на маленькой таблице планировщик выбрал бы seq scan
+        await conn.exec_driver_sql("SET enable_seqscan = off")
+        query = f"EXPLAIN {statement}"
+    rows = (await conn.exec_driver_sql(query, parameters)).all()
+    return "\n".join(str(row) for row in rows)
+
+
+@pytest.mark.usefixtures("setup_test_db")
+@pytest.mark.parametrize(
+    "method, value, index_name",
+    [
+        ("get_by_username", "existing_user", "ix_users_username_lower"),
+        ("get_credentials", "existing_user", "ix_users_username_lower"),
+        ("get_by_email", "existing@example.com", "ix_users_email_lower"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_lookup_query_plan_uses_index(
+    async_session, user_repository, method, value, index_name
+):
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    engine = async_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        await getattr(user_repository, method)(value)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = executed[-1]
+    plan = await explain(async_session, statement, parameters)
+    assert index_name in plan
@@ -1,15 +1,23 @@
+import datetime
+import time
 from contextlib import nullcontext as does_not_raise
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from app.api.db.models import User
+from app.api.db.models import RefreshToken, RevokedToken, User
 from app.api.errors.exceptions import (
+    InvalidTokenException,
     UniqueFieldException,
+    UserNotFoundException,
     UserUnauthorisedException,
 )
+from app.api.repositories.user_repository import UserCredentials
 from app.api.schemas.users import UserCreate
-from app.api.services.user_service import UserService
+from app.api.services.user_service import UserService, revocation_entry
+from app.api.utils.revocation import RevocationList, get_revocation_list
+from app.core.config import settings
+from app.core.security import hash_refresh_token
 
 
 @pytest.mark.asyncio
@@ -63,12 +71,12 @@ async def test_register_user_unique_constraints(expected_field):
     "user_or_none, expectation, verified",
     [
         (
-            User(username="test", hashed_password="hashed"),
+            UserCredentials(1, "test", "hashed"),
             does_not_raise(),
             True,
         ),
         (
-            User(username="test", hashed_password="hashed"),
+            UserCredentials(1, "test", "hashed"),
             pytest.raises(UserUnauthorisedException),
             False,
         ),
@@ -83,16 +91,332 @@ async def test_authenticate_user_success(
     mocked_verify_password = mocker.patch(
         "app.api.services.user_service.verify_password", return_value=verified
     )
+    mocker.patch(
+        "app.api.services.user_service.password_needs_rehash",
+        return_value=False,
+    )
     uow = MagicMock()
     uow.__aenter__.return_value = uow
-    uow.user_repo.get_by_username = AsyncMock(return_value=user_or_none)
+    uow.user_repo.get_credentials = AsyncMock(return_value=user_or_none)
     service = UserService(uow)  # type: ignore
     with expectation as exc_info:
         result = await service.authenticate_user("Test", "secret")
     if exc_info is None:
         assert result == "test"
-    uow.user_repo.get_by_username.assert_awaited_once_with("test")
+    uow.user_repo.get_credentials.assert_awaited_once_with("test")
     if user_or_none is None:
         mocked_verify_password.assert_not_called()
     else:
         mocked_verify_password.assert_called_once_with("secret", "hashed")
+
+
+@pytest.mark.parametrize("needs_rehash", [True, False])
+@pytest.mark.asyncio
+async def test_authenticate_user_rehash(mocker, needs_rehash):
+    mocker.patch(
+        "app.api.services.user_service.verify_password", return_value=True
+    )
+    mocker.patch(
+        "app.api.services.user_service.password_needs_rehash",
+        return_value=needs_rehash,
+    )
+    mocker.patch(
+        "app.api.services.user_service.get_password_hash",
+        return_value="new_hash",
+    )
+    uow = MagicMock()
+    uow.__aenter__.return_value = uow
+    uow.user_repo.get_credentials = AsyncMock(
+        return_value=UserCredentials(3, "test", "old_hash")
+    )
+    uow.user_repo.update_password = AsyncMock()
+    service = UserService(uow)  # type: ignore
+    assert await service.authenticate_user("test", "secret") == "test"
+    if needs_rehash:
+        uow.user_repo.update_password.assert_awaited_once_with(
+            3, "test", "new_hash"
+        )
+    else:
+        uow.user_repo.update_password.assert_not_awaited()
+
+
+def make_uow():
+    uow = MagicMock()
+    uow.__aenter__.return_value = uow
+    return uow
+
+
+@pytest.mark.asyncio
+async def test_issue_refresh_token():
+    uow = make_uow()
+    uow.user_repo.get_credentials = AsyncMock(
+        return_value=UserCredentials(7, "test", "hashed")
+    )
+    uow.refresh_token_repo.add_one = AsyncMock()
+    service = UserService(uow)  # type: ignore
+    token = await service.issue_refresh_token("test")
+    stored: RefreshToken = uow.refresh_token_repo.add_one.call_args.args[0]
+    assert stored.user_id == 7
+    assert stored.token_hash == hash_refresh_token(token)
+    assert stored.token_hash != token
+
+
+@pytest.mark.asyncio
+async def test_issue_refresh_token_user_not_found():
+    uow = make_uow()
+    uow.user_repo.get_credentials = AsyncMock(return_value=None)
+    service = UserService(uow)  # type: ignore
+    with pytest.raises(UserUnauthorisedException):
+        await service.issue_refresh_token("test")
+
+
+@pytest.mark.parametrize(
+    "is_expired, revoked, revoke_won, expectation",
+    [
+        (False, False, True, does_not_raise()),
+        (True, False, True, pytest.raises(InvalidTokenException)),
+        (False, True, True, pytest.raises(InvalidTokenException)),
+        (False, False, False, pytest.raises(InvalidTokenException)),
+    ],
+    ids=[
+        "Success",
+        "Expired token",
+        "Reused revoked token",
+        "Revoked by concurrent request",
+    ],
+)
+@pytest.mark.asyncio
+async def test_rotate_refresh_token(
+    is_expired, revoked, revoke_won, expectation
+):
+    old_token = MagicMock(
+        id=3, user_id=7, revoked=revoked, is_expired=is_expired
+    )
+    old_token.user.username = "test"
+    uow = make_uow()
+    uow.refresh_token_repo.get_by_hash = AsyncMock(return_value=old_token)
+    uow.refresh_token_repo.revoke = AsyncMock(return_value=revoke_won)
+    uow.refresh_token_repo.add_one = AsyncMock()
+    uow.refresh_token_repo.revoke_all_for_user = AsyncMock()
+    service = UserService(uow)  # type: ignore
+    with expectation as exc_info:
+        username, new_token = await service.rotate_refresh_token("old")
+    uow.refresh_token_repo.get_by_hash.assert_awaited_once_with(
+        hash_refresh_token("old")
+    )
+    if exc_info is None:
+        assert username == "test"
+        uow.refresh_token_repo.revoke.assert_awaited_once_with(3)
+        stored = uow.refresh_token_repo.add_one.call_args.args[0]
+        assert stored.token_hash == hash_refresh_token(new_token)
+    elif not is_expired:
+        uow.refresh_token_repo.revoke_all_for_user.assert_awaited_once_with(7)
+        uow.refresh_token_repo.add_one.assert_not_awaited()
+    else:
+        uow.refresh_token_repo.add_one.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_rotate_unknown_refresh_token():
+    uow = make_uow()
+    uow.refresh_token_repo.get_by_hash = AsyncMock(return_value=None)
+    service = UserService(uow)  # type: ignore
+    with pytest.raises(InvalidTokenException):
+        await service.rotate_refresh_token("unknown")
+
+
+@pytest.mark.asyncio
+async def test_revoke_refresh_token():
+    token = MagicMock(revoked=False)
+    uow = make_uow()
+    uow.refresh_token_repo.get_by_hash = AsyncMock(return_value=token)
+    service = UserService(uow)  # type: ignore
+    await service.revoke_refresh_token("some")
+    assert token.revoked is True
+
+
+@pytest.mark.asyncio
+async def test_authenticate_user_uses_read_uow(mocker):
+    mocker.patch(
+        "app.api.services.user_service.verify_password", return_value=True
+    )
+    mocker.patch(
+        "app.api.services.user_service.password_needs_rehash",
+        return_value=False,
+    )
+    uow, read_uow = make_uow(), make_uow()
+    read_uow.user_repo.get_credentials = AsyncMock(
+        return_value=UserCredentials(1, "test", "hashed")
+    )
+    service = UserService(uow, read_uow)  # type: ignore
+    assert await service.authenticate_user("test", "secret") == "test"
+    read_uow.user_repo.get_credentials.assert_awaited_once_with("test")
+    uow.__aenter__.assert_not_called()
+
+
+async def assign_id(token):
+    # id записи назначает БД при flush
+    token.id = 5
+    return token
+
+
+@pytest.mark.asyncio
+async def test_revoke_access_token():
+    uow = make_uow()
+    uow.revoked_token_repo.get_by_jti = AsyncMock(return_value=None)
+    uow.revoked_token_repo.delete_expired = AsyncMock()
+    uow.revoked_token_repo.add_one = AsyncMock(side_effect=assign_id)
+    service = UserService(uow)  # type: ignore
+    expires_at = time.time() + 60
+    await service.revoke_access_token("a" * 32, "test", expires_at)
+    stored: RevokedToken = uow.revoked_token_repo.add_one.call_args.args[0]
+    assert stored.jti == "a" * 32
+    assert stored.expires_at.timestamp() == pytest.approx(expires_at)
+    uow.revoked_token_repo.delete_expired.assert_awaited_once()
+    # отзыв действует в процессе сразу
+    revocations = get_revocation_list()
+    assert revocations.is_revoked("a" * 32, "test", 0)
+    assert revocations.synced_until is None
+
+
+@pytest.mark.asyncio
+async def test_revoke_access_token_already_revoked():
+    now = datetime.datetime.now(datetime.UTC)
+    uow = make_uow()
+    uow.revoked_token_repo.get_by_jti = AsyncMock(
+        return_value=RevokedToken(
+            id=3,
+            jti="a" * 32,
+            username="test",
+            revoked_at=now,
+            expires_at=now + datetime.timedelta(minutes=1),
+        )
+    )
+    uow.revoked_token_repo.add_one = AsyncMock()
+    service = UserService(uow)  # type: ignore
+    await service.revoke_access_token("a" * 32, "test", time.time() + 60)
+    uow.revoked_token_repo.add_one.assert_not_awaited()
+    assert get_revocation_list().is_revoked("a" * 32, "test", 0)
+
+
+@pytest.mark.asyncio
+async def test_revoke_all_tokens():
+    uow = make_uow()
+    uow.user_repo.get_credentials = AsyncMock(
+        return_value=UserCredentials(7, "test", "hashed")
+    )
+    uow.refresh_token_repo.revoke_all_for_user = AsyncMock()
+    uow.revoked_token_repo.delete_expired = AsyncMock()
+    uow.revoked_token_repo.add_one = AsyncMock(side_effect=assign_id)
+    service = UserService(uow)  # type: ignore
+    issued_at = time.time()
+    await service.revoke_all_tokens("Test")
+    uow.refresh_token_repo.revoke_all_for_user.assert_awaited_once_with(7)
+    stored: RevokedToken = uow.revoked_token_repo.add_one.call_args.args[0]
+    assert stored.jti is None
+    assert stored.username == "test"
+    revocations = get_revocation_list()
+    assert revocations.is_revoked("a" * 32, "test", issued_at)
+    assert not revocations.is_revoked("a" * 32, "test", time.time() + 1)
+
+
+@pytest.mark.asyncio
+async def test_revoke_all_tokens_user_not_found():
+    uow = make_uow()
+    uow.user_repo.get_credentials = AsyncMock(return_value=None)
+    service = UserService(uow)  # type: ignore
+    with pytest.raises(UserNotFoundException):
+        await service.revoke_all_tokens("unknown")
+
+
+@pytest.mark.asyncio
+async def test_sync_revocations():
+    now = datetime.datetime.now(datetime.UTC)
+    tokens = [
+        RevokedToken(
+            id=index,
+            jti=jti,
+            username="test",
+            # SQLite возвращает время без часового пояса
+            revoked_at=now.replace(tzinfo=None),
+            expires_at=(now + datetime.timedelta(minutes=5)).replace(
+                tzinfo=None
+            ),
+        )
+        for index, jti in ((3, "a" * 32), (4, "b" * 32))
+    ]
+    uow, read_uow = make_uow(), make_uow()
+    uow.revoked_token_repo.list_since = AsyncMock(return_value=tokens)
+    service = UserService(uow, read_uow)  # type: ignore
+    assert await service.sync_revocations() == 2
+    # отзывы читаются из основной БД, а не с реплики
+    uow.revoked_token_repo.list_since.assert_awaited_once_with(None)
+    read_uow.__aenter__.assert_not_called()
+    revocations = get_revocation_list()
+    assert revocations.synced_until == pytest.approx(now.timestamp())
+    assert revocations.is_revoked("b" * 32, "test", 0)
+    # следующая загрузка повторно читает окно перед последним отзывом,
+    # уже загруженные записи не считаются
+    assert await service.sync_revocations() == 0
+    overlap = datetime.timedelta(seconds=settings.JWT.REVOCATION_SYNC_OVERLAP)
+    uow.revoked_token_repo.list_since.assert_awaited_with(
+        pytest.approx(now - overlap, abs=datetime.timedelta(seconds=1))
+    )
+
+
+@pytest.mark.asyncio
+async def test_sync_revocations_out_of_order_commits(mocker):
+    """Два процесса: запись с меньшим id фиксируется позже записи с
+    большим id, которую один из процессов уже применил у себя.
+    """
+
+    start = datetime.datetime.now(datetime.UTC)
+    # зафиксированные в БД отзывы
+    committed: list[RevokedToken] = []
+
+    def revoked_token(id_, jti, seconds):
+        return RevokedToken(
+            id=id_,
+            jti=jti,
+            username="test",
+            revoked_at=start + datetime.timedelta(seconds=seconds),
+            expires_at=start + datetime.timedelta(minutes=5),
+        )
+
+    async def list_since(revoked_after):
+        return [
+            token
+            for token in committed
+            if revoked_after is None or token.revoked_at >= revoked_after
+        ]
+
+    workers = {
+        name: RevocationList(capacity=100, error_rate=0.01)
+        for name in ("first", "second")
+    }
+
+    async def sync(name):
+        uow = make_uow()
+        uow.revoked_token_repo.list_since = AsyncMock(side_effect=list_since)
+        mocker.patch(
+            "app.api.services.user_service.get_revocation_list",
+            return_value=workers[name],
+        )
+        return await UserService(uow).sync_revocations()  # type: ignore
+
+    # first отзывает токен (id 2) и применяет отзыв у себя сразу
+    first_revocation = revoked_token(2, "a" * 32, 2)
+    committed.append(first_revocation)
+    workers["first"].add(revocation_entry(first_revocation))
+    assert await sync("first") == 0
+    assert await sync("second") == 1
+    # транзакция second получила id 1 раньше, но зафиксирована позже
+    committed.append(revoked_token(1, "b" * 32, 1))
+    assert await sync("first") == 1
+    assert await sync("second") == 1
+    committed.append(revoked_token(3, "c" * 32, 3))
+    for name, worker in workers.items():
+        assert await sync(name) == 1
+        assert all(
+            worker.is_revoked(jti * 32, "test", 0) for jti in "abc"
+        ), name